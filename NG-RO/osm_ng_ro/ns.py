@@ -19,7 +19,7 @@
 import logging
 # import yaml
 from traceback import format_exc as traceback_format_exc
-from osm_ng_ro.ns_thread import NsWorker
+from osm_ng_ro.ns_thread import NsWorker, NsWorkerException
 from osm_ng_ro.validation import validate_input, deploy_schema
 from osm_common import dbmongo, dbmemory, fslocal, fsmongo, msglocal, msgkafka, version as common_version
 from osm_common.dbbase import DbException
@@ -27,16 +27,19 @@ from osm_common.fsbase import FsException
 from osm_common.msgbase import MsgException
 from http import HTTPStatus
 from uuid import uuid4
-from threading import Lock
+from threading import Event, Lock, Thread
+from collections import deque, OrderedDict
 from random import choice as random_choice
 from time import time
-from jinja2 import Environment, Template, meta, TemplateError, TemplateNotFound, TemplateSyntaxError
+from functools import lru_cache
+from jinja2 import Environment, meta, TemplateError, TemplateNotFound, TemplateSyntaxError
 from cryptography.hazmat.primitives import serialization as crypto_serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.backends import default_backend as crypto_default_backend
 
 __author__ = "Alfonso Tierno <alfonso.tiernosepulveda@telefonica.com>"
 min_common_version = "0.1.16"
+CLOUD_INIT_CACHE_SIZE = 256  # max number of cloud-init files and of compiled jinja2 templates kept in memory
 
 
 class NsException(Exception):
@@ -66,6 +69,101 @@ def get_process_id():
     return "".join(random_choice("0123456789abcdef") for _ in range(12))
 
 
+@lru_cache(maxsize=CLOUD_INIT_CACHE_SIZE)
+def compile_jinja2(cloud_init_content):
+    """
+    Compile a jinja2 template. Results are cached by content, so that the cloud-init of a VDU with many instances, or
+    deployed many times, is parsed and compiled only once. Errors are not cached
+    :param cloud_init_content: text of the template
+    :return: tuple with the compiled template and the frozenset of variables that must be provided for rendering it
+    """
+    env = Environment()
+    ast = env.parse(cloud_init_content)
+    return env.from_string(ast), frozenset(meta.find_undeclared_variables(ast))
+
+
+def generate_ssh_keys():
+    """
+    Generate a new 2048 bits RSA keypair
+    :return: tuple with the private key in PEM format and the public key in OpenSSH format
+    """
+    key = rsa.generate_private_key(
+        backend=crypto_default_backend(),
+        public_exponent=65537,
+        key_size=2048
+    )
+    private_key = key.private_bytes(
+        crypto_serialization.Encoding.PEM,
+        crypto_serialization.PrivateFormat.PKCS8,
+        crypto_serialization.NoEncryption())
+    public_key = key.public_key().public_bytes(
+        crypto_serialization.Encoding.OpenSSH,
+        crypto_serialization.PublicFormat.OpenSSH
+    )
+    return private_key.decode('utf8'), public_key.decode('utf8')
+
+
+class SshKeysPool(Thread):
+    """
+    Thread that keeps a pool of pre-generated ssh keypairs, so that the generation, that takes hundreds of
+    milliseconds of CPU, is out of the deploy request. Key generation is done by openssl, out of the python GIL.
+    When the pool gets below low_water_mark keypairs, it is filled again up to size
+    """
+
+    def __init__(self, size, low_water_mark):
+        Thread.__init__(self, name="ssh_keys_pool", daemon=True)
+        self.size = size
+        self.low_water_mark = min(low_water_mark, size)
+        self.logger = logging.getLogger("ro.ns")
+        self.keys = deque()
+        self.fill_event = Event()
+        self.fill_event.set()
+        self.terminated = False
+        self.metrics = {"generated": 0, "hits": 0, "misses": 0}
+        self.metrics_lock = Lock()  # get is called concurrently from the cherrypy threads
+
+    def run(self):
+        while not self.terminated:
+            self.fill_event.wait()
+            self.fill_event.clear()
+            while len(self.keys) < self.size and not self.terminated:
+                try:
+                    self.keys.append(generate_ssh_keys())
+                    with self.metrics_lock:
+                        self.metrics["generated"] += 1
+                except Exception as e:
+                    self.logger.error("Cannot create ssh-keys for the pool: {}".format(e))
+                    break
+
+    def get(self):
+        """
+        Take a keypair from the pool
+        :return: tuple with private and public keys, or None if the pool is empty
+        """
+        try:
+            keys = self.keys.popleft()
+        except IndexError:
+            keys = None
+            self.logger.debug("ssh-keys pool is empty. Generating them inline")
+        with self.metrics_lock:
+            self.metrics["hits" if keys else "misses"] += 1
+        if len(self.keys) < self.low_water_mark:
+            self.fill_event.set()
+        return keys
+
+    def get_metrics(self):
+        """
+        Get the counters of generated keypairs and of hits and misses of get
+        :return: dictionary with the counters and the current number of keypairs at the pool
+        """
+        with self.metrics_lock:
+            return dict(self.metrics, depth=len(self.keys))
+
+    def stop(self):
+        self.terminated = True
+        self.fill_event.set()
+
+
 def versiontuple(v):
     """utility for compare dot separate versions. Fills with zeros to proper number comparison"""
     filled = []
@@ -75,6 +173,33 @@ def versiontuple(v):
 
 
 class Ns(object):
+    NS_LOCKS = 64  # number of locks shared by the NSs for serializing deploy/delete of the same NS
+    CLOUD_INIT_CACHE_SIZE = CLOUD_INIT_CACHE_SIZE  # max number of cloud-init files kept in memory
+    # indexes of ro_tasks created by init_db. Indexes with the prefix 'ro_tasks_' not declared here are removed, and
+    # the ones whose keys change are created again. At most one array field (tasks.xxx) can be used at each index
+    RO_TASKS_INDEXES = {
+        "ro_tasks_pending": [("target_id", 1), ("tasks.status", 1), ("to_check_at", 1), ("locked_at", 1)],
+        "ro_tasks_refresh": [("target_id", 1), ("tasks.item", 1), ("vim_info.refresh_at", 1)],
+        "ro_tasks_target_record_id": [("tasks.target_record_id", 1), ("target_id", 1)],
+        "ro_tasks_target_record": [("tasks.target_record", 1)],
+        "ro_tasks_task_id": [("tasks.task_id", 1)],
+        "ro_tasks_action_id": [("tasks.action_id", 1)],
+        "ro_tasks_nsr_id": [("tasks.nsr_id", 1)],
+    }
+    # most frequent queries over ro_tasks, checked with explain when [database] explain_queries is set
+    RO_TASKS_QUERIES = {
+        "NsWorker._lock_db_tasks": {"target_id": ["vim:id"], "tasks.status": ["SCHEDULED", "BUILD", "DONE", "FAILED"],
+                                    "locked_at.lt": 0, "to_check_at.lt": 0},
+        "NsWorker._get_dependencies by target_record_id": {"target_id": "vim:id",
+                                                           "tasks.target_record_id": ["id1", "id2"]},
+        "NsWorker._get_dependencies by task_id": {"tasks.ANYINDEX.task_id": ["id1", "id2"],
+                                                  "tasks.ANYINDEX.target_record.ne": None},
+        "NsWorker._get_vm_status": {"target_id": "vim:id", "tasks.item": "vdu", "tasks.status": ["BUILD", "DONE"],
+                                    "vim_info.refresh_at.lt": 0},
+        "Ns.deploy": {"tasks.target_record": "nsrs:id:vld.0.vim_info.0"},
+        "Ns.status": {"tasks.action_id": "id"},
+        "Ns.delete": {"tasks.nsr_id": "id"},
+    }
 
     def __init__(self):
         self.db = None
@@ -84,14 +209,72 @@ class Ns(object):
         # self.operations = None
         self.logger = logging.getLogger("ro.ns")
         self.map_topic = {}
-        self.write_lock = None
+        self.ns_locks = None  # striped locks, see _get_ns_lock
+        self.vims_lock = None  # protects the assignment of vims to workers
+        self.ssh_keys_pool = None
+        # cloud-init files content by 'vnfd_id:file:file_name' with the vnfd modified time, least recently used first
+        self.cloud_init_cache = OrderedDict()
+        self.cloud_init_lock = Lock()  # protects cloud_init_cache, used from the cherrypy threads
         self.assignment = {}
         self.next_worker = 0
         self.plugins = {}
         self.workers = []
 
     def init_db(self, target_version):
-        pass
+        """
+        Create or migrate the indexes of ro_tasks declared at RO_TASKS_INDEXES. Only for mongo database. Errors are
+        logged, as the RO can work without indexes, although slower
+        :param target_version: database version
+        :return: None
+        """
+        if not isinstance(self.db, dbmongo.DbMongo):
+            return
+        try:
+            collection = self.db.db["ro_tasks"]
+            existing_indexes = collection.index_information()
+            for index_name in existing_indexes:
+                if index_name.startswith("ro_tasks_") and index_name not in self.RO_TASKS_INDEXES:
+                    self.logger.info("Removing obsolete index '{}' of ro_tasks".format(index_name))
+                    collection.drop_index(index_name)
+            for index_name, index_keys in self.RO_TASKS_INDEXES.items():
+                if index_name in existing_indexes:
+                    if [tuple(key) for key in existing_indexes[index_name]["key"]] == index_keys:
+                        continue
+                    self.logger.info("Index '{}' of ro_tasks has changed. Creating it again".format(index_name))
+                    collection.drop_index(index_name)
+                collection.create_index(index_keys, name=index_name, background=True)
+        except Exception as e:
+            self.logger.error("Cannot create indexes of ro_tasks: {}".format(e))
+            return
+        if str(self.config["database"].get("explain_queries")).lower() == "true":
+            self.explain_queries()
+
+    def explain_queries(self):
+        """
+        Run explain over the queries at RO_TASKS_QUERIES and log a warning for the ones resolved with a full
+        collection scan instead of an index
+        :return: dictionary with the winning plan stages of each query
+        """
+        def _get_stages(plan):
+            stages = [plan.get("stage")]
+            for input_plan in plan.get("inputStages", [plan["inputStage"]] if "inputStage" in plan else []):
+                stages += _get_stages(input_plan)
+            return stages
+
+        collection = self.db.db["ro_tasks"]
+        plans = {}
+        for query_name, q_filter in self.RO_TASKS_QUERIES.items():
+            try:
+                explain = collection.find(self.db._format_filter(q_filter)).explain()
+                plans[query_name] = _get_stages(explain["queryPlanner"]["winningPlan"])
+                if "COLLSCAN" in plans[query_name]:
+                    self.logger.warning("Query {} over ro_tasks {} does a collection scan".format(query_name,
+                                                                                                  q_filter))
+                else:
+                    self.logger.debug("Query {} over ro_tasks plan: {}".format(query_name, plans[query_name]))
+            except Exception as e:
+                self.logger.error("Cannot explain query {} over ro_tasks: {}".format(query_name, e))
+        return plans
 
     def start(self, config):
         """
@@ -141,11 +324,31 @@ class Ns(object):
 
             # TODO load workers to deal with exising database tasks
 
-            self.write_lock = Lock()
+            self.ns_locks = [Lock() for _ in range(self.NS_LOCKS)]
+            self.vims_lock = Lock()
+            ssh_keys_pool_size = config.get("global", {}).get("server.ssh_keys_pool_size")
+            if ssh_keys_pool_size and not self.ssh_keys_pool:
+                ssh_keys_pool_low = config["global"].get("server.ssh_keys_pool_low") or ssh_keys_pool_size // 2
+                self.ssh_keys_pool = SshKeysPool(ssh_keys_pool_size, ssh_keys_pool_low)
+                self.ssh_keys_pool.start()
         except (DbException, FsException, MsgException) as e:
             raise NsException(str(e), http_code=e.http_code)
 
+    def get_metrics(self):
+        """
+        Get the metrics of the ssh-keys pool and of the workers, for monitoring
+        :return: dictionary with 'ssh_keys_pool' (None if not enabled) and 'workers', a list of worker metrics
+        """
+        return {
+            "ssh_keys_pool": self.ssh_keys_pool.get_metrics() if self.ssh_keys_pool else None,
+            "workers": [dict(worker.get_metrics(), worker_id=worker.worker_id) for worker in self.workers
+                        if worker.is_alive()],
+        }
+
     def stop(self):
+        if self.ssh_keys_pool:
+            self.ssh_keys_pool.stop()
+            self.ssh_keys_pool = None
         try:
             if self.db:
                 self.db.db_disconnect()
@@ -153,7 +356,8 @@ class Ns(object):
                 self.fs.fs_disconnect()
             if self.msg:
                 self.msg.disconnect()
-            self.write_lock = None
+            self.ns_locks = None
+            self.vims_lock = None
         except (DbException, FsException, MsgException) as e:
             raise NsException(str(e), http_code=e.http_code)
         for worker in self.workers:
@@ -169,9 +373,35 @@ class Ns(object):
         self.workers[worker_id].insert_task(("load_vim", vim_account_id))
         return worker_id
 
+    def _get_ns_lock(self, nsr_id):
+        """
+        Obtain the lock that serializes the database changes of a NS. Locks are striped by nsr_id, so that deploy and
+        delete of unrelated NSs run in parallel, while concurrent operations over the same NS are serialized
+        :param nsr_id: NS record id
+        :return: Lock
+        """
+        return self.ns_locks[hash(nsr_id) % len(self.ns_locks)]
+
     def _assign_vim(self, vim_account_id):
-        if vim_account_id not in self.assignment:
-            self.assignment[vim_account_id] = self._create_worker(vim_account_id)
+        if vim_account_id in self.assignment:
+            return
+        with self.vims_lock:
+            if vim_account_id not in self.assignment:
+                self.assignment[vim_account_id] = self._create_worker(vim_account_id)
+
+    def _notify_vim(self, vim_account_id):
+        """
+        Wake up the worker in charge of this vim, so that it looks for new tasks at database without waiting
+        :param vim_account_id: vim account whose ro_tasks have been created or modified
+        :return: None
+        """
+        worker_id = self.assignment.get(vim_account_id)
+        if worker_id is None:
+            return
+        try:
+            self.workers[worker_id].insert_task(("check_vim", vim_account_id))
+        except NsWorkerException:
+            pass  # queue is full, so worker is busy and will look at database anyway
 
     def _get_cloud_init(self, where):
         """
@@ -183,10 +413,22 @@ class Ns(object):
         _type, _, name = other.partition(":")
         vnfd = self.db.get_one("vnfds", {"_id": vnfd_id})
         if _type == "file":
+            # file content is kept while the vnfd is not modified
+            modified = vnfd["_admin"].get("modified")
+            with self.cloud_init_lock:
+                cached = self.cloud_init_cache.get(where)
+                if cached and modified and cached[0] == modified:
+                    self.cloud_init_cache.move_to_end(where)
+                    return cached[1]
             base_folder = vnfd["_admin"]["storage"]
             cloud_init_file = "{}/{}/cloud_init/{}".format(base_folder["folder"], base_folder["pkg-dir"], name)
             with self.fs.file_open(cloud_init_file, "r") as ci_file:
                 cloud_init_content = ci_file.read()
+            with self.cloud_init_lock:
+                self.cloud_init_cache[where] = (modified, cloud_init_content)
+                self.cloud_init_cache.move_to_end(where)
+                while len(self.cloud_init_cache) > self.CLOUD_INIT_CACHE_SIZE:
+                    self.cloud_init_cache.popitem(last=False)  # least recently used
         elif _type == "vdu":
             cloud_init_content = vnfd["vdu"][int(name)]["cloud-init"]
         else:
@@ -195,16 +437,13 @@ class Ns(object):
 
     def _parse_jinja2(self, cloud_init_content, params, context):
         try:
-            env = Environment()
-            ast = env.parse(cloud_init_content)
-            mandatory_vars = meta.find_undeclared_variables(ast)
+            template, mandatory_vars = compile_jinja2(cloud_init_content)
             if mandatory_vars:
                 for var in mandatory_vars:
                     if not params or var not in params:
                         raise NsException(
                             "Variable '{}' defined at vnfd='{}' must be provided in the instantiation parameters"
                             "inside the 'additionalParamsForVnf' block".format(var, context))
-            template = Template(cloud_init_content)
             return template.render(params or {})
 
         except (TemplateError, TemplateNotFound, TemplateSyntaxError) as e:
@@ -212,21 +451,8 @@ class Ns(object):
 
     def _create_db_ro_nsrs(self, nsr_id, now):
         try:
-            key = rsa.generate_private_key(
-                backend=crypto_default_backend(),
-                public_exponent=65537,
-                key_size=2048
-            )
-            private_key = key.private_bytes(
-                crypto_serialization.Encoding.PEM,
-                crypto_serialization.PrivateFormat.PKCS8,
-                crypto_serialization.NoEncryption())
-            public_key = key.public_key().public_bytes(
-                crypto_serialization.Encoding.OpenSSH,
-                crypto_serialization.PublicFormat.OpenSSH
-            )
-            private_key = private_key.decode('utf8')
-            public_key = public_key.decode('utf8')
+            keys = self.ssh_keys_pool.get() if self.ssh_keys_pool else None
+            private_key, public_key = keys or generate_ssh_keys()
         except Exception as e:
             raise NsException("Cannot create ssh-keys: {}".format(e))
 
@@ -259,6 +485,7 @@ class Ns(object):
         # db_nslcmop_update = {}        # update operation on nslcmops
         db_vnfrs = {}     # vnf's info indexed by _id
         vdu2cloud_init = {}
+        vims_to_notify = set()    # vim accounts with new tasks. Their workers are woken up at the end
         step = ''
         logging_text = "Task deploy nsr_id={} action_id={} ".format(nsr_id, action_id)
         self.logger.debug(logging_text + "Enter")
@@ -539,6 +766,7 @@ class Ns(object):
                 nonlocal db_ro_tasks
                 nonlocal db_new_tasks
                 nonlocal task_index
+                nonlocal vims_to_notify
 
                 # ensure all the target_list elements has an "id". If not assign the index
                 for target_index, tl in enumerate(target_list):
@@ -560,6 +788,7 @@ class Ns(object):
                         if not target_viminfo:
                             # must be deleted
                             self._assign_vim(existing_vim_info["vim_account_id"])
+                            vims_to_notify.add(existing_vim_info["vim_account_id"])
                             db_new_tasks.append(_create_task(
                                 item, "DELETE",
                                 target_record="{}.{}.vim_info.{}".format(db_record, vld_index, existing_vim_index),
@@ -593,6 +822,7 @@ class Ns(object):
                         extra_dict = process_params(target_vld, vim_info)
 
                         self._assign_vim(vim_info["vim_account_id"])
+                        vims_to_notify.add(vim_info["vim_account_id"])
                         db_ro_tasks.append(_create_ro_task(
                             vim_info["vim_account_id"], item, "CREATE",
                             target_record="{}.{}.vim_info.{}".format(db_record, vld_index, vim_index),
@@ -607,6 +837,7 @@ class Ns(object):
                 nonlocal task_index
                 nonlocal db_vnfrs
                 nonlocal db_ro_nsr
+                nonlocal vims_to_notify
 
                 if indata["action"] == "inject_ssh_key":
                     key = indata.get("key")
@@ -623,6 +854,7 @@ class Ns(object):
                                 raise NsException("Invalid vdu vnf={}.{}".format(vnf["_id"], target_vdu["id"]))
                             vim_info = vdur["vim_info"][0]
                             self._assign_vim(vim_info["vim_account_id"])
+                            vims_to_notify.add(vim_info["vim_account_id"])
                             target_record = "vnfrs:{}:vdur.{}.ssh_keys".format(vnf["_id"], vdu_index)
                             extra_dict = {
                                 "depends_on": ["vnfrs:{}:vdur.{}".format(vnf["_id"], vdur["id"])],
@@ -641,7 +873,7 @@ class Ns(object):
                                                                target_record_id=None,
                                                                extra_dict=extra_dict))
 
-            with self.write_lock:
+            with self._get_ns_lock(nsr_id):
                 if indata.get("action"):
                     _process_action(indata)
                 else:
@@ -700,6 +932,8 @@ class Ns(object):
                         step = "Updating database, vnfrs={}".format(vnfr_id)
                         self.db.set_one("vnfrs", {"_id": vnfr_id}, db_vnfr_update)
 
+            for vim_account_id in vims_to_notify:
+                self._notify_vim(vim_account_id)
             self.logger.debug(logging_text + "Exit")
             return {"status": "ok", "nsr_id": nsr_id, "action_id": action_id}, action_id, True
 
@@ -717,7 +951,7 @@ class Ns(object):
         # self.db.del_list({"_id": ro_task["_id"], "tasks.nsr_id.ne": nsr_id})
         retries = 5
         for retry in range(retries):
-            with self.write_lock:
+            with self._get_ns_lock(nsr_id):
                 ro_tasks = self.db.get_list("ro_tasks", {"tasks.nsr_id": nsr_id})
                 if not ro_tasks:
                     break
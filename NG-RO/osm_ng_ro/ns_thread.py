@@ -18,7 +18,7 @@
 ##
 
 """"
-This is thread that interacts with a VIM. It processes TASKs sequentially against a single VIM.
+This is thread that interacts with VIMs. It processes TASKs against the VIMs by a pool of threads.
 The tasks are stored at database in table ro_tasks
 A single ro_task refers to a VIM element (flavor, image, network, ...).
 A ro_task can contain several 'tasks', each one with a target, where to store the results
@@ -28,8 +28,12 @@ import threading
 import time
 import queue
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop
 from pkg_resources import iter_entry_points
 # from osm_common import dbmongo, dbmemory, fslocal, fsmongo, msglocal, msgkafka, version as common_version
+from osm_common import dbmongo
 from osm_common.dbbase import DbException
 # from osm_common.fsbase import FsException
 # from osm_common.msgbase import MsgException
@@ -80,11 +84,20 @@ class NsWorker(threading.Thread):
     REFRESH_ERROR = 600
     REFRESH_IMAGE = 3600 * 10
     REFRESH_DELETE = 3600 * 10
+    REFRESH_DEPENDENCY = 1  # when depending on a ro_task that is being processed
+    REFRESH_CACHE = 5  # validity of vm status obtained together with other vms of the same vim
+    DEPENDENCY_CACHE = 60  # validity of completed dependencies kept at dependency_cache
+    DEPENDENCY_CACHE_SIZE = 10000  # expired entries of dependency_cache are purged above this size
     QUEUE_SIZE = 2000
     # TODO delete assigment_lock = Lock()
     terminate = False
     # TODO delete assignment = {}
     MAX_TIME_LOCKED = 3600
+    MAX_TIME_IDLE = 60  # max time waiting for a notification before looking at database for pending tasks
+    RO_TASKS_BATCH = 10  # default number of ro_tasks locked at once from database
+    POOL_SIZE = 10  # default number of threads for executing ro_tasks
+    VIM_CONCURRENCY = 1  # default number of ro_tasks of the same vim executed at the same time
+    METRICS_LOG_INTERVAL = 300  # default period in seconds for logging the worker metrics, 0 for not logging them
 
     def __init__(self, worker, config, plugins, db):
         """Init a thread.
@@ -128,6 +141,28 @@ class NsWorker(threading.Thread):
             "vdu": self.exec_vm,
         }
         self.time_last_task_processed = None
+        self.check_at_heap = []  # heap of times where some ro_task processed by this worker must be checked again
+        self.ro_tasks_batch = deep_get(config, "worker", "ro_tasks_batch") or self.RO_TASKS_BATCH
+        self.ready_ro_tasks = deque()  # ro_tasks locked by this worker pending to be processed
+        self.metrics = {"claims": 0, "claimed_ro_tasks": 0, "claim_time": 0.0, "dependency_cache_hits": 0,
+                        "dependency_queries": 0}
+        self.metrics_log_interval = deep_get(config, "worker", "metrics_log_interval")
+        if self.metrics_log_interval is None:
+            self.metrics_log_interval = self.METRICS_LOG_INTERVAL
+        self.metrics_logged_at = time.time()
+        self.pool_size = deep_get(config, "worker", "pool_size") or self.POOL_SIZE
+        self.vim_concurrency = deep_get(config, "worker", "vim_concurrency") or self.VIM_CONCURRENCY
+        # vim_type: number of ro_tasks of the same vim executed at the same time, overrides vim_concurrency
+        self.vim_type_concurrency = deep_get(config, "worker", "vim_type_concurrency") or {}
+        self.vims_concurrency = {}  # target_id: number of ro_tasks executed at the same time, resolved at _load_vim
+        self.executor = None  # created at run
+        # protects running_targets, check_at_heap, dependency_cache and metrics, used from the executor threads
+        self.running_lock = threading.Lock()
+        self.running_targets = {}  # target_id: number of ro_tasks being executed
+        self.vm_status_cache = {}  # target_id: {vim_id: (time, vim_info)} obtained by refresh_vms_status
+        self.vm_status_locks = {}  # target_id: lock for filling vm_status_cache
+        # completed (BUILD, DONE) dependencies: (target_id, target_record_id) or (None, task_id): (time, ro_task, index)
+        self.dependency_cache = {}
 
     def insert_task(self, task):
         try:
@@ -198,6 +233,7 @@ class NsWorker(threading.Thread):
             )
             self.vim_targets.append(target_id)
             self.db_vims[target_id] = vim
+            self.vims_concurrency[target_id] = self._get_vim_concurrency(vim)
             self.error_status = None
             self.logger.info("Vim Connector loaded for vim_account={}, plugin={}".format(
                 vim_account_id, plugin_name))
@@ -208,44 +244,148 @@ class NsWorker(threading.Thread):
             self.my_vims[target_id] = FailingConnector(str(e))
             self.error_status = "Error loading vimconnector: {}".format(e)
 
+    def _get_vim_concurrency(self, vim):
+        """
+        Get the number of ro_tasks of a vim that can be executed at the same time. It is taken from the vim_account
+        config 'vim_concurrency', or else from the [worker] vim_type_concurrency of its vim_type, or else from the
+        [worker] vim_concurrency. Connectors are not thread safe in general, so it is 1 unless configured
+        :param vim: vim_account content
+        :return: number of ro_tasks
+        """
+        concurrency = deep_get(vim, "config", "vim_concurrency") or self.vim_type_concurrency.get(vim.get("vim_type"))
+        if not concurrency:
+            return self.vim_concurrency
+        try:
+            concurrency = int(concurrency)
+            if concurrency < 1:
+                raise ValueError("it must be greater than 0")
+            return concurrency
+        except (TypeError, ValueError) as e:
+            self.logger.error("Invalid vim_concurrency '{}' for vim_account={}, using {}: {}".format(
+                concurrency, vim.get("_id"), self.vim_concurrency, e))
+            return self.vim_concurrency
+
     def _get_db_task(self):
         """
-        Read actions from database and reload them at memory. Fill self.refresh_list, pending_list, vim_actions
-        :return: None
+        Get next ro_task to process whose target has not reached the limit of ro_tasks executed at the same time.
+        ro_tasks are locked at database in batches and kept at self.ready_ro_tasks
+        :return: ro_task or None if there is not any pending or all threads are busy
+        """
+        while True:
+            with self.running_lock:
+                if sum(self.running_targets.values()) >= self.pool_size:
+                    return None
+                now = time.time()
+                for ro_task in list(self.ready_ro_tasks):
+                    if ro_task["locked_at"] <= now - self.MAX_TIME_LOCKED:
+                        # lock has expired meanwhile, another worker can be processing it
+                        self.ready_ro_tasks.remove(ro_task)
+                    elif self.running_targets.get(ro_task["target_id"], 0) < \
+                            self.vims_concurrency.get(ro_task["target_id"], self.vim_concurrency):
+                        self.ready_ro_tasks.remove(ro_task)
+                        self.running_targets[ro_task["target_id"]] = \
+                            self.running_targets.get(ro_task["target_id"], 0) + 1
+                        return ro_task
+            # do not lock more ro_tasks while there are enough waiting for a busy target
+            if len(self.ready_ro_tasks) >= self.pool_size or not self._lock_db_tasks():
+                return None
+
+    def _lock_db_tasks(self):
+        """
+        Lock at database up to self.ro_tasks_batch pending ro_tasks and load them at self.ready_ro_tasks
+        :return: number of ro_tasks locked
         """
         now = time.time()
         if not self.time_last_task_processed:
             self.time_last_task_processed = now
         try:
             while True:
-                locked = self.db.set_one(
-                    "ro_tasks",
-                    q_filter={"target_id": self.vim_targets,
-                              "tasks.status": ['SCHEDULED', 'BUILD', 'DONE', 'FAILED'],
-                              "locked_at.lt": now - self.MAX_TIME_LOCKED,
-                              "to_check_at.lt": self.time_last_task_processed},
-                    update_dict={"locked_by": self.my_id, "locked_at": now},
-                    fail_on_empty=False)
-                if locked:
-                    # read and return
-                    ro_task = self.db.get_one(
-                        "ro_tasks",
-                        q_filter={"target_id": self.vim_targets,
-                                  "tasks.status": ['SCHEDULED', 'BUILD', 'DONE', 'FAILED'],
-                                  "locked_at": now})
-                    return ro_task
+                q_filter = {"target_id": self.vim_targets,
+                            "tasks.status": ['SCHEDULED', 'BUILD', 'DONE', 'FAILED'],
+                            "locked_at.lt": now - self.MAX_TIME_LOCKED,
+                            "to_check_at.lt": self.time_last_task_processed}
+                candidates = self._get_db_task_candidates(q_filter)
+                if candidates:
+                    q_filter["_id"] = candidates
+                    # filter is repeated so that ro_tasks locked meanwhile by other worker are not taken
+                    self.db.set_list("ro_tasks", q_filter=q_filter,
+                                     update_dict={"locked_by": self.my_id, "locked_at": now})
+                    ro_tasks = self.db.get_list("ro_tasks", q_filter={"_id": q_filter["_id"], "locked_by": self.my_id,
+                                                                      "locked_at": now})
+                    if ro_tasks:
+                        ro_tasks.sort(key=lambda x: x["to_check_at"])
+                        self.ready_ro_tasks.extend(ro_tasks)
+                        elapsed = time.time() - now
+                        with self.running_lock:
+                            self.metrics["claims"] += 1
+                            self.metrics["claimed_ro_tasks"] += len(ro_tasks)
+                            self.metrics["claim_time"] += elapsed
+                        self.logger.debug("Locked {} ro_tasks in {:.3f} seconds".format(len(ro_tasks), elapsed))
+                        return len(ro_tasks)
+                    # all of them have been locked meanwhile by other worker
                 if self.time_last_task_processed == now:
                     self.time_last_task_processed = None
-                    return None
+                    return 0
                 else:
                     self.time_last_task_processed = now
                     # self.time_last_task_processed = min(self.time_last_task_processed + 1000, now)
 
         except DbException as e:
-            self.logger.error("Database exception at _get_db_task: {}".format(e))
+            self.logger.error("Database exception at _lock_db_tasks: {}".format(e))
         except Exception as e:
-            self.logger.critical("Unexpected exception at _get_db_task: {}".format(e), exc_info=True)
-        return None
+            self.logger.critical("Unexpected exception at _lock_db_tasks: {}".format(e), exc_info=True)
+        return 0
+
+    def _get_db_task_candidates(self, q_filter):
+        """
+        Get the _id of the first self.ro_tasks_batch ro_tasks matching q_filter, by to_check_at. With mongo only these
+        _id are read, so that the whole content of all the pending ro_tasks is not transferred at every claim
+        :param q_filter: filter of the pending ro_tasks
+        :return: list of _id
+        """
+        candidates = self._find_mongo_ro_tasks_ids(q_filter)
+        if candidates is not None:
+            return candidates
+        candidates = self.db.get_list("ro_tasks", q_filter=q_filter)
+        candidates.sort(key=lambda x: x["to_check_at"])
+        return [ro_task["_id"] for ro_task in candidates[:self.ro_tasks_batch]]
+
+    def _find_mongo_ro_tasks_ids(self, q_filter):
+        """
+        WARNING: coupled to the internals of osm_common DbMongo: it uses the pymongo database 'db' and the private
+        method '_format_filter', that are not part of the osm_common db interface. It is the only place of the worker
+        that does it; review it when osm_common is upgraded.
+        Get with a sorted and limited query with projection the _id of the pending ro_tasks
+        :param q_filter: filter of the pending ro_tasks
+        :return: list of _id, or None if the database is not mongo or does not provide those attributes, so that the
+            caller must use the generic get_list
+        """
+        if not isinstance(self.db, dbmongo.DbMongo):
+            return None
+        mongo_db = getattr(self.db, "db", None)
+        format_filter = getattr(self.db, "_format_filter", None)
+        if mongo_db is None or not callable(format_filter):
+            return None
+        try:
+            rows = mongo_db["ro_tasks"].find(format_filter(q_filter), projection={"to_check_at": True})
+            return [row["_id"] for row in rows.sort("to_check_at", 1).limit(self.ro_tasks_batch)]
+        except Exception as e:  # pymongo exceptions
+            raise DbException(e)
+
+    def _unlock_db_tasks(self):
+        """
+        Release the ro_tasks locked by this worker that have not been processed
+        :return: None
+        """
+        if not self.ready_ro_tasks:
+            return
+        ro_task_ids = [ro_task["_id"] for ro_task in self.ready_ro_tasks]
+        self.ready_ro_tasks.clear()
+        try:
+            self.db.set_list("ro_tasks", q_filter={"_id": ro_task_ids, "locked_by": self.my_id},
+                             update_dict={"locked_by": None, "locked_at": int(time.time() - self.MAX_TIME_LOCKED)})
+        except DbException as e:
+            self.logger.error("Database exception at _unlock_db_tasks: {}".format(e))
 
     def _delete_task(self, ro_task, task_index, task_depends, db_update):
         """
@@ -307,35 +447,103 @@ class NsWorker(threading.Thread):
         else:
             return None, None
 
-    def _get_dependency(self, task_id, ro_task=None, target_id=None):
+    @staticmethod
+    def _dependency_key(task_id, target_id):
         if task_id.startswith("nsrs:") or task_id.startswith("vnfrs:"):
-            ro_task_dependency = self.db.get_one(
-                "ro_tasks",
-                q_filter={"target_id": target_id,
-                          "tasks.target_record_id": task_id
-                          },
-                fail_on_empty=False)
-            if ro_task_dependency:
-                for task_index, task in enumerate(ro_task_dependency["tasks"]):
-                    if task["target_record_id"] == task_id:
-                        return ro_task_dependency, task_index
+            return target_id, task_id
+        return None, task_id
 
-        else:
-            if ro_task:
-                for task_index, task in enumerate(ro_task["tasks"]):
-                    if task["task_id"] == task_id:
-                        return ro_task, task_index
-            ro_task_dependency = self.db.get_one(
-                "ro_tasks",
-                q_filter={"tasks.ANYINDEX.task_id": task_id,
-                          "tasks.ANYINDEX.target_record.ne": None
-                          },
-                fail_on_empty=False)
-            if ro_task_dependency:
-                for task_index, task in ro_task_dependency["tasks"]:
-                    if task["task_id"] == task_id:
-                        return ro_task_dependency, task_index
-        raise NsWorkerException("Cannot get depending task {}".format(task_id))
+    def _cache_dependencies(self, ro_task, task_status=None):
+        """
+        Keep at dependency_cache the tasks of a ro_task that are completed (BUILD or DONE), so that tasks depending on
+        them do not need to read them from database. Other tasks are removed from the cache
+        :param ro_task: ro_task, as read from database
+        :param task_status: (optional) dictionary with the new status of the tasks by index, if changed
+        :return: None
+        """
+        now = time.time()
+        with self.running_lock:
+            if len(self.dependency_cache) > self.DEPENDENCY_CACHE_SIZE:
+                for key, cached in list(self.dependency_cache.items()):
+                    if cached[0] < now - self.DEPENDENCY_CACHE:
+                        self.dependency_cache.pop(key, None)
+            tasks = [dict(task, status=task_status[index]) if task and task_status and index in task_status else task
+                     for index, task in enumerate(ro_task["tasks"])]
+            cached_ro_task = None
+            for task_index, task in enumerate(tasks):
+                if not task:
+                    continue
+                keys = [(None, task["task_id"])]
+                if task.get("target_record_id"):
+                    keys.append((ro_task["target_id"], task["target_record_id"]))
+                if task["status"] in ("BUILD", "DONE") and task["action"] == "CREATE":
+                    if not cached_ro_task:
+                        cached_ro_task = {"_id": ro_task["_id"], "target_id": ro_task["target_id"],
+                                          "locked_at": ro_task["locked_at"], "to_check_at": ro_task["to_check_at"],
+                                          "vim_info": dict(ro_task["vim_info"]), "tasks": tasks}
+                    for key in keys:
+                        self.dependency_cache[key] = (now, cached_ro_task, task_index)
+                else:
+                    for key in keys:
+                        self.dependency_cache.pop(key, None)
+
+    def _get_dependencies(self, task_ids, ro_task=None, target_id=None):
+        """
+        Get the ro_tasks of a list of dependencies. Completed dependencies are taken from dependency_cache, the rest
+        are read from database with a single query for the ones identified by target_record_id and another one for the
+        ones identified by task_id
+        :param task_ids: list of dependencies, either target_record_id (nsrs:... or vnfrs:...) or task_id
+        :param ro_task: (optional) ro_task where to look for the task_id dependencies before going to database
+        :param target_id: target of the dependencies identified by target_record_id
+        :return: dictionary with a tuple (ro_task, task_index) by dependency. Raises NsWorkerException if not found
+        """
+        now = time.time()
+        dependencies = {}
+        record_ids = []
+        task_ids_to_read = []
+        for task_id in task_ids:
+            with self.running_lock:
+                cached = self.dependency_cache.get(self._dependency_key(task_id, target_id))
+                if cached and cached[0] > now - self.DEPENDENCY_CACHE:
+                    self.metrics["dependency_cache_hits"] += 1
+                else:
+                    cached = None
+            if cached:
+                dependencies[task_id] = cached[1:]
+            elif task_id.startswith("nsrs:") or task_id.startswith("vnfrs:"):
+                record_ids.append(task_id)
+            else:
+                if ro_task:
+                    task_index = next((index for index, task in enumerate(ro_task["tasks"])
+                                       if task and task["task_id"] == task_id), None)
+                    if task_index is not None:
+                        dependencies[task_id] = (ro_task, task_index)
+                        continue
+                task_ids_to_read.append(task_id)
+
+        ro_task_dependencies = []
+        with self.running_lock:
+            self.metrics["dependency_queries"] += len([ids for ids in (record_ids, task_ids_to_read) if ids])
+        if record_ids:
+            ro_task_dependencies += self.db.get_list("ro_tasks", q_filter={"target_id": target_id,
+                                                                           "tasks.target_record_id": record_ids})
+        if task_ids_to_read:
+            ro_task_dependencies += self.db.get_list("ro_tasks", q_filter={"tasks.ANYINDEX.task_id": task_ids_to_read,
+                                                                           "tasks.ANYINDEX.target_record.ne": None})
+        for ro_task_dependency in ro_task_dependencies:
+            self._cache_dependencies(ro_task_dependency)
+            for task_index, task in enumerate(ro_task_dependency["tasks"]):
+                if not task:
+                    continue
+                if task.get("target_record_id") in record_ids and ro_task_dependency["target_id"] == target_id:
+                    dependencies.setdefault(task["target_record_id"], (ro_task_dependency, task_index))
+                if task["task_id"] in task_ids_to_read and task.get("target_record"):
+                    dependencies.setdefault(task["task_id"], (ro_task_dependency, task_index))
+
+        for task_id in task_ids:
+            if task_id not in dependencies:
+                raise NsWorkerException("Cannot get depending task {}".format(task_id))
+        return dependencies
 
     def _proccess_pending_tasks(self, ro_task):
         ro_task_id = ro_task["_id"]
@@ -385,13 +593,18 @@ class NsWorker(threading.Thread):
                             task_depends = {}
                             # check if tasks that this depends on have been completed
                             dependency_not_completed = False
+                            dependencies = self._get_dependencies(task.get("depends_on") or (),
+                                                                  target_id=ro_task["target_id"])
                             for dependency_task_id in (task.get("depends_on") or ()):
-                                dependency_ro_task, dependency_task_index = \
-                                    self._get_dependency(dependency_task_id, target_id=ro_task["target_id"])
+                                dependency_ro_task, dependency_task_index = dependencies[dependency_task_id]
                                 dependency_task = dependency_ro_task["tasks"][dependency_task_index]
                                 if dependency_task["status"] == "SCHEDULED":
                                     dependency_not_completed = True
-                                    next_check_at = min(next_check_at, dependency_ro_task["to_check_at"])
+                                    if dependency_ro_task["locked_at"] > now - self.MAX_TIME_LOCKED:
+                                        # it is being processed now
+                                        next_check_at = min(next_check_at, now + self.REFRESH_DEPENDENCY)
+                                    else:
+                                        next_check_at = min(next_check_at, dependency_ro_task["to_check_at"])
                                     break
                                 elif dependency_task["status"] == "FAILED":
                                     error_text = "Cannot {} {} because depends on failed {} {} id={}): {}".format(
@@ -471,6 +684,9 @@ class NsWorker(threading.Thread):
             # locked_at converted to int only for debugging. When has not decimals it means it has been unlocked
             db_ro_task_update["locked_at"] = int(now - self.MAX_TIME_LOCKED)
             db_ro_task_update["to_check_at"] = next_check_at
+            if next_check_at < now + self.MAX_TIME_IDLE:
+                with self.running_lock:
+                    heappush(self.check_at_heap, next_check_at)
             if not self.db.set_one("ro_tasks",
                                    update_dict=db_ro_task_update,
                                    q_filter={"_id": ro_task["_id"], "to_check_at": ro_task["to_check_at"]},
@@ -480,6 +696,10 @@ class NsWorker(threading.Thread):
                                 q_filter={"_id": ro_task["_id"]},
                                 update_dict=db_ro_task_update,
                                 fail_on_empty=True)
+            # tasks depending on this ro_task can be resolved from memory
+            self._cache_dependencies(ro_task, {index: db_ro_task_update["tasks.{}.status".format(index)]
+                                               for index in range(len(ro_task["tasks"]))
+                                               if "tasks.{}.status".format(index) in db_ro_task_update})
         except DbException as e:
             self.logger.error("ro_task={} Error updating database {}".format(ro_task_id, e))
         except Exception as e:
@@ -812,18 +1032,45 @@ class NsWorker(threading.Thread):
                                                            ro_vim_item_update_ok.get("vim_details", "")))
         return "DONE", ro_vim_item_update_ok
 
+    def _get_vm_status(self, target_id, vim_id):
+        """
+        Get vm status from VIM. It is obtained in a single call together with the rest of vms of this target that must
+        be refreshed soon. Those are kept at self.vm_status_cache for REFRESH_CACHE seconds
+        :param target_id: vim target
+        :param vim_id: vm to obtain
+        :return: vim_info dictionary as returned by refresh_vms_status
+        """
+        with self.vm_status_locks.setdefault(target_id, threading.Lock()):
+            now = time.time()
+            cache = self.vm_status_cache.setdefault(target_id, {})
+            cached = cache.pop(vim_id, None)
+            if cached and cached[0] > now - self.REFRESH_CACHE:
+                return cached[1]
+            vm_to_refresh = {vim_id}
+            try:
+                ro_tasks = self.db.get_list("ro_tasks", q_filter={"target_id": target_id, "tasks.item": "vdu",
+                                                                  "tasks.status": ["BUILD", "DONE"],
+                                                                  "vim_info.refresh_at.lt": now + self.REFRESH_CACHE})
+                vm_to_refresh.update(ro_task["vim_info"]["vim_id"] for ro_task in ro_tasks
+                                     if ro_task["vim_info"].get("vim_id"))
+            except DbException as e:
+                self.logger.error("Cannot get vms pending to refresh at {}: {}".format(target_id, e))
+            vim_dict = self.my_vims[target_id].refresh_vms_status(list(vm_to_refresh))
+            cache.clear()
+            for vm_id, vim_info in vim_dict.items():
+                if vm_id != vim_id:
+                    cache[vm_id] = (now, vim_info)
+            return vim_dict[vim_id]
+
     def refresh_vm(self, ro_task):
         """Call VIM to get vm status"""
         ro_task_id = ro_task["_id"]
-        target_vim = self.my_vims[ro_task["target_id"]]
 
         vim_id = ro_task["vim_info"]["vim_id"]
         if not vim_id:
             return None, None
-        vm_to_refresh_list = [vim_id]
         try:
-            vim_dict = target_vim.refresh_vms_status(vm_to_refresh_list)
-            vim_info = vim_dict[vim_id]
+            vim_info = self._get_vm_status(ro_task["target_id"], vim_id)
             if vim_info["status"] == "ACTIVE":
                 task_status = "DONE"
             elif vim_info["status"] == "BUILD":
@@ -891,16 +1138,86 @@ class NsWorker(threading.Thread):
             ro_vim_item_update = {"vim_details": str(e)}
             return "FAILED", ro_vim_item_update
 
+    def _get_idle_timeout(self):
+        """
+        Compute how long the worker can wait for a notification when there is not any pending task at database.
+        It is the time until the next known ro_task must be checked, limited to MAX_TIME_IDLE
+        :return: seconds to wait
+        """
+        now = time.time()
+        with self.running_lock:
+            if self.check_at_heap and self.check_at_heap[0] <= now:
+                while self.check_at_heap and self.check_at_heap[0] <= now:
+                    heappop(self.check_at_heap)
+                return 0
+            if self.check_at_heap:
+                return min(self.check_at_heap[0] - now, self.MAX_TIME_IDLE)
+        return self.MAX_TIME_IDLE
+
+    def get_metrics(self):
+        """
+        Get the counters of this worker for the claims of ro_tasks at database and for the dependency cache
+        :return: dictionary with the counters, the average claim time and the current ready and running ro_tasks
+        """
+        with self.running_lock:
+            metrics = dict(self.metrics)
+            metrics["running_ro_tasks"] = sum(self.running_targets.values())
+        metrics["ready_ro_tasks"] = len(self.ready_ro_tasks)
+        metrics["claim_time_avg"] = metrics["claim_time"] / metrics["claims"] if metrics["claims"] else 0.0
+        return metrics
+
+    def _log_metrics(self):
+        """
+        Log at INFO level the worker metrics every self.metrics_log_interval seconds
+        :return: None
+        """
+        if not self.metrics_log_interval:
+            return
+        now = time.time()
+        if now - self.metrics_logged_at < self.metrics_log_interval:
+            return
+        self.metrics_logged_at = now
+        metrics = self.get_metrics()
+        self.logger.info("Worker {} metrics: {}".format(self.my_id, ", ".join(
+            "{}={}".format(k, round(v, 3) if isinstance(v, float) else v) for k, v in metrics.items())))
+
+    def _execute_ro_task(self, ro_task):
+        """
+        Process a ro_task at the executor pool. When finished, the thread is woken up to launch more ro_tasks
+        :param ro_task: ro_task locked by this worker
+        :return: None
+        """
+        try:
+            self._proccess_pending_tasks(ro_task)
+        finally:
+            with self.running_lock:
+                self.running_targets[ro_task["target_id"]] -= 1
+            try:
+                self.insert_task(("check_vim", ro_task["target_id"]))
+            except NsWorkerException:
+                pass  # queue is full, so thread will look for tasks anyway
+
     def run(self):
         # load database
         self.logger.debug("Starting")
+        self.executor = ThreadPoolExecutor(max_workers=self.pool_size)
+        busy = True
         while True:
+            self._log_metrics()
             try:
-                task = self.task_queue.get(block=False if self.my_vims else True)
+                if not self.my_vims:
+                    task = self.task_queue.get(block=True)
+                elif busy:
+                    task = self.task_queue.get(block=False)
+                else:
+                    # wait until a notification arrives or the next known ro_task must be checked
+                    task = self.task_queue.get(timeout=self._get_idle_timeout())
+                busy = True
                 if task[0] == "terminate":
                     break
                 if task[0] == "load_vim":
                     self._load_vim(task[1])
+                # "check_vim" only wakes up the worker to look for new tasks at database
                 continue
             except queue.Empty:
                 pass
@@ -909,11 +1226,11 @@ class NsWorker(threading.Thread):
                 busy = False
                 ro_task = self._get_db_task()
                 if ro_task:
-                    self._proccess_pending_tasks(ro_task)
+                    self.executor.submit(self._execute_ro_task, ro_task)
                     busy = True
-                if not busy:
-                    time.sleep(5)
             except Exception as e:
                 self.logger.critical("Unexpected exception at run: " + str(e), exc_info=True)
 
+        self.executor.shutdown(wait=True)
+        self._unlock_db_tasks()
         self.logger.debug("Finishing")
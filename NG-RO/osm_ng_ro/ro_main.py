@@ -308,7 +308,7 @@ class Server(object):
             elif args or kwargs:
                 raise RoException("Invalid URL or query string for version", HTTPStatus.METHOD_NOT_ALLOWED)
             # TODO include version of other modules, pick up from some kafka admin message
-            osm_ng_ro_version = {"version": ro_version, "date": ro_version_date}
+            osm_ng_ro_version = {"version": ro_version, "date": ro_version_date, "metrics": self.ns.get_metrics()}
             return self._format_out(osm_ng_ro_version)
         except RoException as e:
             cherrypy.response.status = e.http_code.value
@@ -608,6 +608,9 @@ def _start_service():
                     engine_config[k1][k2] = int(v)
                 else:
                     engine_config[k1][k2] = v
+            elif k1 == "worker":
+                # update [worker] configuration
+                engine_config[k1][k2] = yaml.safe_load(v)
 
         except Exception as e:
             raise RoException("Cannot load env '{}': {}".format(k, e))
@@ -60,7 +60,7 @@ deploy_schema = {
     "properties": {
         "action_id": string_schema,
         "name": name_schema,
-        "action": {"enum" ["inject_ssh_key"]},
+        "action": {"enum": ["inject_ssh_key"]},
         "key": ssh_key_schema,
         "user": name_schema,
         "password": string_schema,
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Benchmark of concurrent Ns.deploy and Ns.delete of independent NSs (osm_ng_ro/ns.py).
+--ns NSs, each one with --vlds networks, an image and a flavor, are deployed and then deleted from --threads
+threads against the memory database driver. Each database call is delayed --db-latency seconds to emulate the
+round trip to mongo. Workers are not started, only the deploy/delete requests are measured. The time with a single
+lock for all the NSs, as the former process wide write_lock, is shown as reference.
+E.g.:  python3 bench_ns_deploy.py --ns 50 --threads 10
+'''
+
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from threading import Lock
+from uuid import uuid4
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from osm_common import dbmemory  # noqa
+from osm_ng_ro.ns import Ns  # noqa
+
+
+def delayed(method, latency):
+    def _delayed(*args, **kwargs):
+        time.sleep(latency)
+        return method(*args, **kwargs)
+    return _delayed
+
+
+def build_ns(locks, latency):
+    ns = Ns()
+    ns.config = {}
+    ns.db = dbmemory.DbMemory(lock=True)
+    ns.db.db_connect({})
+    for method in ("get_one", "get_list", "create", "create_list", "set_one", "del_one"):
+        setattr(ns.db, method, delayed(getattr(ns.db, method), latency))
+    ns.ns_locks = [Lock() for _ in range(locks)]
+    ns.vims_lock = Lock()
+    # workers are not needed, vims are assigned to a fake one
+    ns._create_worker = lambda vim_account_id: None
+    return ns
+
+
+def build_deployments(ns, num, vlds):
+    vim_info = [{"vim_account_id": str(uuid4())}]
+    deployments = []
+    for index in range(num):
+        nsr_id = str(uuid4())
+        ns.db.create("nsrs", {"_id": nsr_id})
+        ns.db.create("vnfrs", {"_id": str(uuid4()), "nsr-id-ref": nsr_id, "member-vnf-index-ref": "1"})
+        indata = {
+            "name": "ns{}".format(index),
+            "ns": {"vld": [{"id": str(vld), "name": "net{}".format(vld), "vim_info": vim_info}
+                           for vld in range(vlds)]},
+            "image": [{"id": "0", "image": "ubuntu", "vim_info": vim_info}],
+            "flavor": [{"id": "0", "name": "flavor", "storage-gb": 10, "memory-mb": 1024, "vcpu-count": 1,
+                        "guest-epa": {"mempage-size": "LARGE"},
+                        "vim_info": vim_info}],
+        }
+        deployments.append((nsr_id, indata))
+    return deployments
+
+
+def run(ns, deployments, threads):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.time()
+        list(executor.map(lambda d: ns.deploy(None, d[1], None, d[0]), deployments))
+        deployed = time.time() - start
+        start = time.time()
+        list(executor.map(lambda d: ns.delete(None, None, None, d[0]), deployments))
+        deleted = time.time() - start
+    return deployed, deleted
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Concurrent deploy and delete of independent NSs")
+    parser.add_argument("--ns", type=int, default=50, help="NSs to deploy (default 50)")
+    parser.add_argument("--vlds", type=int, default=5, help="networks per NS (default 5)")
+    parser.add_argument("--threads", type=int, default=10,
+                        help="concurrent requests, as cherrypy server.thread_pool (default 10)")
+    parser.add_argument("--db-latency", type=float, default=0.002,
+                        help="seconds added to each database call (default 0.002)")
+    args = parser.parse_args()
+
+    for title, locks in (("per NS locks", Ns.NS_LOCKS), ("single lock", 1)):
+        ns = build_ns(locks, args.db_latency)
+        deployments = build_deployments(ns, args.ns, args.vlds)
+        deployed, deleted = run(ns, deployments, args.threads)
+        print("{}: deployed {} NSs in {:.3f}s, deleted in {:.3f}s ({} ro_tasks left)".format(
+            title, args.ns, deployed, deleted, len(ns.db.get_list("ro_tasks"))))
@@ -36,8 +36,10 @@ import difflib
 # from fuzzywuzzy import fuzz
 
 import logging
+import time
 import uuid
 from enum import Enum
+from threading import Lock
 from requests import RequestException, ConnectionError, ConnectTimeout, Timeout
 from cvprac.cvp_client import CvpClient
 from cvprac.cvp_api import CvpApi
@@ -134,6 +136,14 @@ class AristaSdnConnector(SdnConnectorBase):
     _VXLAN = "VXLAN"
     _VLAN_MLAG = "VLAN-MLAG"
     _VXLAN_MLAG = "VXLAN-MLAG"
+    # seconds the parsed 'OSM_metadata' configLet is kept, config 'metadata_cache_ttl' overrides it
+    __METADATA_CACHE_TTL = 30
+    # seconds the loopback, AS and MLAG peer of the switches are kept, config 'switch_facts_cache_ttl' overrides it
+    __SWITCH_FACTS_CACHE_TTL = 3600
+    __SWITCH_FACTS = ('lo0', 'AS', 'mlagPeerDevice')
+    # switch facts shared by all the connector instances, by (wim_url, switch, serialNumber)
+    _switch_facts_cache = {}
+    _switch_facts_cache_lock = Lock()
 
     def __init__(self, wim, wim_account, config=None, logger=None):
         """
@@ -185,6 +195,9 @@ class AristaSdnConnector(SdnConnectorBase):
                                  self.delete_keys_from_dict(config, ('passwd',))))
         self.allDeviceFacts = []
         self.taskC = None
+        self.__metadata = None
+        self.__metadata_cache_ttl = (config or {}).get('metadata_cache_ttl', self.__METADATA_CACHE_TTL)
+        self.__switch_facts_cache_ttl = (config or {}).get('switch_facts_cache_ttl', self.__SWITCH_FACTS_CACHE_TTL)
         try:
             self.__load_topology()
             self.__load_switches()
@@ -291,6 +304,10 @@ class AristaSdnConnector(SdnConnectorBase):
                     self.switches[s]['serialNumber'] = device['serialNumber']
                     break
 
+            for fact, value in self.__get_cached_switch_facts(s).items():
+                if not self.switches[s].get(fact):
+                    self.switches[s][fact] = value
+
             # Each switch has a different loopback address,
             # so it's a different configLet
             if not self.switches[s].get('lo0'):
@@ -302,6 +319,28 @@ class AristaSdnConnector(SdnConnectorBase):
             for s in self.switches:
                 if not self.switches[s].get('mlagPeerDevice'):
                     self.switches[s]['mlagPeerDevice'] = self.__get_peer_MLAG(self.switches[s]['serialNumber'])
+        self.__store_switch_facts()
+
+    def __get_cached_switch_facts(self, switch):
+        """ Returns the facts (loopback, AS, MLAG peer) of a switch cached by a previous connector instance
+        of the same CloudVision, so that they are not requested again to each switch
+        """
+        key = (self.__wim_url, switch, self.switches[switch]['serialNumber'])
+        with self._switch_facts_cache_lock:
+            cached = self._switch_facts_cache.get(key)
+        if cached and time.time() - cached[0] < self.__switch_facts_cache_ttl:
+            return cached[1]
+        return {}
+
+    def __store_switch_facts(self):
+        """ Stores at the shared cache the facts of the loaded switches
+        """
+        now = time.time()
+        with self._switch_facts_cache_lock:
+            for s, switch_data in self.switches.items():
+                key = (self.__wim_url, s, switch_data['serialNumber'])
+                self._switch_facts_cache[key] = (now, {fact: switch_data[fact] for fact in self.__SWITCH_FACTS
+                                                       if switch_data.get(fact)})
 
     def __check_service(self, service_type, connection_points,
                         check_vlan=True, check_num_cp=True, kwargs=None):
@@ -335,7 +374,8 @@ class AristaSdnConnector(SdnConnectorBase):
                         raise Exception(SdnError.VLAN_INCONSISTENT)
             if not vlan_id:
                 raise Exception(SdnError.VLAN_NOT_PROVIDED)
-            if vlan_id in self.__get_srvVLANs():
+            # read from CloudVision, services created meanwhile by other connectors are not at the cached metadata
+            if vlan_id in self.__get_metadata(refresh=True)['vlans']:
                 raise Exception('VLAN {} already assigned to a connectivity service'.format(vlan_id))
 
         # Commented out for as long as parameter isn't implemented
@@ -1165,23 +1205,16 @@ class AristaSdnConnector(SdnConnectorBase):
     def __addMetadata(self, service_uuid, service_type, vlan_id):
         """ Adds the connectivity service from 'OSM_metadata' configLet
         """
-        found_in_cvp = False
-        try:
-            cvp_cl = self.client.api.get_configlet_by_name(self.__OSM_METADATA)
-            found_in_cvp = True
-        except CvpApiError as error:
-            if "Entity does not exist" in error.msg:
-                pass
-            else:
-                raise error
+        cvp_cl = self.__get_metadata_configLet()
         try:
             new_serv = '{} {} {} {}\n'.format(self.__METADATA_PREFIX, service_type, vlan_id, service_uuid)
 
-            if found_in_cvp:
+            if cvp_cl:
                 cl_config = cvp_cl['config'] + new_serv
             else:
                 cl_config = new_serv
             cl_meta = [{'name': self.__OSM_METADATA, 'config': cl_config}]
+            self.__metadata = None
             self.__configlet_modify(cl_meta)
         except Exception as e:
             self.logger.error('Error in setting metadata in CloudVision from OSM for service {}: {}'.
@@ -1191,25 +1224,13 @@ class AristaSdnConnector(SdnConnectorBase):
     def __removeMetadata(self, service_uuid):
         """ Removes the connectivity service from 'OSM_metadata' configLet
         """
-        found_in_cvp = False
+        cvp_cl = self.__get_metadata_configLet()
         try:
-            cvp_cl = self.client.api.get_configlet_by_name(self.__OSM_METADATA)
-            found_in_cvp = True
-        except CvpApiError as error:
-            if "Entity does not exist" in error.msg:
-                pass
-            else:
-                raise error
-        try:
-            if found_in_cvp:
+            if cvp_cl:
                 if service_uuid in cvp_cl['config']:
-                    cl_config = ''
-                    for line in cvp_cl['config'].split('\n'):
-                        if service_uuid in line:
-                            continue
-                        else:
-                            cl_config = cl_config + line
+                    cl_config = '\n'.join(line for line in cvp_cl['config'].split('\n') if service_uuid not in line)
                     cl_meta = [{'name': self.__OSM_METADATA, 'config': cl_config}]
+                    self.__metadata = None
                     self.__configlet_modify(cl_meta)
         except Exception as e:
             self.logger.error('Error in removing metadata in CloudVision from OSM for service {}: {}'.
@@ -1386,63 +1407,54 @@ class AristaSdnConnector(SdnConnectorBase):
                 srv_cls[s] = cvp_cl
         return srv_cls
 
-    def __get_srvVLANs(self):
-        """ Returns a list with all the VLAN id's used in the connectivity services managed
-        in tha Arista CloudVision by checking the 'OSM_metadata' configLet where this
-        information is stored
+    def __get_metadata_configLet(self):
+        """ Returns the 'OSM_metadata' configLet, or None if it does not exist
         """
-        found_in_cvp = False
         try:
-            cvp_cl = self.client.api.get_configlet_by_name(self.__OSM_METADATA)
-            found_in_cvp = True
+            return self.client.api.get_configlet_by_name(self.__OSM_METADATA)
         except CvpApiError as error:
             if "Entity does not exist" in error.msg:
-                pass
-            else:
-                raise error
-        s_vlan_list = []
-        if found_in_cvp:
-            lines = cvp_cl['config'].split('\n')
-            for line in lines:
-                if self.__METADATA_PREFIX in line:
-                    s_vlan = line.split(' ')[3]
-                else:
-                    continue
-                if (s_vlan is not None and
-                        len(s_vlan) > 0 and
-                        s_vlan not in s_vlan_list):
-                    s_vlan_list.append(s_vlan)
-
-        return s_vlan_list
+                return None
+            raise error
+
+    def __get_metadata(self, refresh=False):
+        """ Returns the connectivity services managed in tha Arista CloudVision, stored at the 'OSM_metadata'
+        configLet, as a dictionary with:
+            'services': services by uuid, each one a dict with 'uuid', 'type' and 'vlan'
+            'vlans': set of service uuids by VLAN id
+        It is kept for metadata_cache_ttl seconds and discarded when this connector modifies the configLet.
+        The configLet is only parsed again if its content has changed
+        :param refresh: if True the configLet is read even if the cached metadata has not expired. Used for the
+            checks that cannot rely on metadata that other connectors may have modified meanwhile
+        """
+        now = time.time()
+        if not refresh and self.__metadata and now - self.__metadata['time'] < self.__metadata_cache_ttl:
+            return self.__metadata
+        cvp_cl = self.__get_metadata_configLet()
+        config = cvp_cl['config'] if cvp_cl else ''
+        if self.__metadata and self.__metadata['config'] == config:
+            self.__metadata['time'] = now
+            return self.__metadata
+        services = {}
+        vlans = {}
+        for line in config.split('\n'):
+            if self.__METADATA_PREFIX not in line:
+                continue
+            line = line.split(' ')
+            if len(line) < 5:
+                continue
+            serv = {'uuid': line[4], 'type': line[2], 'vlan': line[3]}
+            services[serv['uuid']] = serv
+            if serv['vlan']:
+                vlans.setdefault(serv['vlan'], set()).add(serv['uuid'])
+        self.__metadata = {'time': now, 'config': config, 'services': services, 'vlans': vlans}
+        return self.__metadata
 
     def __get_srvUUIDs(self):
         """ Retrieves all the connectivity services, managed in tha Arista CloudVision
         by checking the 'OSM_metadata' configLet where this information is stored
         """
-        found_in_cvp = False
-        try:
-            cvp_cl = self.client.api.get_configlet_by_name(self.__OSM_METADATA)
-            found_in_cvp = True
-        except CvpApiError as error:
-            if "Entity does not exist" in error.msg:
-                pass
-            else:
-                raise error
-        serv_list = []
-        if found_in_cvp:
-            lines = cvp_cl['config'].split('\n')
-            for line in lines:
-                if self.__METADATA_PREFIX in line:
-                    line = line.split(' ')
-                    serv = {'uuid': line[4], 'type': line[2], 'vlan': line[3]}
-                else:
-                    continue
-                if (serv is not None and
-                        len(serv) > 0 and
-                        serv not in serv_list):
-                    serv_list.append(serv)
-
-        return serv_list
+        return list(self.__get_metadata()['services'].values())
 
     def __get_Connection(self):
         """ Open a connection with Arista CloudVision,
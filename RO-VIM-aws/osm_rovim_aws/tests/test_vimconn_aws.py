@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+"""
+This module contains unit tests for the AWS VIM connector
+"""
+
+import unittest
+from unittest import mock
+
+from osm_rovim_aws.vimconn_aws import vimconnector, FILTER_MAX_VALUES, DESCRIBE_PAGE_SIZE
+
+
+class ResultSet(list):
+    """As boto.resultset.ResultSet, a list with the token of the next page"""
+    def __init__(self, items, next_token=None):
+        list.__init__(self, items)
+        self.next_token = next_token
+
+
+def instance(vm_id, state="running", interfaces=()):
+    return mock.Mock(id=vm_id, state=state, interfaces=list(interfaces))
+
+
+def interface(interface_id, ip_address):
+    return mock.Mock(id=interface_id, subnet_id="subnet", mac_address="fa:16:3e:00:00:01",
+                     private_ip_address=ip_address, spec=["id", "subnet_id", "mac_address", "private_ip_address"])
+
+
+class TestRefreshVmsStatus(unittest.TestCase):
+    @mock.patch.object(vimconnector, "get_tenant_list", return_value=[{"id": "vpc"}])
+    def setUp(self, get_tenant_list):
+        self.vimconn = vimconnector("123", "awsvim", None, None, "http://dummy.url", None, "user", "pass",
+                                    config={"region_name": "region"})
+        self.vimconn._reload_connection = mock.Mock()
+        self.vimconn.conn = mock.Mock()
+        self.vimconn.conn.get_all_addresses.return_value = []
+
+    def test_reservations_and_pages(self):
+        pages = {
+            None: ResultSet([mock.Mock(instances=[instance("vm-0", interfaces=[interface("eni-0", "10.0.0.1")]),
+                                                  instance("vm-1", "pending")]),
+                             mock.Mock(instances=[instance("vm-2", "stopped")])], next_token="page-2"),
+            "page-2": ResultSet([mock.Mock(instances=[instance("vm-3")])]),
+        }
+        self.vimconn.conn.get_all_reservations.side_effect = lambda filters, max_results, next_token: pages[next_token]
+        self.vimconn.conn.get_all_addresses.return_value = [mock.Mock(network_interface_id="eni-0",
+                                                                      public_ip="172.24.4.10")]
+
+        result = self.vimconn.refresh_vms_status(["vm-0", "vm-1", "vm-2", "vm-3", "vm-4"])
+
+        filters = {"instance-id": ["vm-0", "vm-1", "vm-2", "vm-3", "vm-4"]}
+        self.assertEqual(self.vimconn.conn.get_all_reservations.call_args_list,
+                         [mock.call(filters=filters, max_results=DESCRIBE_PAGE_SIZE, next_token=None),
+                          mock.call(filters=filters, max_results=DESCRIBE_PAGE_SIZE, next_token="page-2")])
+        self.vimconn.conn.get_all_addresses.assert_called_once_with(filters={"network-interface-id": ["eni-0"]})
+        self.assertEqual(result["vm-0"]["status"], "ACTIVE")
+        self.assertEqual(result["vm-0"]["interfaces"][0]["ip_address"], "172.24.4.10;10.0.0.1")
+        self.assertEqual(result["vm-1"]["status"], "BUILD")
+        self.assertEqual(result["vm-2"]["status"], "ERROR")
+        self.assertEqual(result["vm-3"]["status"], "ACTIVE")
+        self.assertEqual(result["vm-4"]["status"], "DELETED")
+
+    def test_ids_in_chunks(self):
+        vm_ids = ["vm-{}".format(index) for index in range(FILTER_MAX_VALUES + 1)]
+        self.vimconn.conn.get_all_reservations.side_effect = lambda filters, max_results, next_token: ResultSet(
+            [mock.Mock(instances=[instance(vm_id) for vm_id in filters["instance-id"]])])
+
+        result = self.vimconn.refresh_vms_status(vm_ids)
+
+        self.assertEqual(self.vimconn.conn.get_all_reservations.call_count, 2)
+        self.assertEqual(len(self.vimconn.conn.get_all_reservations.call_args_list[1][1]["filters"]["instance-id"]), 1)
+        self.assertTrue(all(vm["status"] == "ACTIVE" for vm in result.values()))
+        self.assertEqual(len(result), FILTER_MAX_VALUES + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,6 +38,11 @@ import boto
 import boto.ec2
 import boto.vpc
 
+# maximum number of values of an EC2 describe filter, used to split long lists of ids
+FILTER_MAX_VALUES = 200
+# maximum number of results requested per page when describing instances
+DESCRIBE_PAGE_SIZE = 1000
+
 
 class vimconnector(vimconn.VimConnector):
     def __init__(self, uuid, name, tenant_id, tenant_name, url, url_admin=None, user=None, passwd=None, log_level=None,
@@ -756,12 +761,15 @@ class vimconnector(vimconn.VimConnector):
         self.logger.debug("Getting VM instance information from VIM")
         try:
             self._reload_connection()
-            reservation = self.conn.get_all_instances(vm_list)[0]
+            vm_list = list(vm_list or ())
+            vm_instances = list(self._get_all_instances(vm_list))
+            public_ips = self._get_elastic_ips([interface.id for instance in vm_instances
+                                                for interface in instance.interfaces])
             instances = {}
-            instance_dict = {}
-            for instance in reservation.instances:
+            for instance in vm_instances:
+                instance_dict = {}
                 try:
-                    if instance.state in ("pending"):
+                    if instance.state in ("pending", ):
                         instance_dict['status'] = "BUILD"
                     elif instance.state in ("available", "running", "up"):
                         instance_dict['status'] = 'ACTIVE'
@@ -769,13 +777,14 @@ class vimconnector(vimconn.VimConnector):
                         instance_dict['status'] = 'ERROR'
                     instance_dict['error_msg'] = ""
                     instance_dict['interfaces'] = []
-                    interface_dict = {}
                     for interface in instance.interfaces:
+                        interface_dict = {}
                         interface_dict['vim_interface_id'] = interface.id
                         interface_dict['vim_net_id'] = interface.subnet_id
                         interface_dict['mac_address'] = interface.mac_address
-                        if hasattr(interface, 'publicIp') and interface.publicIp is not None:
-                            interface_dict['ip_address'] = interface.publicIp + ";" + interface.private_ip_address
+                        public_ip = public_ips.get(interface.id) or getattr(interface, 'publicIp', None)
+                        if public_ip:
+                            interface_dict['ip_address'] = public_ip + ";" + interface.private_ip_address
                         else:
                             interface_dict['ip_address'] = interface.private_ip_address
                         instance_dict['interfaces'].append(interface_dict)
@@ -790,11 +799,44 @@ class vimconnector(vimconn.VimConnector):
                         # self.logger.error("Exception getting vm status: %s", str(e), exc_info=True)
                         instance_dict['vim_info'] = str(instance)
                 instances[instance.id] = instance_dict
+            for vm_id in vm_list:
+                if vm_id not in instances:
+                    instances[vm_id] = {'status': "DELETED", 'error_msg': "vm '{}' not found".format(vm_id),
+                                        'vim_info': None}
             return instances
         except Exception as e:
             self.logger.error("Exception getting vm status: %s", str(e), exc_info=True)
             self.format_vimconn_exception(e)
 
+    def _get_all_instances(self, vm_ids):
+        """Generator of the instances with the given ids, whatever the reservation they belong to. The ids are
+        requested as an 'instance-id' filter, in chunks of FILTER_MAX_VALUES, and every page of results is read.
+        Unlike passing the ids to get_all_instances, unknown ids are ignored instead of failing the whole request.
+        get_all_reservations is used because, unlike get_all_instances, it accepts the next_token of the next page"""
+        for index in range(0, len(vm_ids), FILTER_MAX_VALUES):
+            filters = {'instance-id': vm_ids[index:index + FILTER_MAX_VALUES]}
+            next_token = None
+            while True:
+                reservations = self.conn.get_all_reservations(filters=filters, max_results=DESCRIBE_PAGE_SIZE,
+                                                              next_token=next_token)
+                for reservation in reservations:
+                    for instance in reservation.instances:
+                        yield instance
+                next_token = getattr(reservations, 'next_token', None)
+                if not next_token:
+                    break
+
+    def _get_elastic_ips(self, interface_ids):
+        """Returns a dictionary with the elastic ip address associated to each of the given network interfaces, by
+        network interface id. The addresses are requested in chunks of FILTER_MAX_VALUES interfaces"""
+        elastic_ips = {}
+        for index in range(0, len(interface_ids), FILTER_MAX_VALUES):
+            filters = {'network-interface-id': interface_ids[index:index + FILTER_MAX_VALUES]}
+            for address in self.conn.get_all_addresses(filters=filters):
+                if address.network_interface_id:
+                    elastic_ips[address.network_interface_id] = address.public_ip
+        return elastic_ips
+
     def action_vminstance(self, vm_id, action_dict, created_items={}):
         """Send and action over a VM instance from VIM
         Returns the vm_id if the action was successfully sent to the VIM"""
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+"""
+This module contains unit tests for the Azure VIM connector
+"""
+
+import unittest
+from unittest import mock
+
+from msrestazure.azure_exceptions import CloudError
+
+from osm_rovim_azure.vimconn_azure import vimconnector
+
+VM_ID = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/{}"
+NIC_ID = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/networkInterfaces/{}"
+PUBLIC_IP_ID = "/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/publicIPAddresses/{}"
+
+
+def resource(resource_id, **kwargs):
+    item = mock.Mock(id=resource_id, **kwargs)
+    item.name = resource_id.split("/")[-1]
+    return item
+
+
+def instance_view(power_state):
+    return mock.Mock(statuses=[mock.Mock(code="ProvisioningState/succeeded"),
+                               mock.Mock(code="PowerState/" + power_state)])
+
+
+def not_found():
+    error = CloudError(mock.Mock(), "ResourceNotFound")
+    error.error = mock.Mock(error="ResourceNotFound")
+    return error
+
+
+class TestRefreshVmsStatus(unittest.TestCase):
+    def setUp(self):
+        self.vimconn = vimconnector("123", "azurevim", "tenant", None, "http://dummy.url", None, "user", "pass",
+                                    config={"subscription_id": "sub", "region_name": "westeurope",
+                                            "resource_group": "rg", "instance_view_workers": 2})
+        self.vimconn._reload_connection = mock.Mock()
+        self.vimconn.conn_compute = mock.Mock()
+        self.vimconn.conn_vnet = mock.Mock()
+        self.public_ip = resource(PUBLIC_IP_ID.format("ip0"), ip_address="172.24.4.10")
+        self.nic = resource(NIC_ID.format("nic0"), mac_address="00-0D-3A-00-00-01")
+        self.nic.ip_configurations = [mock.Mock(public_ip_address=mock.Mock(id=self.public_ip.id.upper()),
+                                                private_ip_address="10.0.0.4")]
+        self.vimconn.conn_vnet.network_interfaces.list.return_value = [self.nic]
+        self.vimconn.conn_vnet.public_ip_addresses.list.return_value = [self.public_ip]
+
+    def _vm(self, name, provisioning_state="Succeeded", nics=()):
+        vm = resource(VM_ID.format(name), provisioning_state=provisioning_state)
+        vm.network_profile.network_interfaces = [mock.Mock(id=nic.id) for nic in nics]
+        return vm
+
+    def test_refresh_vms_status_bulk(self):
+        vms = [self._vm("vm0", nics=[self.nic]), self._vm("vm1"), self._vm("vm2", "Creating"), self._vm("vm3")]
+        self.vimconn.conn_compute.virtual_machines.list.return_value = vms
+        instance_views = {"vm0": instance_view("running"), "vm1": instance_view("stopped"), "vm3": not_found()}
+
+        def _instance_view(resource_group, vm_name):
+            if isinstance(instance_views[vm_name], Exception):
+                raise instance_views[vm_name]
+            return instance_views[vm_name]
+        self.vimconn.conn_compute.virtual_machines.instance_view.side_effect = _instance_view
+
+        vm_ids = [VM_ID.format("vm0").upper(), VM_ID.format("vm1"), VM_ID.format("vm2"), VM_ID.format("vm3"),
+                  VM_ID.format("deleted")]
+        result = self.vimconn.refresh_vms_status(vm_ids)
+
+        # a single listing per resource type and one instance view per provisioned vm
+        self.vimconn.conn_compute.virtual_machines.list.assert_called_once_with("rg")
+        self.vimconn.conn_compute.virtual_machines.get.assert_not_called()
+        self.vimconn.conn_vnet.network_interfaces.get.assert_not_called()
+        self.vimconn.conn_vnet.public_ip_addresses.get.assert_not_called()
+        self.assertEqual(sorted(call[0][1] for call in
+                                self.vimconn.conn_compute.virtual_machines.instance_view.call_args_list),
+                         ["vm0", "vm1", "vm3"])
+        self.assertEqual(result[vm_ids[0]]["status"], "ACTIVE")
+        self.assertEqual(result[vm_ids[0]]["interfaces"][0]["ip_address"], "172.24.4.10;10.0.0.4")
+        self.assertEqual(result[vm_ids[1]]["status"], "INACTIVE")
+        self.assertEqual(result[vm_ids[2]]["status"], "BUILD")
+        # deleted between the listing and the instance view
+        self.assertEqual(result[vm_ids[3]]["status"], "DELETED")
+        self.assertEqual(result[vm_ids[4]]["status"], "DELETED")
+
+    def test_refresh_vms_status_bulk_fallback(self):
+        self.vimconn.conn_compute.virtual_machines.list.side_effect = Exception("listing not allowed")
+        vms = {"vm0": self._vm("vm0", nics=[self.nic]), "vm1": self._vm("vm1")}
+        self.vimconn.conn_compute.virtual_machines.get.side_effect = lambda resource_group, name: vms[name]
+        self.vimconn.conn_compute.virtual_machines.instance_view.return_value = instance_view("running")
+        self.vimconn.conn_vnet.network_interfaces.get.return_value = self.nic
+        self.vimconn.conn_vnet.public_ip_addresses.get.return_value = self.public_ip
+
+        vm_ids = [VM_ID.format("vm0"), VM_ID.format("vm1")]
+        result = self.vimconn.refresh_vms_status(vm_ids)
+
+        # one by one, as before
+        self.assertEqual(self.vimconn.conn_compute.virtual_machines.get.call_count, 2)
+        self.assertEqual(result[vm_ids[0]]["status"], "ACTIVE")
+        self.assertEqual(result[vm_ids[0]]["interfaces"][0]["ip_address"], "172.24.4.10;10.0.0.4")
+        self.assertEqual(result[vm_ids[1]]["status"], "ACTIVE")
+
+
+def named(name, **kwargs):
+    item = mock.Mock(**kwargs)
+    item.name = name
+    return item
+
+
+class TestGetImageList(unittest.TestCase):
+    def setUp(self):
+        # the image cache is shared by all the connectors
+        patcher = mock.patch.object(vimconnector, "_image_cache", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.vimconn = vimconnector("123", "azurevim", "tenant", None, "http://dummy.url", None, "user", "pass",
+                                    config={"subscription_id": "sub", "region_name": "westeurope",
+                                            "resource_group": "rg", "image_list_workers": 2})
+        self.vimconn._reload_connection = mock.Mock()
+        self.vimconn.conn_compute = mock.Mock()
+        images = self.vimconn.conn_compute.virtual_machine_images
+        images.list_offers.return_value = [named("offer0"), named("offer1")]
+        images.list_skus.side_effect = lambda region, publisher, offer: [
+            named(offer + "-sku0"), named(offer + "-sku1")]
+        images.list.side_effect = lambda region, publisher, offer, sku: [
+            named(version, id="/images/{}/{}/{}".format(offer, sku, version)) for version in ("1.0", "2.0")]
+
+    def _marketplace_calls(self):
+        images = self.vimconn.conn_compute.virtual_machine_images
+        return images.list_offers.call_count + images.list_skus.call_count + images.list.call_count
+
+    def test_get_image_list_all_offers_and_skus(self):
+        result = self.vimconn.get_image_list({"name": "publisher"})
+
+        expected = sorted("publisher:{}:{}-{}:{}".format(offer, offer, sku, version)
+                          for offer in ("offer0", "offer1") for sku in ("sku0", "sku1") for version in ("1.0", "2.0"))
+        self.assertEqual(sorted(image["name"] for image in result), expected)
+        self.assertEqual(self._marketplace_calls(), 1 + 2 + 4)
+
+        # the second query is served from the cache
+        self.assertEqual(self.vimconn.get_image_list({"name": "publisher"}), result)
+        self.assertEqual(self._marketplace_calls(), 1 + 2 + 4)
+
+    def test_image_cache_purges_expired_entries(self):
+        with mock.patch.object(vimconnector, "IMAGE_CACHE_SIZE", 2):
+            vimconnector._image_cache[("westeurope", "old", None, None, None)] = (0, ["expired"])
+            self.vimconn.get_image_list({"name": "publisher:offer0"})
+
+        self.assertNotIn(("westeurope", "old", None, None, None), vimconnector._image_cache)
+        self.assertLessEqual(len(vimconnector._image_cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,7 +19,10 @@ import logging
 import netaddr
 import re
 
+from concurrent.futures import ThreadPoolExecutor
 from os import getenv
+from threading import Lock
+from time import time
 from azure.common.credentials import ServicePrincipalCredentials
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.network import NetworkManagementClient
@@ -68,6 +71,15 @@ class vimconnector(vimconn.VimConnector):
 
     AZURE_ZONES = ["1", "2", "3"]
 
+    # Marketplace images obtained by get_image_list, shared by all the connectors. It is a dictionary with the
+    # query (region, publisher, offer, sku, version) as key, and a tuple (expiration time, result) as value
+    _image_cache = {}
+    _image_cache_lock = Lock()
+    IMAGE_CACHE_TTL = 3600  # default seconds the marketplace images are cached
+    IMAGE_CACHE_SIZE = 1000  # max number of queries at _image_cache, expired entries are purged above this size
+    IMAGE_LIST_WORKERS = 8  # default threads used to query the marketplace in parallel
+    INSTANCE_VIEW_WORKERS = 8  # default threads used to get the vm instance views in parallel
+
     def __init__(self, uuid, name, tenant_id, tenant_name, url, url_admin=None, user=None, passwd=None, log_level=None,
                  config={}, persistent_info={}):
         """
@@ -83,6 +95,12 @@ class vimconnector(vimconn.VimConnector):
         flavors_pattern: pattern that will be used to select a range of vm sizes, for example
             "^((?!Standard_B).)*$" will filter out Standard_B range that is cheap but is very overused
             "^Standard_B" will select a serie B maybe for test environment
+        image_cache_ttl: seconds the marketplace images found by get_image_list are cached, 0 to disable. By
+            default IMAGE_CACHE_TTL
+        image_list_workers: maximum number of parallel marketplace queries of get_image_list. By default
+            IMAGE_LIST_WORKERS
+        instance_view_workers: maximum number of parallel vm instance view queries of refresh_vms_status. By default
+            INSTANCE_VIEW_WORKERS
         """
 
         vimconn.VimConnector.__init__(self, uuid, name, tenant_id, tenant_name, url, url_admin, user, passwd, log_level,
@@ -136,6 +154,11 @@ class vimconnector(vimconn.VimConnector):
         # flavor pattern regex
         if 'flavors_pattern' in config:
             self._config['flavors_pattern'] = config['flavors_pattern']
+
+        # marketplace image queries
+        self.image_cache_ttl = config.get('image_cache_ttl', self.IMAGE_CACHE_TTL)
+        self.image_list_workers = config.get('image_list_workers', self.IMAGE_LIST_WORKERS)
+        self.instance_view_workers = config.get('instance_view_workers', self.INSTANCE_VIEW_WORKERS)
             
     def _reload_connection(self):
         """
@@ -462,16 +485,26 @@ class vimconnector(vimconn.VimConnector):
                 if publisher:
                     # obtain offer list
                     offer_list = self._get_offer_list(params, publisher)
-                    for offer in offer_list:
-                        # obtain skus
-                        sku_list = self._get_sku_list(params, publisher, offer)
-                        for sku in sku_list:
-                            # if version is defined get directly version, else list images
-                            if len(params) == 4 and params[3]:
-                                version = params[3]
-                                image_list = self._get_version_image_list(publisher, offer, sku, version)
-                            else:
-                                image_list = self._get_sku_image_list(publisher, offer, sku)
+                    with ThreadPoolExecutor(max_workers=self.image_list_workers) as executor:
+                        # obtain skus of every offer
+                        offer_sku_list = [
+                            (offer, sku)
+                            for offer, sku_list in zip(offer_list, executor.map(
+                                lambda offer: self._get_sku_list(params, publisher, offer), offer_list))
+                            for sku in sku_list
+                        ]
+                        # if version is defined get directly version, else list images
+                        if len(params) == 4 and params[3]:
+                            version = params[3]
+                            image_lists = executor.map(
+                                lambda offer_sku: self._get_version_image_list(publisher, *offer_sku, version),
+                                offer_sku_list)
+                        else:
+                            image_lists = executor.map(
+                                lambda offer_sku: self._get_sku_image_list(publisher, *offer_sku),
+                                offer_sku_list)
+                        for sku_image_list in image_lists:
+                            image_list += [dict(image) for image in sku_image_list]
                 else:
                     raise vimconn.VimConnAuthException(
                         "List images in Azure must include name param with at least publisher")
@@ -483,6 +516,44 @@ class vimconnector(vimconn.VimConnector):
         except Exception as e:
             self._format_vimconn_exception(e)
 
+    def _get_cached_images(self, query, get_images):
+        """
+        Helper method to cache the results of the marketplace queries for image_cache_ttl seconds
+        :param query: tuple (publisher, offer, sku, version) that identifies the query at the region
+        :param get_images: function that performs the query
+        :return: the result of get_images, or the one cached
+        """
+        if not self.image_cache_ttl:
+            return get_images()
+        key = (self.region, ) + query
+        now = time()
+        with self._image_cache_lock:
+            cached = self._image_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        result = get_images()
+        if result:  # not found images are not cached, they can be a transient error
+            with self._image_cache_lock:
+                self._image_cache[key] = (now + self.image_cache_ttl, result)
+                if len(self._image_cache) > self.IMAGE_CACHE_SIZE:
+                    self._purge_image_cache(now)
+        return result
+
+    @classmethod
+    def _purge_image_cache(cls, now):
+        """
+        Remove the expired entries of _image_cache. If it is still above IMAGE_CACHE_SIZE, the entries that expire
+        sooner are removed too. Must be called with _image_cache_lock acquired
+        :param now: current time
+        :return: None
+        """
+        for key in [key for key, cached in cls._image_cache.items() if cached[0] <= now]:
+            del cls._image_cache[key]
+        excess = len(cls._image_cache) - cls.IMAGE_CACHE_SIZE
+        if excess > 0:
+            for key in sorted(cls._image_cache, key=lambda k: cls._image_cache[k][0])[:excess]:
+                del cls._image_cache[key]
+
     def _get_offer_list(self, params, publisher):
         """
         Helper method to obtain offer list for defined publisher
@@ -490,14 +561,18 @@ class vimconnector(vimconn.VimConnector):
         if len(params) >= 2 and params[1]:
             return [params[1]]
         else:
-            try:
-                # get list of offers from azure
-                result_offers = self.conn_compute.virtual_machine_images.list_offers(self.region, publisher)
-                return [offer.name for offer in result_offers]
-            except CloudError as e:
-                # azure raises CloudError when not found
-                self.logger.info("error listing offers for publisher {}, Error: {}".format(publisher, e))
-                return []
+            return self._get_cached_images((publisher, None, None, None),
+                                           lambda: self._list_offers(publisher))
+
+    def _list_offers(self, publisher):
+        try:
+            # get list of offers from azure
+            result_offers = self.conn_compute.virtual_machine_images.list_offers(self.region, publisher)
+            return [offer.name for offer in result_offers]
+        except CloudError as e:
+            # azure raises CloudError when not found
+            self.logger.info("error listing offers for publisher {}, Error: {}".format(publisher, e))
+            return []
 
     def _get_sku_list(self, params, publisher, offer):
         """
@@ -506,19 +581,27 @@ class vimconnector(vimconn.VimConnector):
         if len(params) >= 3 and params[2]:
             return [params[2]]
         else:
-            try:
-                # get list of skus from azure
-                result_skus = self.conn_compute.virtual_machine_images.list_skus(self.region, publisher, offer)
-                return [sku.name for sku in result_skus]
-            except CloudError as e:
-                # azure raises CloudError when not found
-                self.logger.info("error listing skus for publisher {}, offer {}, Error: {}".format(publisher, offer, e))
-                return []
+            return self._get_cached_images((publisher, offer, None, None),
+                                           lambda: self._list_skus(publisher, offer))
+
+    def _list_skus(self, publisher, offer):
+        try:
+            # get list of skus from azure
+            result_skus = self.conn_compute.virtual_machine_images.list_skus(self.region, publisher, offer)
+            return [sku.name for sku in result_skus]
+        except CloudError as e:
+            # azure raises CloudError when not found
+            self.logger.info("error listing skus for publisher {}, offer {}, Error: {}".format(publisher, offer, e))
+            return []
 
     def _get_sku_image_list(self, publisher, offer, sku):
         """
         Helper method to obtain image list for publisher, offer and sku
         """
+        return self._get_cached_images((publisher, offer, sku, None),
+                                       lambda: self._list_sku_images(publisher, offer, sku))
+
+    def _list_sku_images(self, publisher, offer, sku):
         image_list = []
         try:
             result_images = self.conn_compute.virtual_machine_images.list(self.region, publisher, offer, sku)
@@ -534,6 +617,10 @@ class vimconnector(vimconn.VimConnector):
         return image_list
 
     def _get_version_image_list(self, publisher, offer, sku, version):
+        return self._get_cached_images((publisher, offer, sku, version),
+                                       lambda: self._get_version_image(publisher, offer, sku, version))
+
+    def _get_version_image(self, publisher, offer, sku, version):
         image_list = []
         try:
             result_image = self.conn_compute.virtual_machine_images.get(self.region, publisher, offer, sku, version)
@@ -1332,6 +1419,12 @@ class vimconnector(vimconn.VimConnector):
         self.logger.debug("refresh vm status vm_list: %s", vm_list)
         search_vm_list = vm_list or {}
 
+        if len(search_vm_list) > 1:
+            try:
+                return self._refresh_vms_status_bulk(search_vm_list)
+            except Exception as e:
+                self.logger.error("Exception %s refreshing vm_status in bulk, refreshing one by one", e)
+
         for vm_id in search_vm_list:
             out_vm = {}
             try:
@@ -1339,15 +1432,7 @@ class vimconnector(vimconn.VimConnector):
 
                 vm = self.conn_compute.virtual_machines.get(self.resource_group, res_name)
                 out_vm['vim_info'] = str(vm)
-                out_vm['status'] = self.provision_state2osm.get(vm.provisioning_state, 'OTHER')
-                if vm.provisioning_state == 'Succeeded':
-                    # check if machine is running or stopped
-                    instance_view = self.conn_compute.virtual_machines.instance_view(self.resource_group,
-                                                                                     res_name)
-                    for status in instance_view.statuses:
-                        splitted_status = status.code.split("/")
-                        if len(splitted_status) == 2 and splitted_status[0] == 'PowerState':
-                            out_vm['status'] = self.power_state2osm.get(splitted_status[1], 'OTHER')
+                out_vm['status'] = self._get_vm_status(vm)
 
                 network_interfaces = vm.network_profile.network_interfaces
                 out_vm['interfaces'] = self._get_vm_interfaces_status(vm_id, network_interfaces)
@@ -1374,12 +1459,106 @@ class vimconnector(vimconn.VimConnector):
 
         return out_vms
 
-    def _get_vm_interfaces_status(self, vm_id, interfaces):
+    def _refresh_vms_status_bulk(self, vm_list):
+        """
+        Same as refresh_vms_status, but listing once all the virtual machines, network interfaces and public ip
+        addresses of the resource group, instead of getting them one by one. The vm listing does not contain the power
+        state, so the instance view of each provisioned vm is still needed. They are obtained in parallel by
+        _get_instance_views
+        """
+        vms = {vm.id.lower(): vm for vm in self.conn_compute.virtual_machines.list(self.resource_group)}
+        nics = {nic.id.lower(): nic for nic in self.conn_vnet.network_interfaces.list(self.resource_group)}
+        public_ips = {public_ip.id.lower(): public_ip
+                      for public_ip in self.conn_vnet.public_ip_addresses.list(self.resource_group)}
+        instance_views = self._get_instance_views([vms[vm_id.lower()] for vm_id in vm_list if vm_id.lower() in vms])
+
+        out_vms = {}
+        for vm_id in vm_list:
+            out_vm = {}
+            vm = vms.get(vm_id.lower())
+            if not vm:
+                self.logger.debug("Not found vm id: %s", vm_id)
+                out_vm['status'] = "DELETED"
+                out_vm['error_msg'] = "vm id '{}' not found at resource group '{}'".format(vm_id, self.resource_group)
+                out_vm['vim_info'] = None
+                out_vms[vm_id] = out_vm
+                continue
+            try:
+                instance_view = instance_views.get(vm.name)
+                if isinstance(instance_view, Exception):
+                    raise instance_view
+                out_vm['vim_info'] = str(vm)
+                out_vm['status'] = self._get_vm_status(vm, instance_view)
+                network_interfaces = vm.network_profile.network_interfaces
+                out_vm['interfaces'] = self._get_vm_interfaces_status(vm_id, network_interfaces, nics, public_ips)
+            except CloudError as e:
+                if e.error.error and "notfound" in e.error.error.lower():
+                    # deleted after being listed
+                    self.logger.debug("Not found vm id: %s", vm_id)
+                    out_vm['status'] = "DELETED"
+                else:
+                    self.logger.error("Exception %s refreshing vm_status", e)
+                    out_vm['status'] = "VIM_ERROR"
+                out_vm['error_msg'] = str(e)
+                out_vm['vim_info'] = None
+            except Exception as e:
+                self.logger.error("Exception %s refreshing vm_status", e, exc_info=True)
+                out_vm['status'] = "VIM_ERROR"
+                out_vm['error_msg'] = str(e)
+                out_vm['vim_info'] = None
+
+            out_vms[vm_id] = out_vm
+
+        return out_vms
+
+    def _get_instance_views(self, vms):
+        """
+        Gets the instance views, that contain the power state, of the provisioned vms. They are requested in parallel,
+        up to instance_view_workers at the same time
+        :param vms: list of virtual machines obtained from azure
+        :return: Dictionary with the instance view by vm name, or the exception raised when getting it
+        """
+        def _get_instance_view(vm_name):
+            try:
+                return self.conn_compute.virtual_machines.instance_view(self.resource_group, vm_name)
+            except Exception as e:
+                return e
+
+        vm_names = [vm.name for vm in vms if vm.provisioning_state == 'Succeeded']
+        if not vm_names:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.instance_view_workers) as executor:
+            return dict(zip(vm_names, executor.map(_get_instance_view, vm_names)))
+
+    def _get_vm_status(self, vm, instance_view=None):
+        """
+        Gets the OSM status of a vm from its provisioning state and its power state
+        :param vm: virtual machine obtained from azure
+        :param instance_view: instance view of the vm. If not provided it is obtained from azure if needed
+        :return: OSM status
+        """
+        vm_status = self.provision_state2osm.get(vm.provisioning_state, 'OTHER')
+        if vm.provisioning_state == 'Succeeded':
+            # check if machine is running or stopped
+            if not instance_view:
+                instance_view = self.conn_compute.virtual_machines.instance_view(self.resource_group, vm.name)
+            for status in instance_view.statuses:
+                splitted_status = status.code.split("/")
+                if len(splitted_status) == 2 and splitted_status[0] == 'PowerState':
+                    vm_status = self.power_state2osm.get(splitted_status[1], 'OTHER')
+        return vm_status
+
+    def _get_vm_interfaces_status(self, vm_id, interfaces, nics=None, public_ips=None):
         """
         Gets the interfaces detail for a vm
         :param interfaces: List of interfaces.
+        :param nics: Dictionary with the network interfaces of the resource group, by lowercase id. Optional, if not
+            provided, or an interface is not present, it is obtained from azure
+        :param public_ips: Same for the public ip addresses of the resource group
         :return: Dictionary with list of interfaces including, vim_interface_id, mac_address and ip_address
         """
+        nics = nics or {}
+        public_ips = public_ips or {}
         try:
             interface_list = []
             for network_interface in interfaces:
@@ -1387,16 +1566,20 @@ class vimconnector(vimconn.VimConnector):
                 nic_name = self._get_resource_name_from_resource_id(network_interface.id)
                 interface_dict['vim_interface_id'] = network_interface.id
 
-                nic_data = self.conn_vnet.network_interfaces.get(
-                    self.resource_group,
-                    nic_name)
+                nic_data = nics.get(network_interface.id.lower())
+                if not nic_data:
+                    nic_data = self.conn_vnet.network_interfaces.get(
+                        self.resource_group,
+                        nic_name)
 
                 ips = []
                 if nic_data.ip_configurations[0].public_ip_address:
                     self.logger.debug("Obtain public ip address")
-                    public_ip_name = self._get_resource_name_from_resource_id(
-                        nic_data.ip_configurations[0].public_ip_address.id)
-                    public_ip = self.conn_vnet.public_ip_addresses.get(self.resource_group, public_ip_name)
+                    public_ip_id = nic_data.ip_configurations[0].public_ip_address.id
+                    public_ip = public_ips.get(public_ip_id.lower())
+                    if not public_ip:
+                        public_ip_name = self._get_resource_name_from_resource_id(public_ip_id)
+                        public_ip = self.conn_vnet.public_ip_addresses.get(self.resource_group, public_ip_name)
                     self.logger.debug("Public ip address is: %s", public_ip.ip_address)
                     ips.append(public_ip.ip_address)
 
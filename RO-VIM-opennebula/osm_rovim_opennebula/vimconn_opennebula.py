@@ -36,6 +36,8 @@ import oca
 import math
 import random
 import pyone
+import threading
+from time import time
 
 
 class vimconnector(vimconn.VimConnector):
@@ -52,6 +54,7 @@ class vimconnector(vimconn.VimConnector):
             'log_level': provider if it should use a different log_level than the general one
             'config': dictionary with extra VIM information. This contains a consolidate version of general VIM config
                     at creation and particular VIM config at teh attachment
+                vnpool_cache_ttl: seconds the virtual network pool is cached for get_network(_list). Default 10
             'persistent_info': dict where the class can store information that will be available among class
                     destroy/creation cycles. This info is unique per VIM/credential. At first call it will contain an
                     empty dict. Useful to store login/tokens information for speed up communication
@@ -62,9 +65,47 @@ class vimconnector(vimconn.VimConnector):
 
         vimconn.VimConnector.__init__(self, uuid, name, tenant_id, tenant_name, url, url_admin, user, passwd, log_level,
                                       config)
+        # OpenNebula clients, one per thread, as they keep an HTTP connection that cannot be shared among threads.
+        # one_generation is increased to discard the clients of all the threads when the credentials change
+        self.one_local = threading.local()
+        self.one_generation = 0
+        self.vnpool_cache_ttl = self.config.get("vnpool_cache_ttl", 10)
+        self.vnpool_cache = None  # tuple with the time and the VNET list read from OpenNebula
+
+    def __setitem__(self, index, value):
+        vimconn.VimConnector.__setitem__(self, index, value)
+        if index in ("user", "passwd", "url"):
+            self.one_generation += 1
+            self.vnpool_cache = None
 
     def _new_one_connection(self):
-        return pyone.OneServer(self.url, session=self.user + ':' + self.passwd)
+        """Returns the OpenNebula client of this connector for the current thread, created at first call. The client
+        keeps the HTTP connection open, so it is reused among calls instead of creating a new one for each request.
+        It is an xmlrpc ServerProxy, that is not thread safe, so each thread has its own client"""
+        one = getattr(self.one_local, "one", None)
+        if not one or self.one_local.generation != self.one_generation:
+            one = pyone.OneServer(self.url, session=self.user + ':' + self.passwd)
+            self.one_local.one = one
+            self.one_local.generation = self.one_generation
+        return one
+
+    def _reset_one_connection(self):
+        """Discards the OpenNebula client of the current thread, e.g. after an error, so that a new one is created"""
+        self.one_local.one = None
+
+    def _get_vnet_pool(self):
+        """Returns the VNET list of the OpenNebula virtual network pool. It is cached for vnpool_cache_ttl seconds,
+        as it is read for every network of a refresh_nets_status"""
+        now = time()
+        if self.vnpool_cache and now - self.vnpool_cache[0] < self.vnpool_cache_ttl:
+            return self.vnpool_cache[1]
+        try:
+            net_pool = self._new_one_connection().vnpool.info(-2, -1, -1).VNET
+        except Exception:
+            self._reset_one_connection()
+            raise
+        self.vnpool_cache = (now, net_pool)
+        return net_pool
 
     def new_tenant(self, tenant_name, tenant_description):
         # '''Adds a new tenant to VIM with this name and description, returns the tenant identifier'''
@@ -228,6 +269,7 @@ class vimconnector(vimconn.VimConnector):
                 }
             }
             one.vn.add_ar(net_id, arpool)
+            self.vnpool_cache = None
             return net_id, created_items
         except Exception as e:
             self.logger.error("Create new network error: " + str(e))
@@ -255,8 +297,7 @@ class vimconnector(vimconn.VimConnector):
         """
 
         try:
-            one = self._new_one_connection()
-            net_pool = one.vnpool.info(-2, -1, -1).VNET
+            net_pool = self._get_vnet_pool()
             response = []
             if "name" in filter_dict:
                 network_name_filter = filter_dict["name"]
@@ -286,8 +327,7 @@ class vimconnector(vimconn.VimConnector):
         Raises an exception upon error or when network is not found
         """
         try:
-            one = self._new_one_connection()
-            net_pool = one.vnpool.info(-2, -1, -1).VNET
+            net_pool = self._get_vnet_pool()
             net = {}
             for network in net_pool:
                 if str(network.ID) == str(net_id):
@@ -313,6 +353,7 @@ class vimconnector(vimconn.VimConnector):
         try:
 
             one = self._new_one_connection()
+            self.vnpool_cache = None
             one.vn.delete(int(net_id))
             return net_id
         except Exception as e:
@@ -634,14 +675,15 @@ class vimconnector(vimconn.VimConnector):
         """
         vm_dict = {}
         try:
+            vm_elements = self._get_vm_pool(vm_list)
             for vm_id in vm_list:
                 vm = {}
-                if self.get_vminstance(vm_id) is not None:
-                    vm_element = self.get_vminstance(vm_id)
-                else:
+                vm_element = vm_elements.get(str(vm_id))
+                if vm_element is None:
                     self.logger.info("The vm " + str(vm_id) + " does not exist.")
                     vm['status'] = "DELETED"
                     vm['error_msg'] = ("The vm " + str(vm_id) + " does not exist.")
+                    vm_dict[vm_id] = vm
                     continue
                 vm["vim_info"] = None
                 vm_status = vm_element.LCM_STATE
@@ -653,18 +695,29 @@ class vimconnector(vimconn.VimConnector):
                 else:
                     vm['status'] = "BUILD"
 
-                if vm_element is not None:
-                    interfaces = self._get_networks_vm(vm_element)
-                    vm["interfaces"] = interfaces
+                interfaces = self._get_networks_vm(vm_element)
+                vm["interfaces"] = interfaces
                 vm_dict[vm_id] = vm
             return vm_dict
         except Exception as e:
             self.logger.error(e)
-            for k in vm_dict:
-                vm_dict[k]["status"] = "VIM_ERROR"
-                vm_dict[k]["error_msg"] = str(e)
+            self._reset_one_connection()
+            for vm_id in vm_list:
+                vm_dict[vm_id] = {"status": "VIM_ERROR", "error_msg": str(e)}
             return vm_dict
 
+    def _get_vm_pool(self, vm_list):
+        """Reads with a single vmpool.info call the VMs of the user and its groups (the tenant) whose id is in the
+        range of the requested ones, and returns a dictionary with the requested VMs by id. VMs in DONE state (deleted)
+        are not returned by OpenNebula"""
+        vm_ids = [int(vm_id) for vm_id in vm_list]
+        if not vm_ids:
+            return {}
+        one = self._new_one_connection()
+        vm_pool = one.vmpool.info(-1, min(vm_ids), max(vm_ids), -1).VM
+        requested = set(vm_ids)
+        return {str(vm.ID): vm for vm in vm_pool if int(vm.ID) in requested}
+
     def _get_networks_vm(self, vm_element):
         interfaces = []
         try:
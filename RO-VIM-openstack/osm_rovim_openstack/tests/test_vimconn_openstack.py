@@ -29,6 +29,7 @@ import unittest
 
 import mock
 from neutronclient.v2_0.client import Client
+from novaclient.v2.servers import ServerManager
 
 from osm_ro_plugin import vimconn
 from osm_rovim_openstack.vimconn_openstack import vimconnector
@@ -850,5 +851,97 @@ class TestSfcOperations(unittest.TestCase):
         self.assertEqual(result, '638f957c-82df-11e7-b7c8-132706021464')
 
 
+class TestRefreshVmsStatus(unittest.TestCase):
+    def setUp(self):
+        # instantiate dummy VIM connector so we can test it
+        self.vimconn = vimconnector(
+            '123', 'openstackvim', '456', '789', 'http://dummy.url', None,
+            'user', 'pass')
+
+    @staticmethod
+    def _server(vm_id, status='ACTIVE'):
+        server = mock.Mock(id=vm_id)
+        server.to_dict.return_value = {'id': vm_id, 'status': status}
+        return server
+
+    @staticmethod
+    def _port(vm_id, index):
+        return {'id': 'port-{}-{}'.format(vm_id, index), 'device_id': vm_id, 'network_id': 'net-{}'.format(index),
+                'mac_address': 'fa:16:3e:00:00:0{}'.format(index),
+                'fixed_ips': [{'ip_address': '10.0.{}.1'.format(index)}]}
+
+    @mock.patch.object(Client, 'show_network')
+    @mock.patch.object(Client, 'list_floatingips')
+    @mock.patch.object(Client, 'list_ports')
+    @mock.patch.object(vimconnector, 'get_vminstance')
+    @mock.patch.object(ServerManager, 'list')
+    def test_refresh_vms_status_bulk(self, list_servers, get_vminstance, list_ports, list_floatingips, show_network):
+        vm_list = ['vm-0', 'vm-1', 'vm-2']
+        get_vminstance.side_effect = vimconn.VimConnNotFoundException('not found')
+        list_servers.return_value = [self._server('vm-0'), self._server('vm-1', 'BUILD'), self._server('vm-other')]
+        list_ports.return_value = {'ports': [self._port(vm_id, index) for vm_id in ('vm-0', 'vm-1')
+                                             for index in range(2)]}
+        list_floatingips.return_value = {'floatingips': [{'port_id': 'port-vm-0-0',
+                                                          'floating_ip_address': '172.24.4.10'}]}
+        show_network.side_effect = lambda net_id: {'network': {'id': net_id, 'provider:network_type': 'vlan',
+                                                               'provider:segmentation_id': 100}}
+
+        result = self.vimconn.refresh_vms_status(vm_list)
+
+        # a single call per resource type, and networks are obtained once
+        list_servers.assert_called_once_with(detailed=True, limit=-1)
+        get_vminstance.assert_called_once_with('vm-2')
+        list_ports.assert_called_once_with(device_id=vm_list)
+        list_floatingips.assert_called_once()
+        self.assertEqual(show_network.call_count, 2)
+
+        self.assertEqual(result['vm-0']['status'], 'ACTIVE')
+        self.assertEqual(result['vm-1']['status'], 'BUILD')
+        self.assertEqual(result['vm-2']['status'], 'DELETED')
+        self.assertEqual(len(result['vm-0']['interfaces']), 2)
+        self.assertEqual(result['vm-0']['interfaces'][0]['ip_address'], '172.24.4.10;10.0.0.1')
+        self.assertEqual(result['vm-0']['interfaces'][1]['ip_address'], '10.0.1.1')
+        self.assertEqual(result['vm-1']['interfaces'][0]['vlan'], 100)
+
+    @mock.patch.object(Client, 'show_network')
+    @mock.patch.object(Client, 'list_floatingips')
+    @mock.patch.object(Client, 'list_ports')
+    @mock.patch.object(vimconnector, 'get_vminstance')
+    @mock.patch.object(ServerManager, 'list')
+    def test_refresh_vms_status_not_listed(self, list_servers, get_vminstance, list_ports, list_floatingips,
+                                           show_network):
+        # vm-1 is not at the listing, e.g. created after it, but it exists
+        list_servers.return_value = [self._server('vm-0')]
+        get_vminstance.return_value = {'id': 'vm-1', 'status': 'ACTIVE'}
+        list_ports.return_value = {'ports': [self._port('vm-0', 0), self._port('vm-1', 0)]}
+        list_floatingips.return_value = {'floatingips': []}
+        show_network.return_value = {'network': {'id': 'net-0', 'provider:network_type': 'vxlan'}}
+
+        result = self.vimconn.refresh_vms_status(['vm-0', 'vm-1'])
+
+        get_vminstance.assert_called_once_with('vm-1')
+        self.assertEqual(result['vm-0']['status'], 'ACTIVE')
+        self.assertEqual(result['vm-1']['status'], 'ACTIVE')
+        self.assertEqual(result['vm-1']['interfaces'][0]['ip_address'], '10.0.0.1')
+
+    @mock.patch.object(Client, 'show_network')
+    @mock.patch.object(Client, 'list_floatingips')
+    @mock.patch.object(Client, 'list_ports')
+    @mock.patch.object(vimconnector, 'get_vminstance')
+    def test_refresh_vms_status_single(self, get_vminstance, list_ports, list_floatingips, show_network):
+        get_vminstance.return_value = {'id': 'vm-0', 'status': 'ACTIVE'}
+        list_ports.return_value = {'ports': [self._port('vm-0', 0)]}
+        list_floatingips.return_value = {'floatingips': []}
+        show_network.return_value = {'network': {'id': 'net-0', 'provider:network_type': 'vxlan'}}
+
+        result = self.vimconn.refresh_vms_status(['vm-0'])
+
+        list_ports.assert_called_once_with(device_id='vm-0')
+        list_floatingips.assert_called_once_with(port_id='port-vm-0-0')
+        self.assertEqual(result['vm-0']['status'], 'ACTIVE')
+        self.assertEqual(result['vm-0']['interfaces'][0]['ip_address'], '10.0.0.1')
+        self.assertIsNone(result['vm-0']['interfaces'][0]['vlan'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -80,6 +80,10 @@ supportedClassificationTypes = ['legacy_flow_classifier']
 # global var to have a timeout creating and deleting volumes
 volume_timeout = 1800
 server_timeout = 1800
+# time that network information is kept at cache for refresh_vms_status
+network_cache_timeout = 600
+# max number of ids sent at a single neutron query
+neutron_filter_chunk = 100
 
 
 class SafeDumper(yaml.SafeDumper):
@@ -158,6 +162,7 @@ class vimconnector(vimconn.VimConnector):
         if isinstance(self.config.get('security_groups'), str):
             self.config['security_groups'] = [self.config['security_groups']]
         self.security_groups_id = None
+        self.network_cache = {}  # network_id: (time, network) used by refresh_vms_status
 
         # ###### VIO Specific Changes #########
         if self.vim_type == "VIO":
@@ -1656,10 +1661,21 @@ class vimconnector(vimconn.VimConnector):
         """
         vm_dict = {}
         self.logger.debug("refresh_vms status: Getting tenant VM instance information from VIM")
+        servers, ports, floating_ips = None, None, None
+        if len(vm_list) > 1:
+            try:
+                servers, ports, floating_ips = self._get_vms_bulk_info(vm_list)
+            except Exception as e:
+                self.logger.error("Error getting bulk vm information, getting one by one {}: {}".format(
+                    type(e).__name__, e))
         for vm_id in vm_list:
             vm = {}
             try:
-                vm_vim = self.get_vminstance(vm_id)
+                if servers and vm_id in servers:
+                    vm_vim = servers[vm_id]
+                else:
+                    # not obtained in bulk, e.g. created after listing. It raises VimConnNotFoundException if deleted
+                    vm_vim = self.get_vminstance(vm_id)
                 if vm_vim['status'] in vmStatus2manoFormat:
                     vm['status'] = vmStatus2manoFormat[vm_vim['status']]
                 else:
@@ -1674,8 +1690,11 @@ class vimconnector(vimconn.VimConnector):
                 # get interfaces
                 try:
                     self._reload_connection()
-                    port_dict = self.neutron.list_ports(device_id=vm_id)
-                    for port in port_dict["ports"]:
+                    if ports is None:
+                        port_list = self.neutron.list_ports(device_id=vm_id)["ports"]
+                    else:
+                        port_list = ports.get(vm_id, [])
+                    for port in port_list:
                         interface = {}
                         interface['vim_info'] = self.serialize(port)
                         interface["mac_address"] = port.get("mac_address")
@@ -1705,18 +1724,21 @@ class vimconnector(vimconn.VimConnector):
                         # it is needed vlan at PT
                         if not interface["vlan"]:
                             # if network is of type vlan and port is of type direct (sr-iov) then set vlan id
-                            network = self.neutron.show_network(port["network_id"])
-                            if network['network'].get('provider:network_type') == 'vlan':
+                            network = self._get_network_cached(port["network_id"])
+                            if network.get('provider:network_type') == 'vlan':
                                 # and port.get("binding:vnic_type") in ("direct", "direct-physical"):
-                                interface["vlan"] = network['network'].get('provider:segmentation_id')
+                                interface["vlan"] = network.get('provider:segmentation_id')
                         ips = []
                         # look for floating ip address
-                        try:
-                            floating_ip_dict = self.neutron.list_floatingips(port_id=port["id"])
-                            if floating_ip_dict.get("floatingips"):
-                                ips.append(floating_ip_dict["floatingips"][0].get("floating_ip_address"))
-                        except Exception:
-                            pass
+                        if floating_ips is None:
+                            try:
+                                floating_ip_dict = self.neutron.list_floatingips(port_id=port["id"])
+                                if floating_ip_dict.get("floatingips"):
+                                    ips.append(floating_ip_dict["floatingips"][0].get("floating_ip_address"))
+                            except Exception:
+                                pass
+                        elif floating_ips.get(port["id"]):
+                            ips.append(floating_ips[port["id"]].get("floating_ip_address"))
 
                         for subnet in port["fixed_ips"]:
                             ips.append(subnet["ip_address"])
@@ -1736,6 +1758,48 @@ class vimconnector(vimconn.VimConnector):
             vm_dict[vm_id] = vm
         return vm_dict
 
+    def _get_vms_bulk_info(self, vm_list):
+        """Get with a few calls the information needed for refreshing several vms, instead of several calls per vm
+           Params: the list of VM identifiers
+           Returns a tuple with three dictionaries:
+                servers:        server information by vm id. Vms not found at the listing are not present
+                ports:          list of ports by vm id
+                floating_ips:   floating ip information by port id
+        """
+        self._reload_connection()
+        vm_set = set(vm_list)
+        servers = {}
+        # limit=-1 makes novaclient follow all the pages, otherwise only the first max_limit servers are returned
+        for server in self.nova.servers.list(detailed=True, limit=-1):
+            if server.id in vm_set:
+                servers[server.id] = server.to_dict()
+        ports = {}
+        for index in range(0, len(vm_list), neutron_filter_chunk):
+            port_dict = self.neutron.list_ports(device_id=vm_list[index:index + neutron_filter_chunk])
+            for port in port_dict["ports"]:
+                ports.setdefault(port["device_id"], []).append(port)
+        floating_ips = {}
+        if self.my_tenant_id:
+            floating_ip_dict = self.neutron.list_floatingips(tenant_id=self.my_tenant_id)
+        else:
+            floating_ip_dict = self.neutron.list_floatingips()
+        for floating_ip in floating_ip_dict["floatingips"]:
+            if floating_ip.get("port_id") and floating_ip["port_id"] not in floating_ips:
+                floating_ips[floating_ip["port_id"]] = floating_ip
+        return servers, ports, floating_ips
+
+    def _get_network_cached(self, net_id):
+        """Get network information from neutron, keeping it at cache during network_cache_timeout seconds
+           Returns the network dictionary
+        """
+        now = time.time()
+        cached = self.network_cache.get(net_id)
+        if cached and cached[0] > now - network_cache_timeout:
+            return cached[1]
+        network = self.neutron.show_network(net_id)["network"]
+        self.network_cache[net_id] = (now, network)
+        return network
+
     def action_vminstance(self, vm_id, action_dict, created_items={}):
         """Send and action over a VM instance from VIM
         Returns None or the console dict if the action was successfully sent to the VIM"""
@@ -978,3 +978,158 @@ class TestVimconn_VMware(unittest.TestCase):
 
         # call to VIM connector method
         self.assertRaises(VimConnException, self.vim.action_vminstance, vm_id,{'invalid': None})
+
+    @mock.patch.object(vimconnector, 'get_session')
+    def test_perform_request_reuses_session(self, get_session):
+        """
+        Testcase for perform_request sending all the requests through the same session
+        """
+        get_session.return_value.request.return_value = mock.Mock(status_code=200)
+        self.vim.perform_request(req_type='GET', url='https://test/api/vApp/vapp-1', headers={})
+        self.vim.perform_request(req_type='PUT', url='https://test/api/vApp/vapp-1', headers={}, data='data')
+
+        self.assertEqual(get_session.return_value.request.call_count, 2)
+        self.assertEqual(self.vim.metrics["requests"], 2)
+
+    @mock.patch.object(vimconnector, 'connect')
+    @mock.patch.object(vimconnector, 'get_session')
+    def test_perform_request_renews_expired_token(self, get_session, connect):
+        """
+        Testcase for perform_request renewing the token and retrying once on 401
+        """
+        self.vim.client = mock.Mock()
+        self.vim.client._session.headers = {'x-vcloud-authorization': 'old'}
+        new_client = mock.Mock()
+        new_client._session.headers = {'x-vcloud-authorization': 'new'}
+        connect.return_value = new_client
+        get_session.return_value.request.side_effect = [mock.Mock(status_code=401), mock.Mock(status_code=200)]
+
+        response = self.vim.perform_request(req_type='GET', url='https://test/api/vApp/vapp-1',
+                                            headers={'x-vcloud-authorization': 'old'})
+
+        self.assertEqual(response.status_code, 200)
+        connect.assert_called_once_with()
+        retry_headers = get_session.return_value.request.call_args[1]['headers']
+        self.assertEqual(retry_headers['x-vcloud-authorization'], 'new')
+        self.assertEqual(self.vim.metrics["token_renewals"], 1)
+
+    @mock.patch.object(vimconnector, 'connect')
+    @mock.patch.object(vimconnector, 'perform_request')
+    @mock.patch.object(vimconnector, 'is_token_valid')
+    def test_retry_rest_without_login(self, is_token_valid, perform_request, connect):
+        """
+        Testcase for retry_rest not logging in again while the token is valid
+        """
+        self.vim.client = mock.Mock()
+        self.vim.client._session.headers = {'x-vcloud-authorization': 'token'}
+        is_token_valid.return_value = True
+        perform_request.return_value = mock.Mock(status_code=200)
+
+        self.vim.retry_rest('GET', 'https://test/api/vApp/vapp-1')
+
+        connect.assert_not_called()
+        perform_request.assert_called_once()
+
+    @mock.patch.object(vimconnector, 'perform_request')
+    def test_query_records_pages(self, perform_request):
+        """
+        Testcase for query_records following the result pages
+        """
+        page = ('<QueryResultRecords xmlns="http://www.vmware.com/vcloud/v1.5">{}'
+                '<VAppRecord name="{}" status="POWERED_ON" href="https://test/api/vApp/vapp-{}"/>'
+                '</QueryResultRecords>')
+        perform_request.side_effect = [
+            mock.Mock(status_code=200, content=page.format('<Link rel="nextPage" href="page2"/>', 'vapp1', '1')),
+            mock.Mock(status_code=200, content=page.format('', 'vapp2', '2'))]
+        self.vim.client = mock.Mock()
+        self.vim.client._session.headers = {'x-vcloud-authorization': 'token'}
+
+        records = self.vim.query_records('vApp', ['id==urn:vcloud:vapp:1', 'id==urn:vcloud:vapp:2'])
+
+        self.assertEqual([record['name'] for record in records], ['vapp1', 'vapp2'])
+        self.assertEqual(perform_request.call_count, 2)
+        self.assertIn('page=2', perform_request.call_args[1]['url'])
+
+    def test_parse_vm_details(self):
+        """
+        Testcase for parse_vm_details reading resources and network connections of a VM
+        """
+        vm_details, networks = self.vim.parse_vm_details(xml_resp.vm_xml_response)
+
+        self.assertEqual(vm_details['hdd_mb'], 10240)
+        self.assertEqual(vm_details['cpus'], 1)
+        self.assertEqual(vm_details['memory_mb'], 1024)
+        self.assertEqual(vm_details['status'], 'ACTIVE')
+        self.assertEqual(networks[0], ('00:50:56:01:14:1a', '172.16.27.72',
+                                       'testing_6SNBKa9pz62P-63e13553-ebf9-4518-a33d-6ea922a6d2ce'))
+
+    @mock.patch.object(vimconnector, 'get_org')
+    @mock.patch.object(vimconnector, 'get_vapp_details_rest')
+    @mock.patch.object(vimconnector, 'get_vcenter_content')
+    @mock.patch.object(vimconnector, 'connect_as_admin')
+    @mock.patch.object(vimconnector, 'perform_request')
+    @mock.patch.object(vimconnector, 'query_records')
+    def test_refresh_vms_status_bulk(self, query_records, perform_request, connect_as_admin, get_vcenter_content,
+                                     get_vapp_details_rest, get_org):
+        """
+        Testcase to refresh vms status with the vCD query service
+        """
+        vm_ids = ['53a529b2-10d8-4d56-a7ad-8182acdbe71c', '8a7a8e1c-b0c4-4b6e-9b0b-1d1f1f0a4e2d']
+        vapp_hrefs = ['https://test/api/vApp/vapp-{}'.format(vm_id) for vm_id in vm_ids]
+        vm_hrefs = ['https://test/api/vApp/vm-{}'.format(index) for index in range(2)]
+        query_records.side_effect = [
+            [{'name': 'Test{}_vm'.format(index), 'status': 'POWERED_ON', 'href': vapp_hrefs[index]}
+             for index in range(2)],
+            [{'name': 'Test{}_vm'.format(index), 'container': vapp_hrefs[index], 'href': vm_hrefs[index]}
+             for index in range(2)],
+            [{'name': 'Test{}_vm'.format(index), 'href': vm_hrefs[index], 'moref': 'vm-10{}'.format(index)}
+             for index in range(2)]]
+        perform_request.return_value = mock.Mock(status_code=200, content=xml_resp.vm_xml_response)
+        # vCenter content with the two VMs and another one not requested
+        vm_objs = []
+        for moref in ('vm-100', 'vm-101', 'vm-200'):
+            vm_obj = mock.Mock()
+            vm_obj._GetMoId.return_value = moref
+            vm_obj.runtime.host.name = 'test-esx-1.corp.local'
+            vm_obj.runtime.host.config.network.vnic = [mock.Mock()]
+            vm_obj.runtime.host.config.network.vnic[0].spec.ip.ipAddress = '12.19.24.31'
+            vm_obj.config.hardware.device = []
+            vm_objs.append(vm_obj)
+        content = mock.Mock()
+        content.viewManager.CreateContainerView.return_value.view = vm_objs
+        get_vcenter_content.return_value = (mock.Mock(), content)
+        get_org.return_value = {'networks': {
+            '47d12505-5968-4e16-95a7-18743edb0c8b': 'testing_6SNBKa9pz62P-63e13553-ebf9-4518-a33d-6ea922a6d2ce'}}
+        self.vim.client = mock.Mock()
+        self.vim.client._session.headers = {'x-vcloud-authorization': 'token'}
+
+        result = self.vim.refresh_vms_status(vm_ids + ['not-found'])
+
+        self.assertEqual(list(result), vm_ids)
+        self.assertEqual(result[vm_ids[0]]['status'], 'ACTIVE')
+        self.assertEqual(result[vm_ids[0]]['interfaces'][0]['vim_net_id'], '47d12505-5968-4e16-95a7-18743edb0c8b')
+        self.assertEqual(result[vm_ids[0]]['interfaces'][0]['ip_address'], '172.16.27.72')
+        self.assertIn('host_name: test-esx-1.corp.local', result[vm_ids[1]]['vim_info'])
+        # a single VM description per VM, and a single admin login and vCenter connection for all of them
+        self.assertEqual(perform_request.call_count, 2)
+        get_org.assert_called_once()
+        connect_as_admin.assert_called_once()
+        get_vcenter_content.assert_called_once()
+        content.viewManager.CreateContainerView.assert_called_once()
+        get_vapp_details_rest.assert_not_called()
+        self.assertIn('container=={}'.format(vapp_hrefs[0]), query_records.call_args_list[1][0][1])
+        self.assertEqual(query_records.call_args[0][:2], ('adminVM', ['id==urn:vcloud:vm:0', 'id==urn:vcloud:vm:1']))
+        self.assertIs(query_records.call_args[1]['client'], connect_as_admin.return_value)
+
+    @mock.patch.object(vimconnector, 'refresh_vms_status_one_by_one')
+    @mock.patch.object(vimconnector, 'query_records')
+    def test_refresh_vms_status_query_not_available(self, query_records, refresh_vms_status_one_by_one):
+        """
+        Testcase to refresh vms status one by one when the vCD query service fails
+        """
+        query_records.side_effect = VimConnException("query_records : Failed to query 'vApp' records")
+        refresh_vms_status_one_by_one.return_value = {}
+
+        self.vim.refresh_vms_status(['53a529b2-10d8-4d56-a7ad-8182acdbe71c'])
+
+        refresh_vms_status_one_by_one.assert_called_once_with(['53a529b2-10d8-4d56-a7ad-8182acdbe71c'])
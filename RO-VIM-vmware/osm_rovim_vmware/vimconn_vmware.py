@@ -34,6 +34,7 @@ from pyvcloud.vcd.client import BasicLoginCredentials, Client
 from pyvcloud.vcd.org import Org
 from pyvcloud.vcd.vapp import VApp
 from pyvcloud.vcd.vdc import VDC
+from urllib.parse import urlencode
 from xml.etree import ElementTree as XmlElementTree
 from xml.sax.saxutils import escape
 import atexit
@@ -72,6 +73,12 @@ INTERVAL_TIME = 5
 MAX_WAIT_TIME = 1800
 
 API_VERSION = '27.0'
+# Connections kept alive by the requests session of each vimconnector
+HTTP_POOL_SIZE = 10
+# vCD typed queries: records per page, and conditions of each query, to keep the url length bounded
+QUERY_PAGE_SIZE = 128
+QUERY_FILTER_CHUNK = 20
+VCD_NAMESPACE = 'http://www.vmware.com/vcloud/v1.5'
 
 #     -1: "Could not be created",
 #     0: "Unresolved",
@@ -100,6 +107,29 @@ vcdStatusCode2manoFormat = {4: 'ACTIVE',
                             -1: 'ERROR',
                             14: 'DELETED'}
 
+# status names returned by the typed queries, and their status codes
+vcdQueryStatus2Code = {'FAILED_CREATION': -1,
+                       'UNRESOLVED': 0,
+                       'RESOLVED': 1,
+                       'DEPLOYED': 2,
+                       'SUSPENDED': 3,
+                       'POWERED_ON': 4,
+                       'WAITING_FOR_INPUT': 5,
+                       'UNKNOWN': 6,
+                       'UNRECOGNIZED': 7,
+                       'POWERED_OFF': 8,
+                       'INCONSISTENT_STATE': 9,
+                       'MIXED': 10,
+                       'DESCRIPTOR_PENDING': 11,
+                       'COPYING_CONTENTS': 12,
+                       'DISK_CONTENTS_PENDING': 13,
+                       'QUARANTINED': 14,
+                       'QUARANTINE_EXPIRED': 15,
+                       'REJECTED': 16,
+                       'TRANSFER_TIMEOUT': 17,
+                       'VAPP_UNDEPLOYED': 18,
+                       'VAPP_PARTIALLY_DEPLOYED': 19}
+
 #
 netStatus2manoFormat = {'ACTIVE': 'ACTIVE',
                         'PAUSED': 'PAUSED',
@@ -219,6 +249,8 @@ class vimconnector(vimconn.VimConnector):
 
         self.org_uuid = None
         self.client = None
+        self.session = None  # requests.Session used by perform_request. Created at first use
+        self.metrics = {"logins": 0, "requests": 0, "token_renewals": 0}
 
         if not url:
             raise vimconn.VimConnException('url param can not be NoneType')
@@ -298,6 +330,7 @@ class vimconnector(vimconn.VimConnector):
         try:
             host = self.url
             org = 'System'
+            self.metrics["logins"] += 1
             client_as_admin = Client(host, verify_ssl_certs=False, api_version=API_VERSION)
             client_as_admin.set_credentials(BasicLoginCredentials(self.admin_user, org, self.admin_password))
         except Exception as e:
@@ -317,6 +350,7 @@ class vimconnector(vimconn.VimConnector):
                                                                                    self.user,
                                                                                    self.org_name))
             host = self.url
+            self.metrics["logins"] += 1
             client = Client(host, verify_ssl_certs=False, api_version=API_VERSION)
             client.set_credentials(BasicLoginCredentials(self.user, self.org_name, self.passwd))
         except Exception as e:
@@ -1175,10 +1209,9 @@ class vimconnector(vimconn.VimConnector):
                                 headers['Content-Range'] = 'bytes {}-{}/{}'.format(
                                     bytes_transferred, len(my_bytes) - 1, statinfo.st_size)
                                 headers['Content-Length'] = str(len(my_bytes))
-                                response = requests.put(url=hrefvmdk,
-                                                        headers=headers,
-                                                        data=my_bytes,
-                                                        verify=False)
+                                response = self.get_session().put(url=hrefvmdk,
+                                                                  headers=headers,
+                                                                  data=my_bytes)
                                 if response.status_code == requests.codes.ok:
                                     bytes_transferred += len(my_bytes)
                                     if progress:
@@ -2788,6 +2821,98 @@ class vimconnector(vimconn.VimConnector):
 
         self.logger.debug("Client requesting refresh vm status for {} ".format(vm_list))
 
+        # Get all the vApps, and their VMs, with a few typed queries instead of several requests per vApp
+        try:
+            vapp_records = self.query_records('vApp', ['id==urn:vcloud:vapp:{}'.format(vapp_uuid)
+                                                       for vapp_uuid in vm_list])
+            vapps = {record['href'].split('vapp-')[-1]: record for record in vapp_records}
+            vm_records = self.query_records('vm', ['container=={}'.format(record['href'])
+                                                   for record in vapp_records],
+                                            extra_filter='isVAppTemplate==false') if vapp_records else []
+        except Exception as exp:
+            self.logger.debug("refresh_vms_status : vCD query failed, getting vApps one by one: {}".format(exp))
+            return self.refresh_vms_status_one_by_one(vm_list)
+        vapp_vms = {}
+        for record in vm_records:
+            vapp_vms.setdefault(record.get('container'), []).append(record)
+        # PCI devices of all the VMs, with a single vCD admin login and a single vCenter connection
+        vms_pci_details = self.get_vms_pci_details(vm_records)
+
+        vms_dict = {}
+        nsx_edge_list = []
+        org_networks = None  # network name to network uuid, obtained at first use
+        for vmuuid in vm_list:
+            vapp_record = vapps.get(vmuuid)
+            if vapp_record is None:
+                continue
+
+            try:
+                vapp_status = vcdStatusCode2manoFormat[vcdQueryStatus2Code[vapp_record.get('status')]]
+
+                for vm_record in vapp_vms.get(vapp_record['href'], ()):
+                    headers = {'Accept': 'application/*+xml;version=' + API_VERSION,
+                               'x-vcloud-authorization': self.client._session.headers['x-vcloud-authorization']}
+                    response = self.perform_request(req_type='GET',
+                                                    url=vm_record['href'],
+                                                    headers=headers)
+                    if response.status_code == 403:
+                        response = self.retry_rest('GET', vm_record['href'])
+
+                    if response.status_code != 200:
+                        self.logger.error("refresh_vms_status : REST call {} failed reason : {}"
+                                          "status code : {}".format(vm_record['href'],
+                                                                    response.text,
+                                                                    response.status_code))
+                        raise vimconn.VimConnException("refresh_vms_status : Failed to get VM details")
+                    vm_details, networks = self.parse_vm_details(response.content)
+                    vm_info = [vm_details]
+                    vm_pci_details = vms_pci_details.get(vm_record['href'].split('vm-')[-1])
+                    if vm_pci_details:
+                        vm_info[0].update(vm_pci_details)
+
+                    vm_dict = {'status': vapp_status,
+                               'error_msg': vapp_status,
+                               'vim_info': yaml.safe_dump(vm_info), 'interfaces': []}
+
+                    # get networks
+                    for vm_mac, vm_ip, network_name in networks:
+                        if vm_ip is None:
+                            if not nsx_edge_list:
+                                nsx_edge_list = self.get_edge_details()
+                                if nsx_edge_list is None:
+                                    raise vimconn.VimConnException("refresh_vms_status:"
+                                                                   "Failed to get edge details from NSX Manager")
+                            if vm_mac is not None:
+                                vm_ip = self.get_ipaddr_from_NSXedge(nsx_edge_list, vm_mac)
+
+                        if org_networks is None:
+                            org_networks = {}
+                            org_dict = self.get_org(self.org_uuid)
+                            for net_uuid, net_name in (org_dict or {}).get('networks', {}).items():
+                                org_networks.setdefault(net_name, net_uuid)
+                        vm_net_id = org_networks.get(network_name) if network_name else None
+                        interface = {"mac_address": vm_mac,
+                                     "vim_net_id": vm_net_id,
+                                     "vim_interface_id": vm_net_id,
+                                     "ip_address": vm_ip}
+
+                        vm_dict["interfaces"].append(interface)
+
+                    # add a vm to vm dict
+                    vms_dict[vmuuid] = vm_dict
+                    self.logger.debug("refresh_vms_status : vm info {}".format(vm_dict))
+            except Exception as exp:
+                self.logger.debug("Error in response {}".format(exp))
+                self.logger.debug(traceback.format_exc())
+
+        return vms_dict
+
+    def refresh_vms_status_one_by_one(self, vm_list):
+        """Get the status of the virtual machines and their interfaces/ports, requesting each vApp and VM separately.
+           Used by refresh_vms_status when the vCD query service cannot be used
+           Params: the list of VM identifiers
+           Returns a dictionary with the same content as refresh_vms_status
+        """
         _, vdc = self.get_vdc_details()
         if vdc is None:
             raise vimconn.VimConnException("Failed to get a reference of VDC for a tenant {}".format(self.tenant_name))
@@ -2884,6 +3009,90 @@ class vimconnector(vimconn.VimConnector):
 
         return vms_dict
 
+    def query_records(self, record_type, filters, extra_filter=None, client=None):
+        """
+            Method to get records with the vCD typed query service, following all the result pages
+            Args:
+                record_type - query type, e.g. 'vApp', 'vm', 'adminVM'
+                filters - list of conditions 'attribute==value'; records matching any of them are returned. They are
+                          sent in chunks of QUERY_FILTER_CHUNK conditions
+                extra_filter - condition that all records must match
+                client - (optional) client used for the query, e.g. the one returned by connect_as_admin.
+                         By default the client of the tenant user
+            Returns:
+                list of dictionaries with the attributes of each record
+        """
+        records = []
+        headers = {'Accept': 'application/*+xml;version=' + API_VERSION,
+                   'x-vcloud-authorization': (client or self.client)._session.headers['x-vcloud-authorization']}
+        for index in range(0, len(filters), QUERY_FILTER_CHUNK):
+            query_filter = "(" + ",".join(filters[index:index + QUERY_FILTER_CHUNK]) + ")"
+            if extra_filter:
+                query_filter += ";" + extra_filter
+            page = 1
+            while True:
+                url_rest_call = "{}/api/query?{}".format(self.url, urlencode(
+                    {"type": record_type, "format": "records", "pageSize": QUERY_PAGE_SIZE, "page": page,
+                     "filter": query_filter}))
+                response = self.perform_request(req_type='GET',
+                                                url=url_rest_call,
+                                                headers=headers)
+                if response.status_code == 403 and not client:
+                    response = self.retry_rest('GET', url_rest_call)
+                if response.status_code != requests.codes.ok:
+                    raise vimconn.VimConnException("query_records : Failed to query '{}' records, status code: {}"
+                                                   .format(record_type, response.status_code))
+
+                next_page = False
+                for element in XmlElementTree.fromstring(response.content):
+                    if element.tag == "{{{}}}Link".format(VCD_NAMESPACE):
+                        next_page = next_page or element.get("rel") == "nextPage"
+                    elif element.tag.endswith("Record"):
+                        records.append(dict(element.attrib))
+                if not next_page:
+                    break
+                page += 1
+        return records
+
+    def parse_vm_details(self, vm_xml):
+        """
+            Method to get the details used by refresh_vms_status from the XML description of a VM
+            Args:
+                vm_xml - text of the VM description obtained from vCD
+            Returns:
+                vm_details - dictionary with hdd_mb, cpus, memory_mb, status, id and name
+                networks - list of tuples (mac address, ip address, network name) of each network connection
+        """
+        ns = {'vcloud': VCD_NAMESPACE,
+              'ovf': 'http://schemas.dmtf.org/ovf/envelope/1',
+              'rasd': 'http://schemas.dmtf.org/wbem/wscim/1/cim-schema/2/CIM_ResourceAllocationSettingData'}
+        xmlroot = XmlElementTree.fromstring(vm_xml)
+        vm_details = {}
+        for item in xmlroot.iterfind('ovf:VirtualHardwareSection/ovf:Item', ns):
+            resource_type = item.findtext('rasd:ResourceType', namespaces=ns)
+            if resource_type == '17' and 'hdd_mb' not in vm_details:  # first hard disk
+                host_resource = item.find('rasd:HostResource', ns)
+                capacity = host_resource.get('{{{}}}capacity'.format(VCD_NAMESPACE)) \
+                    if host_resource is not None else None
+                if capacity:
+                    vm_details['hdd_mb'] = int(capacity)
+            elif resource_type == '3':
+                cpus = item.findtext('rasd:VirtualQuantity', namespaces=ns)
+                vm_details['cpus'] = int(cpus) if cpus else None
+            elif resource_type == '4':
+                memory_mb = item.findtext('rasd:VirtualQuantity', namespaces=ns)
+                vm_details['memory_mb'] = int(memory_mb) if memory_mb else None
+        vm_details['status'] = vcdStatusCode2manoFormat[int(xmlroot.get('status'))]
+        vm_details['id'] = xmlroot.get('id')
+        vm_details['name'] = xmlroot.get('name')
+
+        networks = []
+        for network in xmlroot.iterfind('vcloud:NetworkConnectionSection/vcloud:NetworkConnection', ns):
+            networks.append((network.findtext('vcloud:MACAddress', namespaces=ns),
+                             network.findtext('vcloud:IpAddress', namespaces=ns),
+                             network.get('network')))
+        return vm_details, networks
+
     def get_edge_details(self):
         """Get the NSX edge list from NSX Manager
            Returns list of NSX edges
@@ -2895,9 +3104,9 @@ class vimconnector(vimconn.VimConnector):
         self.logger.debug("Get edge details from NSX Manager {} {}".format(self.nsx_manager, nsx_api_url))
 
         try:
-            resp = requests.get(self.nsx_manager + nsx_api_url,
-                                auth=(self.nsx_user, self.nsx_password),
-                                verify=False, headers=rheaders)
+            resp = self.get_session().get(self.nsx_manager + nsx_api_url,
+                                          auth=(self.nsx_user, self.nsx_password),
+                                          verify=False, headers=rheaders)
             if resp.status_code == requests.codes.ok:
                 paged_Edge_List = XmlElementTree.fromstring(resp.text)
                 for edge_pages in paged_Edge_List:
@@ -2955,9 +3164,9 @@ class vimconnector(vimconn.VimConnector):
             for edge in nsx_edges:
                 nsx_api_url = '/api/4.0/edges/' + edge + '/dhcp/leaseInfo'
 
-                resp = requests.get(self.nsx_manager + nsx_api_url,
-                                    auth=(self.nsx_user, self.nsx_password),
-                                    verify=False, headers=rheaders)
+                resp = self.get_session().get(self.nsx_manager + nsx_api_url,
+                                              auth=(self.nsx_user, self.nsx_password),
+                                              verify=False, headers=rheaders)
 
                 if resp.status_code == requests.codes.ok:
                     dhcp_leases = XmlElementTree.fromstring(resp.text)
@@ -4852,14 +5061,7 @@ class vimconnector(vimconn.VimConnector):
                 if content:
                     host_obj, vm_obj = self.get_vm_obj(content, vm_moref_id)
                     if host_obj and vm_obj:
-                        vm_pci_devices_info["host_name"] = host_obj.name
-                        vm_pci_devices_info["host_ip"] = host_obj.config.network.vnic[0].spec.ip.ipAddress
-                        for device in vm_obj.config.hardware.device:
-                            if type(device) == vim.vm.device.VirtualPCIPassthrough:
-                                device_details = {'devide_id': device.backing.id,
-                                                  'pciSlotNumber': device.slotInfo.pciSlotNumber,
-                                                  }
-                                vm_pci_devices_info[device.deviceInfo.label] = device_details
+                        vm_pci_devices_info = self.get_pci_devices_info(host_obj, vm_obj)
                 else:
                     self.logger.error("Can not connect to vCenter while getting "
                                       "PCI devices infromationn")
@@ -4869,6 +5071,62 @@ class vimconnector(vimconn.VimConnector):
                               " for VM : {}".format(exp))
             raise vimconn.VimConnException(message=exp)
 
+    def get_vms_pci_details(self, vm_records):
+        """
+            Method to get the PCI device details of several VMs from vCenter. Instead of a vCD admin login, a vApp
+            request and a vCenter connection per VM as get_vm_pci_details, the moref ids are obtained with a single
+            admin login and 'adminVM' typed queries, and vCenter is connected and its VMs listed once
+
+            Args:
+                vm_records - list of vCD 'vm' query records
+
+            Returns:
+                dict with the PCI devices attached to each VM, as get_vm_pci_details, by VM uuid.
+                Empty if they cannot be obtained
+        """
+        vms_pci_devices_info = {}
+        if not vm_records:
+            return vms_pci_devices_info
+        try:
+            client_as_admin = self.connect_as_admin()
+            vm_filters = ['id==urn:vcloud:vm:{}'.format(record['href'].split('vm-')[-1]) for record in vm_records]
+            admin_records = self.query_records('adminVM', vm_filters, client=client_as_admin)
+            vm_morefs = {record['moref']: record['href'].split('vm-')[-1] for record in admin_records
+                         if record.get('moref')}
+            if not vm_morefs:
+                return vms_pci_devices_info
+            _, content = self.get_vcenter_content()
+            container = content.viewManager.CreateContainerView(content.rootFolder, [vim.VirtualMachine], True)
+            for vm_obj in container.view:
+                vm_uuid = vm_morefs.get(vm_obj._GetMoId())
+                if vm_uuid and vm_obj.runtime.host:
+                    vms_pci_devices_info[vm_uuid] = self.get_pci_devices_info(vm_obj.runtime.host, vm_obj)
+        except Exception as exp:
+            self.logger.error("Error occurred while getting PCI devices information of VMs : {}".format(exp))
+        return vms_pci_devices_info
+
+    @staticmethod
+    def get_pci_devices_info(host_obj, vm_obj):
+        """
+            Method to get the host and the PCI passthrough devices of a vSphere VM
+
+            Args:
+                host_obj - vSphere host object
+                vm_obj - vSphere VM object
+
+            Returns:
+                dict with host_name, host_ip and the PCI devices attached to VM by label
+        """
+        vm_pci_devices_info = {"host_name": host_obj.name,
+                               "host_ip": host_obj.config.network.vnic[0].spec.ip.ipAddress}
+        for device in vm_obj.config.hardware.device:
+            if type(device) == vim.vm.device.VirtualPCIPassthrough:
+                device_details = {'devide_id': device.backing.id,
+                                  'pciSlotNumber': device.slotInfo.pciSlotNumber,
+                                  }
+                vm_pci_devices_info[device.deviceInfo.label] = device_details
+        return vm_pci_devices_info
+
     def reserve_memory_for_all_vms(self, vapp, memory_mb):
         """
             Method to reserve memory for all VMs
@@ -6485,7 +6743,7 @@ if [ "$1" = "precustomization" ];then
             raise vimconn.VimConnException(message=exp)
 
     def retry_rest(self, method, url, add_headers=None, data=None):
-        """ Method to get Token & retry respective REST request
+        """ Method to get Token if expired & retry respective REST request
             Args:
                 api - REST API - Can be one of 'GET' or 'PUT' or 'POST'
                 url - request url to be used
@@ -6496,8 +6754,9 @@ if [ "$1" = "precustomization" ];then
         """
         response = None
 
-        # Get token
-        self.get_token()
+        # Get token, only if the current one is not valid anymore
+        if not self.is_token_valid():
+            self.get_token()
 
         if self.client._session:
                 headers = {'Accept': 'application/*+xml;version=' + API_VERSION,
@@ -6532,8 +6791,44 @@ if [ "$1" = "precustomization" ];then
             Returns:
                 The return client object that letter can be used to connect to vCloud director as admin for VDC
         """
+        self.metrics["token_renewals"] += 1
         self.client = self.connect()
 
+    def is_token_valid(self):
+        """ Check if the token of the current session is still accepted by vCloud director.
+            It is cheaper than a new login, that is only needed when the token has expired
+
+            Returns:
+                True if the token is valid, False otherwise
+        """
+        if not self.client or not self.client._session:
+            return False
+        headers = {'Accept': 'application/*+xml;version=' + API_VERSION,
+                   'x-vcloud-authorization': self.client._session.headers['x-vcloud-authorization']}
+        try:
+            self.metrics["requests"] += 1
+            response = self.get_session().get(url="{}/api/session".format(self.url), headers=headers)
+        except requests.exceptions.RequestException as e:
+            self.logger.debug("Cannot check vCD session: {}".format(e))
+            return False
+        return response.status_code == requests.codes.ok
+
+    def get_session(self):
+        """ Get the requests session used for the REST calls. It keeps alive the connections to vCloud director,
+            so that TLS handshakes are not repeated at every request
+
+            Returns:
+                requests.Session object
+        """
+        if not self.session:
+            session = requests.Session()
+            session.verify = False
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.session = session
+        return self.session
+
     def get_vdc_details(self):
         """ Get VDC details using pyVcloud Lib
 
@@ -6561,24 +6856,22 @@ if [ "$1" = "precustomization" ];then
         # Log REST request details
         self.log_request(req_type, url=url, headers=headers, data=data)
         # perform request and return its result
-        if req_type == 'GET':
-            response = requests.get(url=url,
-                                    headers=headers,
-                                    verify=False)
-        elif req_type == 'PUT':
-            response = requests.put(url=url,
-                                    headers=headers,
-                                    data=data,
-                                    verify=False)
-        elif req_type == 'POST':
-            response = requests.post(url=url,
-                                     headers=headers,
-                                     data=data,
-                                     verify=False)
-        elif req_type == 'DELETE':
-            response = requests.delete(url=url,
-                                       headers=headers,
-                                       verify=False)
+        if req_type not in ('GET', 'PUT', 'POST', 'DELETE'):
+            raise vimconn.VimConnException("Invalid REST request type '{}'".format(req_type))
+        session = self.get_session()
+        self.metrics["requests"] += 1
+        response = session.request(req_type, url=url, headers=headers, data=data)
+
+        # Token expired. Renew it and retry once, if the request was sent with the token of the current session
+        if response.status_code == requests.codes.unauthorized and headers and self.client and \
+                self.client._session and \
+                headers.get('x-vcloud-authorization') == self.client._session.headers['x-vcloud-authorization']:
+            self.logger.debug("vCD token expired, getting a new one")
+            self.get_token()
+            headers = dict(headers)
+            headers['x-vcloud-authorization'] = self.client._session.headers['x-vcloud-authorization']
+            self.metrics["requests"] += 1
+            response = session.request(req_type, url=url, headers=headers, data=data)
         # Log the REST response
         self.log_response(response)
 
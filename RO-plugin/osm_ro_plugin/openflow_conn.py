@@ -18,6 +18,7 @@
 import logging
 from http import HTTPStatus
 from osm_ro_plugin.sdnconn import SdnConnectorBase, SdnConnectorError
+from time import time
 from uuid import uuid4
 
 """
@@ -158,11 +159,17 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
     This class is the base engine of SDN plugins base on openflow rules
     """
     flow_fields = ('priority', 'vlan', 'ingress_port', 'actions', 'dst_mac', 'src_mac', 'net_id')
+    of_rules_cache_ttl = 10  # default seconds the rules read from the controller are reused
 
     def __init__(self, wim, wim_account, config=None, logger=None, of_connector=None):
         self.logger = logger or logging.getLogger('openmano.sdn.openflow_conn')
         self.of_connector = of_connector
         self.of_controller_nets_with_same_vlan = config.get("of_controller_nets_with_same_vlan", False)
+        self.of_rules_cache_ttl = config.get("of_rules_cache_ttl", self.of_rules_cache_ttl)
+        # Rules at the openflow controller. They are read once and kept updated with the rules inserted/deleted by
+        # this connector, until of_rules_cache_ttl expires or the generation is increased by invalidate_of_rules
+        self.of_rules_generation = 0
+        self._of_rules = None  # dict with: generation, time, index (flow_key -> rule name), names (set)
 
     def check_credentials(self):
         try:
@@ -262,19 +269,22 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
 
             # Get the existing flows at openflow controller
             step = "Getting installed openflow rules"
-            existing_flows = self.of_connector.get_of_rules()
-            existing_flows_ids = [flow["name"] for flow in existing_flows]
+            of_rules = self._get_of_rules()
+            existing_flows_index = of_rules["index"]
+            existing_flows_ids = of_rules["names"]
 
             # calculate new flows to be inserted
             step = "Compute needed openflow rules"
             new_flows = self._compute_net_flows(net_id, ports)
 
+            step = "Inserting openflow rules"
+            rules_to_delete = set(rules_to_delete)
             name_index = 0
             for flow in new_flows:
                 # 1 check if an equal flow is already present
-                index = self._check_flow_already_present(flow, existing_flows)
-                if index >= 0:
-                    flow_id = existing_flows[index]["name"]
+                flow_key = self._flow_key(flow)
+                flow_id = existing_flows_index.get(flow_key)
+                if flow_id:
                     self.logger.debug("Skipping already present flow %s", str(flow))
                 else:
                     # 2 look for a non used name
@@ -287,19 +297,21 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                     try:
                         self.of_connector.new_flow(flow)
                         flow_id = flow["name"]
-                        existing_flows_ids.append(flow_id)
+                        existing_flows_ids[flow_id] = flow_key
+                        existing_flows_index.setdefault(flow_key, flow_id)
                     except OpenflowConnException as e:
                         flow_id = None
+                        self.invalidate_of_rules()
                         error_list.append("Cannot create rule for ingress_port={}, dst_mac={}: {}"
-                                          .format(flow["ingress_port"], flow["dst_mac"], e))
+                                          .format(flow["ingress_port"], flow.get("dst_mac"), e))
 
                 # 4 insert at database
                 if flow_id:
                     new_installed_rules_ids.append(flow_id)
-                    if flow_id in rules_to_delete:
-                        rules_to_delete.remove(flow_id)
+                    rules_to_delete.discard(flow_id)
 
             # delete not needed old flows from openflow
+            step = "Deleting openflow rules"
             for flow_id in rules_to_delete:
                 # Delete flow
                 try:
@@ -307,9 +319,12 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                 except OpenflowConnNotFoundException:
                     pass
                 except OpenflowConnException as e:
+                    self.invalidate_of_rules()
                     error_text = "Cannot remove rule '{}': {}".format(flow_id, e)
                     error_list.append(error_text)
                     self.logger.error(error_text)
+                    continue
+                self._forget_of_rule(flow_id)
             created_items["installed_rules_ids"] = new_installed_rules_ids
             if error_list:
                 created_items["error_msg"] = ";".join(error_list)[:1000]
@@ -319,15 +334,78 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                 created_items["status"] = "ACTIVE"
             return created_items
         except (SdnConnectorError, OpenflowConnException) as e:
+            self.invalidate_of_rules()
             raise SdnConnectorError("Error while {}: {}".format(step, e)) from e
         except Exception as e:
+            self.invalidate_of_rules()
             error_text = "Error while {}: {}".format(step, e)
             self.logger.critical(error_text, exc_info=True)
             raise SdnConnectorError(error_text)
 
+    def invalidate_of_rules(self):
+        """Force reading again the rules from the openflow controller at next operation"""
+        self.of_rules_generation += 1
+
+    def _get_of_rules(self):
+        """
+        Get the rules installed at the openflow controller, reusing the ones read by a previous operation if they are
+        not older than of_rules_cache_ttl seconds and invalidate_of_rules has not been called meanwhile
+        :return: dictionary with:
+            index: dictionary with the flow_key of each rule as key and the rule name as value
+            names: dictionary with the rule names as key and their flow_key as value
+        """
+        now = time()
+        of_rules = self._of_rules
+        if of_rules and of_rules["generation"] == self.of_rules_generation and \
+                now - of_rules["time"] < self.of_rules_cache_ttl:
+            return of_rules
+        existing_flows = self.of_connector.get_of_rules()
+        index = {}
+        names = {}
+        for flow in existing_flows:
+            flow_key = self._flow_key(flow)
+            # keep the first one of several equal rules
+            index.setdefault(flow_key, flow["name"])
+            names[flow["name"]] = flow_key
+        self._of_rules = {
+            "generation": self.of_rules_generation,
+            "time": now,
+            "index": index,
+            "names": names,
+        }
+        return self._of_rules
+
+    def _forget_of_rule(self, flow_name):
+        """Remove a deleted rule from the rules read from the controller"""
+        of_rules = self._of_rules
+        if not of_rules or of_rules["generation"] != self.of_rules_generation:
+            return
+        flow_key = of_rules["names"].pop(flow_name, None)
+        if flow_key and of_rules["index"].get(flow_key) == flow_name:
+            del of_rules["index"][flow_key]
+
+    def _flow_key(self, flow):
+        """Hashable value with the flow_fields of a flow. Two flows are equal, that is, all their flow_fields are
+        equal, if they have the same key"""
+        return tuple(self._freeze(flow.get(f)) for f in self.flow_fields)
+
+    @classmethod
+    def _freeze(cls, value):
+        """Hashable version of a value with the same equality as the original one. Lists and tuples keep their type
+        at the key, as a list is never equal to a tuple, e.g. actions [("vlan", 1)] and (("vlan", 1),) are different"""
+        if isinstance(value, list):
+            return list, tuple(cls._freeze(item) for item in value)
+        if isinstance(value, tuple):
+            return tuple, tuple(cls._freeze(item) for item in value)
+        if isinstance(value, dict):
+            return dict, frozenset((k, cls._freeze(v)) for k, v in value.items())
+        return value
+
     def _compute_net_flows(self, net_id, ports):
         new_flows = []
+        new_flows_keys = set()  # _flow_key of new_flows, to skip repeated flows
         new_broadcast_flows = {}
+        new_broadcast_outs = {}  # same keys as new_broadcast_flows, set with the (vlan, port) outputs
         nb_ports = len(ports)
 
         # Check switch_port information is right
@@ -355,6 +433,7 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                                   'actions': []
                                   }
                 new_broadcast_flows[broadcast_key] = flow_broadcast
+                new_broadcast_outs[broadcast_key] = set()
                 if vlan_in is not None:
                     flow_broadcast['vlan_id'] = str(vlan_in)
 
@@ -382,17 +461,20 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                     flow['actions'].append(('vlan', vlan_out))
                 flow['actions'].append(('out', str(dst_port['switch_port'])))
 
-                if self._check_flow_already_present(flow, new_flows) >= 0:
+                flow_key = self._flow_key(flow)
+                if flow_key in new_flows_keys:
                     self.logger.debug("Skipping repeated flow '%s'", str(flow))
                     continue
 
                 new_flows.append(flow)
+                new_flows_keys.add(flow_key)
 
                 # BROADCAST:
                 if nb_ports <= 2:  # point to multipoint or nets with more than 2 elements
                     continue
                 out = (vlan_out, str(dst_port['switch_port']))
-                if out not in flow_broadcast['actions']:
+                if out not in new_broadcast_outs[broadcast_key]:
+                    new_broadcast_outs[broadcast_key].add(out)
                     flow_broadcast['actions'].append(out)
 
         # BROADCAST
@@ -417,11 +499,13 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
                 final_actions.append(('out', action[1]))
             flow_broadcast['actions'] = final_actions
 
-            if self._check_flow_already_present(flow_broadcast, new_flows) >= 0:
+            flow_key = self._flow_key(flow_broadcast)
+            if flow_key in new_flows_keys:
                 self.logger.debug("Skipping repeated flow '%s'", str(flow_broadcast))
                 continue
 
             new_flows.append(flow_broadcast)
+            new_flows_keys.add(flow_key)
 
         # UNIFY openflow rules with the same input port and vlan and the same output actions
         # These flows differ at the dst_mac; and they are unified by not filtering by dst_mac
@@ -450,15 +534,3 @@ class SdnConnectorOpenFlow(SdnConnectorBase):
             else:  # add all the rules
                 new_flows2 += flow_list
         return new_flows2
-
-    def _check_flow_already_present(self, new_flow, flow_list):
-        '''check if the same flow is already present in the flow list
-        The flow is repeated if all the fields, apart from name, are equal
-        Return the index of matching flow, -1 if not match'''
-        for index, flow in enumerate(flow_list):
-            for f in self.flow_fields:
-                if flow.get(f) != new_flow.get(f):
-                    break
-            else:
-                return index
-        return -1
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+"""
+This module contains unit tests for the openflow rules engine SdnConnectorOpenFlow
+"""
+
+import logging
+import unittest
+from unittest import mock
+
+from osm_ro_plugin.openflow_conn import SdnConnectorOpenFlow, OpenflowConnException
+
+
+def check_flow_already_present(flow_fields, new_flow, flow_list):
+    """Reference implementation, formerly used for looking for an equal flow at the controller rules: a flow is
+    repeated if all the flow_fields are equal. Return the index of matching flow, -1 if not match"""
+    for index, flow in enumerate(flow_list):
+        for f in flow_fields:
+            if flow.get(f) != new_flow.get(f):
+                break
+        else:
+            return index
+    return -1
+
+
+def port(index, vlan=10):
+    return {"uuid": "uuid{}".format(index), "vlan": vlan, "mac": "fa:16:3e:00:00:{:02x}".format(index),
+            "switch_port": "port{}".format(index)}
+
+
+class TestSdnConnectorOpenFlow(unittest.TestCase):
+    def setUp(self):
+        self.rules = {}  # rules at the mocked openflow controller
+        self.of_connector = mock.Mock()
+        self.of_connector.pp2ofi = {"port{}".format(i): i for i in range(4)}
+        self.of_connector.get_of_rules.side_effect = lambda: [dict(rule) for rule in self.rules.values()]
+        self.of_connector.new_flow.side_effect = lambda flow: self.rules.__setitem__(flow["name"], dict(flow))
+        self.of_connector.del_flow.side_effect = lambda name: self.rules.pop(name)
+        self.connector = SdnConnectorOpenFlow(None, None, {}, logging.getLogger("test"), self.of_connector)
+
+    def test_flow_key_same_equality_as_reference(self):
+        flows = [
+            {"priority": 1000, "ingress_port": "port0", "actions": [("vlan", 10), ("out", "port1")], "net_id": "a"},
+            {"priority": 1000, "ingress_port": "port0", "actions": [("vlan", 10), ("out", "port1")], "net_id": "a",
+             "name": "a.0"},
+            {"priority": 1000, "ingress_port": "port0", "actions": (("vlan", 10), ("out", "port1")), "net_id": "a"},
+            {"priority": 1000, "ingress_port": "port0", "actions": [["vlan", 10], ["out", "port1"]], "net_id": "a"},
+            {"priority": 1000, "ingress_port": "port0", "actions": [("vlan", 10), ("out", "port2")], "net_id": "a"},
+            {"priority": 995, "ingress_port": "port0", "actions": [("vlan", 10), ("out", "port1")], "net_id": "a"},
+            {"priority": 1000, "ingress_port": "port0", "actions": [], "net_id": "a", "dst_mac": None},
+            {"priority": 1000, "ingress_port": "port0", "actions": [], "net_id": "a"},
+            {"priority": 1000, "ingress_port": "port0", "actions": {"out": "port1"}, "net_id": "a"},
+        ]
+        for new_flow in flows:
+            for flow in flows:
+                equal = check_flow_already_present(self.connector.flow_fields, new_flow, [flow]) == 0
+                self.assertEqual(self.connector._flow_key(new_flow) == self.connector._flow_key(flow), equal,
+                                 "{} vs {}".format(new_flow, flow))
+
+    def test_freeze_list_and_tuple(self):
+        self.assertNotEqual(self.connector._freeze([("vlan", 1)]), self.connector._freeze((("vlan", 1),)))
+        self.assertNotEqual(self.connector._freeze([("vlan", 1)]), self.connector._freeze([["vlan", 1]]))
+        self.assertEqual(self.connector._freeze([("vlan", 1)]), self.connector._freeze([("vlan", 1)]))
+        self.assertEqual(self.connector._freeze({"a": [1]}), self.connector._freeze({"a": [1]}))
+        hash(self.connector._freeze({"a": [1, (2, [3])]}))
+
+    def test_forget_of_rule(self):
+        flow = {"name": "a.0", "priority": 1000, "ingress_port": "port0", "actions": [("out", "port1")]}
+        self.rules = {"a.0": flow, "a.1": dict(flow, name="a.1")}
+        of_rules = self.connector._get_of_rules()
+        flow_key = self.connector._flow_key(flow)
+        self.assertEqual(of_rules["index"][flow_key], "a.0")
+
+        # the duplicated rule is not the indexed one
+        self.connector._forget_of_rule("a.1")
+        self.assertNotIn("a.1", of_rules["names"])
+        self.assertEqual(of_rules["index"][flow_key], "a.0")
+
+        self.connector._forget_of_rule("a.0")
+        self.assertEqual(of_rules["names"], {})
+        self.assertEqual(of_rules["index"], {})
+        self.connector._forget_of_rule("unknown")
+
+    def test_of_rules_cache_generation(self):
+        self.connector._get_of_rules()
+        self.connector._get_of_rules()
+        self.assertEqual(self.of_connector.get_of_rules.call_count, 1)
+
+        self.connector.invalidate_of_rules()
+        self.connector._get_of_rules()
+        self.assertEqual(self.of_connector.get_of_rules.call_count, 2)
+
+    @mock.patch("osm_ro_plugin.openflow_conn.time")
+    def test_of_rules_cache_ttl(self, mock_time):
+        mock_time.return_value = 1000
+        self.connector._get_of_rules()
+        mock_time.return_value = 1000 + self.connector.of_rules_cache_ttl - 1
+        self.connector._get_of_rules()
+        self.assertEqual(self.of_connector.get_of_rules.call_count, 1)
+
+        mock_time.return_value = 1000 + self.connector.of_rules_cache_ttl
+        self.connector._get_of_rules()
+        self.assertEqual(self.of_connector.get_of_rules.call_count, 2)
+
+    def test_set_openflow_rules_add_and_delete(self):
+        ports = [port(0), port(1), port(2)]
+        created_items = self.connector._set_openflow_rules("ELAN", "net", ports)
+        self.assertEqual(created_items["status"], "ACTIVE")
+        installed = set(created_items["installed_rules_ids"])
+        self.assertEqual(installed, set(self.rules))
+        self.assertEqual(self.of_connector.new_flow.call_count, len(installed))
+
+        # same ports: nothing is inserted nor deleted
+        self.of_connector.new_flow.reset_mock()
+        created_items = self.connector._set_openflow_rules("ELAN", "net", ports, created_items=created_items)
+        self.assertEqual(set(created_items["installed_rules_ids"]), installed)
+        self.of_connector.new_flow.assert_not_called()
+        self.of_connector.del_flow.assert_not_called()
+
+        # remove a port: only the rules of that port are deleted, the rest are kept
+        expected = {self.connector._flow_key(flow) for flow in self.connector._compute_net_flows("net", ports[:2])}
+        created_items = self.connector._set_openflow_rules("ELAN", "net", ports[:2], created_items=created_items)
+        self.assertEqual({self.connector._flow_key(rule) for rule in self.rules.values()}, expected)
+        self.assertEqual(set(created_items["installed_rules_ids"]), set(self.rules))
+        deleted = {call[0][0] for call in self.of_connector.del_flow.call_args_list}
+        self.assertTrue(deleted)
+        self.assertEqual(deleted, installed - set(self.rules))
+        self.assertEqual(self.of_connector.get_of_rules.call_count, 1)  # cached while not invalidated
+
+    def test_set_openflow_rules_new_flow_error(self):
+        self.of_connector.new_flow.side_effect = OpenflowConnException("controller error")
+        generation = self.connector.of_rules_generation
+        created_items = self.connector._set_openflow_rules("ELAN", "net", [port(0), port(1)])
+        self.assertEqual(created_items["installed_rules_ids"], [])
+        self.assertIsNotNone(created_items["error_msg"])
+        self.assertGreater(self.connector.of_rules_generation, generation)
+
+
+if __name__ == "__main__":
+    unittest.main()
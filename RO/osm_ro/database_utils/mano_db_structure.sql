@@ -983,7 +983,7 @@ CREATE TABLE `vim_wim_actions` (
   `item` enum('datacenters_flavors','datacenter_images','instance_nets','instance_vms','instance_interfaces','instance_sfis','instance_sfs','instance_classifications','instance_sfps','instance_wim_nets') NOT NULL COMMENT 'table where the item is stored',
   `item_id` varchar(36) DEFAULT NULL COMMENT 'uuid of the entry in the table',
   `status` enum('SCHEDULED','BUILD','DONE','FAILED','SUPERSEDED','FINISHED') NOT NULL DEFAULT 'SCHEDULED',
-  `extra` text COMMENT 'json with params:, depends_on: for the task',
+  `extra` mediumtext COMMENT 'versioned json (legacy yaml if no version marker) with params:, depends_on: for the task',
   `error_msg` varchar(1024) DEFAULT NULL,
   `created_at` double NOT NULL,
   `modified_at` double DEFAULT NULL,
@@ -1241,7 +1241,8 @@ INSERT INTO `schema_version` VALUES
 (38,'0.38','0.6.11','Adding related to vim_wim_actions','2019-03-07'),
 (39,'0.39','0.6.20','Enlarge vim_id to 300 at all places','2019-05-23'),
 (40,'0.40','6.0.4','Chagnes to SDN ','2019-10-23'),
-(41,'0.41','8.0.0','Removing unique name for wims/wim_accounts','2020-07-16');
+(41,'0.41','8.0.0','Removing unique name for wims/wim_accounts','2020-07-16'),
+(42,'0.42','8.0.0','Versioned json codec for vim_wim_actions extra','2026-10-18');
 /*!40000 ALTER TABLE `schema_version` ENABLE KEYS */;
 UNLOCK TABLES;
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
@@ -36,7 +36,7 @@ QUIET_MODE=""
 BACKUP_DIR=""
 BACKUP_FILE=""
 # TODO update it with the last database version
-LAST_DB_VERSION=41
+LAST_DB_VERSION=42
 
 # Detect paths
 MYSQL=$(which mysql)
@@ -199,6 +199,7 @@ fi
 #[ $OPENMANO_VER_NUM -ge 6020 ] && DB_VERSION=39  #0.6.20 =>  39
 #[ $OPENMANO_VER_NUM -ge 6000004 ] && DB_VERSION=40  #6.0.4 =>  40
 #[ $OPENMANO_VER_NUM -ge 8000000 ] && DB_VERSION=41  #8.0.0 =>  41
+#[ $OPENMANO_VER_NUM -ge 8000000 ] && DB_VERSION=42  #8.0.0 =>  42
 # TODO ... put next versions here
 
 function upgrade_to_1(){
@@ -1525,6 +1526,16 @@ function downgrade_from_41(){
     sql "ALTER TABLE wim_accounts	ADD UNIQUE INDEX wim_name (name);"
     sql "DELETE FROM schema_version WHERE version_int='41';"
 }
+function upgrade_to_42(){
+    echo "      Versioned json codec for 'vim_wim_actions' 'extra'"
+    script="$(find "${DBUTILS}/migrations/up" -iname "42*.sql" | tail -1)"
+    sql "source ${script}"
+}
+function downgrade_from_42(){
+    echo "      Restoring text 'vim_wim_actions' 'extra'"
+    script="$(find "${DBUTILS}/migrations/down" -iname "42*.sql" | tail -1)"
+    sql "source ${script}"
+}
 
 #TODO ... put functions here
 
@@ -0,0 +1,24 @@
+/**
+* Licensed under the Apache License, Version 2.0 (the "License"); you may
+* not use this file except in compliance with the License. You may obtain
+* a copy of the License at
+*
+*         http://www.apache.org/licenses/LICENSE-2.0
+*
+* Unless required by applicable law or agreed to in writing, software
+* distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+* WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+* License for the specific language governing permissions and limitations
+* under the License.
+**/
+--
+-- Restoring the text column for the 'extra' of vim_wim_actions.
+-- Rows encoded with a version marker are kept: the marker is a yaml comment
+-- and json is valid yaml, so they are still readable by former versions.
+--
+
+ALTER TABLE vim_wim_actions
+  MODIFY COLUMN extra TEXT NULL DEFAULT NULL
+    COMMENT 'json with params:, depends_on: for the task';
+
+DELETE FROM schema_version WHERE version_int='42';
@@ -0,0 +1,28 @@
+/**
+* Licensed under the Apache License, Version 2.0 (the "License"); you may
+* not use this file except in compliance with the License. You may obtain
+* a copy of the License at
+*
+*         http://www.apache.org/licenses/LICENSE-2.0
+*
+* Unless required by applicable law or agreed to in writing, software
+* distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+* WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+* License for the specific language governing permissions and limitations
+* under the License.
+**/
+--
+-- The 'extra' of vim_wim_actions is stored with osm_ro/extra_codec.py: a line
+-- with the version marker '#extra:<version>' followed by json. Rows without
+-- marker are legacy yaml, that is read transparently, so there is no need to
+-- convert them; they are encoded again the next time the task is updated.
+-- Enlarged to mediumtext, as vim_info and created_items of some VIMs do not
+-- fit into the 64KB of a text column.
+--
+
+ALTER TABLE vim_wim_actions
+  MODIFY COLUMN extra MEDIUMTEXT NULL DEFAULT NULL
+    COMMENT 'versioned json (legacy yaml if no version marker) with params:, depends_on: for the task';
+
+INSERT INTO schema_version (version_int, version, openmano_ver, comments, date)
+  VALUES (42, '0.42', '8.0.0', 'Versioned json codec for vim_wim_actions extra', '2026-10-18');
@@ -37,7 +37,7 @@ import logging
 import datetime
 from contextlib import contextmanager
 from functools import wraps, partial
-from threading import Lock
+from threading import Lock, Condition, local
 from jsonschema import validate as js_v, exceptions as js_e
 
 from .http_tools import errors as httperrors
@@ -45,6 +45,9 @@ from .utils import Attempt, get_arg, inject_args
 
 
 RECOVERY_TIME = 3
+POOL_IDLE_TIMEOUT = 600  # seconds an unused pooled connection is kept open
+POOL_WAIT_TIMEOUT = 60   # seconds to wait for a free pooled connection before failing
+POOL_WAIT_WARNING = 1    # waits for a pooled connection longer than this are logged as warning
 
 _ATTEMPT = Attempt()
 
@@ -115,6 +118,14 @@ def retry(fn=None, max_attempts=Attempt.MAX, **info):
     return _wrapper
 
 
+def pool_config(config):
+    """Obtain the db_base connection pool arguments from the openmanod configuration
+    :param config: global configuration dictionary, with optional 'db_pool_*' entries
+    :return: dictionary with the pool keyword arguments of db_base
+    """
+    return {"pool_" + k[len("db_pool_"):]: v for k, v in config.items() if k.startswith("db_pool_")}
+
+
 def _check_valid_uuid(uuid):
     id_schema = {"type" : "string", "pattern": "^[a-fA-F0-9]{8}(-[a-fA-F0-9]{4}){3}-[a-fA-F0-9]{12}$"}
     id_schema2 = {"type" : "string", "pattern": "^[a-fA-F0-9]{32}$"}
@@ -212,21 +223,161 @@ class db_base_Exception(httperrors.HttpMappedError):
     def __init__(self, message, http_code=httperrors.Bad_Request):
         super(db_base_Exception, self).__init__(message, http_code)
 
+class ConnectionPool():
+    """Pool of database connections shared by several threads.
+    Connections are created on demand up to max_size. Connections not used for idle_timeout seconds are closed.
+    When all connections are in use, callers wait up to wait_timeout seconds for a free one.
+    Wait times are accumulated at self.metrics
+    """
+
+    def __init__(self, connect, max_size, idle_timeout=POOL_IDLE_TIMEOUT, wait_timeout=POOL_WAIT_TIMEOUT,
+                 wait_warning=POOL_WAIT_WARNING, logger=None):
+        """
+        :param connect: callable without arguments that returns a new connection
+        :param max_size: maximum number of simultaneous open connections
+        :param idle_timeout: seconds a released connection is kept before closing it
+        :param wait_timeout: seconds to wait for a free connection before raising an exception
+        :param wait_warning: waits longer than this seconds are logged as warning
+        :param logger: logger to use
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.wait_warning = wait_warning
+        self.logger = logger or logging.getLogger('db')
+        self._idle = []  # list of (connection, released_at). The last one is the most recently used
+        self._size = 0  # number of open connections, both idle and in use
+        self._cond = Condition()
+        self.metrics = {"checkouts": 0, "waits": 0, "wait_time": 0.0, "max_wait_time": 0.0, "created": 0,
+                        "reaped": 0, "discarded": 0}
+
+    def _reap(self, now):
+        """Close connections idle for more than idle_timeout. Must be called with self._cond acquired"""
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            con, _ = self._idle.pop(0)
+            self._size -= 1
+            self.metrics["reaped"] += 1
+            self._close(con)
+
+    def _close(self, con):
+        try:
+            con.close()
+        except mdb.Error as e:
+            self.logger.debug("while closing pooled connection: %s", e)
+
+    def get(self):
+        """Check out a connection. It must be returned with put"""
+        start = time.time()
+        with self._cond:
+            self._reap(start)
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                waited = True
+                remaining = start + self.wait_timeout - time.time()
+                if remaining <= 0:
+                    raise db_base_Exception("Timeout waiting for a free database connection after {}s; {} "
+                                            "connections in use".format(self.wait_timeout, self._size),
+                                            httperrors.Service_Unavailable)
+                self._cond.wait(remaining)
+            con = self._idle.pop()[0] if self._idle else None
+            if not con:
+                self._size += 1  # reserve the slot before connecting outside the lock
+            self.metrics["checkouts"] += 1
+            if waited:
+                wait_time = time.time() - start
+                self.metrics["waits"] += 1
+                self.metrics["wait_time"] += wait_time
+                self.metrics["max_wait_time"] = max(self.metrics["max_wait_time"], wait_time)
+                if wait_time > self.wait_warning:
+                    self.logger.warning("DB pool: waited %.3fs for a free connection; metrics=%s", wait_time,
+                                        self.metrics)
+        if con:
+            return con
+        try:
+            con = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.metrics["created"] += 1
+        return con
+
+    def put(self, con, discard=False):
+        """Return a connection obtained with get.
+        :param discard: close the connection instead of keeping it, e.g. because it is broken
+        """
+        now = time.time()
+        with self._cond:
+            if discard:
+                self._size -= 1
+                self.metrics["discarded"] += 1
+            else:
+                self._idle.append((con, now))
+            self._reap(now)
+            self._cond.notify()
+        if discard:
+            self._close(con)
+
+    def close(self):
+        """Close all idle connections. Connections in use are closed when returned"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for con, _ in idle:
+            self._close(con)
+
+
 class db_base():
     tables_with_created_field=()
 
     def __init__(self, host=None, user=None, passwd=None, database=None,
-                 log_name='db', log_level=None, lock=None):
+                 log_name='db', log_level=None, lock=None, pool_size=None, pool_idle_timeout=POOL_IDLE_TIMEOUT,
+                 pool_wait_timeout=POOL_WAIT_TIMEOUT, pool_wait_warning=POOL_WAIT_WARNING):
+        """
+        :param lock: lock that serializes transactions over the shared connection. Not used when pooling
+        :param pool_size: if greater than 1, transactions run over a pool of this number of connections, so that
+            several threads can work in parallel. Otherwise a single connection is shared behind lock
+        :param pool_idle_timeout, pool_wait_timeout, pool_wait_warning: see ConnectionPool
+        """
         self.host = host
         self.user = user
         self.passwd = passwd
         self.database = database
+        self._local = local()  # per thread connection and cursor of the ongoing transaction
         self.con = None
         self.log_level=log_level
         self.logger = logging.getLogger(log_name)
         if self.log_level:
             self.logger.setLevel( getattr(logging, log_level) )
         self.lock = lock or Lock()
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_wait_timeout = pool_wait_timeout
+        self.pool_wait_warning = pool_wait_warning
+        self.pool = None
+
+    @property
+    def con(self):
+        """Connection of the ongoing transaction of this thread if pooling, or the shared connection otherwise"""
+        return getattr(self._local, "con", None) or self._con
+
+    @con.setter
+    def con(self, value):
+        self._con = value
+
+    @property
+    def cur(self):
+        return getattr(self._local, "cur", None)
+
+    @cur.setter
+    def cur(self, value):
+        self._local.cur = value
+
+    def _new_connection(self):
+        return mdb.connect(self.host, self.user, self.passwd, self.database)
 
     def connect(self, host=None, user=None, passwd=None, database=None):
         '''Connect to specific data base.
@@ -239,8 +390,12 @@ class db_base():
             if passwd:      self.passwd = passwd
             if database:    self.database = database
 
-            self.con = mdb.connect(self.host, self.user, self.passwd, self.database)
+            self.con = self._new_connection()
             self.logger.debug("DB: connected to '%s' at '%s@%s'", self.database, self.user, self.host)
+            if self.pool_size and self.pool_size > 1 and not self.pool:
+                self.pool = ConnectionPool(self._new_connection, self.pool_size, idle_timeout=self.pool_idle_timeout,
+                                           wait_timeout=self.pool_wait_timeout, wait_warning=self.pool_wait_warning,
+                                           logger=self.logger)
         except mdb.Error as e:
             raise db_base_Exception("Cannot connect to DataBase '{}' at '{}@{}' Error {}: {}".format(
                                     self.database, self.user, self.host, e.args[0], e.args[1]),
@@ -272,6 +427,9 @@ class db_base():
 
     def disconnect(self):
         '''disconnect from specific data base'''
+        if self.pool:
+            self.pool.close()
+            self.pool = None
         try:
             self.con.close()
             self.con = None
@@ -307,7 +465,11 @@ class db_base():
             database=self.database,
             log_name=self.logger.name,
             log_level=self.log_level,
-            lock=Lock()
+            lock=Lock(),
+            pool_size=self.pool_size,
+            pool_idle_timeout=self.pool_idle_timeout,
+            pool_wait_timeout=self.pool_wait_timeout,
+            pool_wait_warning=self.pool_wait_warning,
         )
 
         obj.connect()
@@ -320,7 +482,9 @@ class db_base():
         automatically rolled back in case of error.
 
         This implementation also adds a lock, so threads sharing the same
-        connection object are synchronized.
+        connection object are synchronized. If a connection pool is in use,
+        a connection is checked out for the whole transaction instead, so
+        threads are not serialized.
 
         Arguments:
             cursor_type: default: MySQLdb.cursors.DictCursor
@@ -336,6 +500,30 @@ class db_base():
         # API for the connection object.
         # This support was removed in version 1.40
         # https://github.com/PyMySQL/mysqlclient-python/blob/master/HISTORY.rst#whats-new-in-140
+        if self.pool:
+            con = self.pool.get()
+            self._local.con = con
+            broken = False
+            try:
+                if con.get_autocommit():
+                    con.query("BEGIN")
+
+                self.cur = con.cursor(cursor_type)
+                yield self.cur
+            except mdb.OperationalError:
+                # lost connection or similar, do not give it back to the pool
+                broken = True
+                raise
+            except:  # noqa
+                con.rollback()
+                raise
+            else:
+                con.commit()
+            finally:
+                self._local.con = None
+                self.pool.put(con, discard=broken)
+            return
+
         with self.lock:
             try:
                 if self.con.get_autocommit():
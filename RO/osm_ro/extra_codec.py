@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+"""
+Codec for the 'extra' column of the vim_wim_actions table.
+
+It used to be stored as YAML, whose parsing is one of the main costs of the vim threads. Now it is stored as JSON,
+preceded by a line with a version marker:
+
+    #extra:1
+    {"params": ..., "depends_on": [...]}
+
+As the marker is a YAML comment and JSON is valid YAML, these rows can still be read by former versions that parse
+the column as YAML. Rows without marker are decoded as YAML, so legacy rows are read transparently. Values that
+cannot be represented in JSON without changes (non string keys, dates, ...) keep being stored as YAML.
+"""
+
+import json
+
+import yaml
+
+__author__ = "Alfonso Tierno"
+
+VERSION = 1
+MARKER = "#extra:{}\n".format(VERSION)
+
+try:
+    _YamlLoader = yaml.CSafeLoader
+except AttributeError:  # pyyaml without libyaml
+    _YamlLoader = yaml.SafeLoader
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _is_json_safe(value):
+    """Check that value is kept unchanged after a JSON encode/decode. Tuples are accepted, as YAML also converts them
+    into lists"""
+    if isinstance(value, _JSON_SCALARS):
+        return True
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_json_safe(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return all(_is_json_safe(v) for v in value)
+    return False
+
+
+def encode_extra(value):
+    """
+    Encode the content of an 'extra' column for storing at database
+    :param value: content, normally a dictionary
+    :return: text
+    """
+    if _is_json_safe(value):
+        return MARKER + json.dumps(value, separators=(",", ":"))
+    return yaml.safe_dump(value, default_flow_style=True, width=256)
+
+
+def decode_extra(text):
+    """
+    Decode the content of an 'extra' column read from database, either encoded with encode_extra or legacy YAML
+    :param text: text read from database
+    :return: decoded content. None if text is empty
+    """
+    if not text:
+        return None
+    if text.startswith(MARKER):
+        return json.loads(text[len(MARKER):])
+    if text.startswith("#extra:"):
+        raise ValueError("Unknown 'extra' format version '{}'".format(text[7:text.find("\n")]))
+    return yaml.load(text, Loader=_YamlLoader)
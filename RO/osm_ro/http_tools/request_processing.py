@@ -21,17 +21,78 @@ __author__ = "Alfonso Tierno, Gerardo Garcia"
 
 import json
 import logging
+import random
+from threading import Lock
 
 import bottle
 import yaml
 from jsonschema import exceptions as js_e
-from jsonschema import validate as js_v
+from jsonschema.validators import validator_for
 
 from . import errors as httperrors
 from io import TextIOWrapper
 
 logger = logging.getLogger('openmano.http')
 
+_validators = {}  # id(schema): (schema, validator). The schema is kept to detect a reused id
+_validators_lock = Lock()
+payload_log_sample = 1.0  # fraction of the request payloads that are logged, from 0 (none) to 1 (all)
+
+
+def get_validator(schema):
+    """
+    Obtain the json schema validator of a schema. The schema is checked and
+    its validator compiled only the first time, next calls reuse it
+    :param schema: json schema
+    :return: jsonschema validator instance
+    """
+    cached = _validators.get(id(schema))
+    if cached and cached[0] is schema:
+        return cached[1]
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema)
+    with _validators_lock:
+        _validators[id(schema)] = (schema, validator)
+    return validator
+
+
+def compile_schemas(schemas):
+    """
+    Compile at once the validators of several schemas, so that requests do not pay for it
+    :param schemas: iterable of json schemas
+    :return: None
+    """
+    for schema in schemas:
+        get_validator(schema)
+
+
+def validate(data, schema):
+    """
+    Same as jsonschema.validate, but using the cached validator of the schema
+    :param data: data to validate
+    :param schema: json schema
+    :return: None. It raises jsonschema.exceptions.ValidationError if data is not valid
+    """
+    error = js_e.best_match(get_validator(schema).iter_errors(data))
+    if error is not None:
+        raise error
+
+
+class _PayloadDump(object):
+    """Yaml dump of a payload for the log, that is only done if the log record is emitted"""
+
+    def __init__(self, data, confidential_data=False):
+        self.data = data
+        self.confidential_data = confidential_data
+
+    def __str__(self):
+        text = yaml.safe_dump(self.data, explicit_start=True, indent=4, default_flow_style=False, tags=False,
+                              allow_unicode=True)
+        if self.confidential_data:
+            text = remove_clear_passwd(text)
+        return text
+
 
 def remove_clear_passwd(data):
     """
@@ -78,7 +139,7 @@ def format_out(data):
     '''Return string of dictionary data according to requested json, yaml, xml.
     By default json
     '''
-    logger.debug("OUT: " + yaml.safe_dump(data, explicit_start=True, indent=4, default_flow_style=False, tags=False, allow_unicode=True) )
+    logger.debug("OUT: %s", _PayloadDump(data))
     accept = bottle.request.headers.get('Accept')
     if accept and 'application/yaml' in accept:
         bottle.response.content_type='application/yaml'
@@ -130,12 +191,8 @@ def format_in(default_schema, version_fields=None, version_dict_schema=None, con
         # if client_data == None:
         #    bottle.abort(httperrors.Bad_Request, "Content error, empty")
         #    return
-        if confidential_data:
-            logger.info('IN: %s', remove_clear_passwd (yaml.safe_dump(client_data, explicit_start=True, indent=4, default_flow_style=False,
-                                              tags=False, allow_unicode=True)))
-        else:
-            logger.info('IN: %s', yaml.safe_dump(client_data, explicit_start=True, indent=4, default_flow_style=False,
-                                              tags=False, allow_unicode=True) )
+        if payload_log_sample >= 1 or random.random() < payload_log_sample:
+            logger.info('IN: %s', _PayloadDump(client_data, confidential_data))
         # look for the client provider version
         error_text = "Invalid content "
         if not default_schema and not version_fields:
@@ -160,7 +217,7 @@ def format_in(default_schema, version_fields=None, version_dict_schema=None, con
         if used_schema==None:
             bottle.abort(httperrors.Bad_Request, "Invalid schema version or missing version field")
 
-        js_v(client_data, used_schema)
+        validate(client_data, used_schema)
         return client_data, used_schema
     except (TypeError, ValueError, yaml.YAMLError) as exc:
         error_text += str(exc)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+"""WSGI servers that can be used by bottle to serve the openmano API.
+
+The default bottle server (``wsgiref``) attends one request at a time, so a
+slow request blocks every other client. ``ThreadPoolServer`` attends each
+connection in a thread taken from a bounded pool and optionally keeps HTTP/1.1
+connections alive between requests. While all the threads are busy new
+connections are not accepted, so they wait at the listen backlog.
+
+Example::
+
+    bottle.run(server=ThreadPoolServer, host=host, port=port, workers=20,
+               backlog=128, keepalive=True, keepalive_timeout=5)
+"""
+
+import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from http.server import BaseHTTPRequestHandler
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+from bottle import ServerAdapter
+
+WORKERS = 20  # threads attending connections
+BACKLOG = 128  # pending connections queued by the kernel while all the workers are busy
+KEEPALIVE_TIMEOUT = 5  # seconds an idle keep-alive connection is kept open
+
+logger = logging.getLogger('openmano.http')
+
+
+class _ServerHandler(ServerHandler):
+    def cleanup_headers(self):
+        ServerHandler.cleanup_headers(self)
+        request_handler = self.request_handler
+        # without a known length the end of the response is marked by closing the connection
+        if 'Content-Length' not in self.headers:
+            request_handler.close_connection = True
+        if request_handler.close_connection and self.http_version == "1.1":
+            self.headers['Connection'] = 'close'
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """Request handler that, as BaseHTTPRequestHandler does, attends several
+    requests over the same connection when keep-alive is in use"""
+    quiet = False
+    wbufsize = -1  # buffered, so that headers and body are sent together
+    disable_nagle_algorithm = True  # do not delay responses on kept-alive connections
+
+    def handle(self):
+        BaseHTTPRequestHandler.handle(self)
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except socket.timeout:
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            self.close_connection = True
+            return
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if not self.parse_request():
+            return
+        # the application can leave unread part of the body, that cannot be mistaken as the next request
+        if self.headers.get('Transfer-Encoding') or self.headers.get('Content-Length', '0') != '0':
+            self.close_connection = True
+
+        handler = _ServerHandler(self.rfile, self.wfile, self.get_stderr(), self.get_environ(), multithread=True)
+        handler.request_handler = self
+        if self.protocol_version >= "HTTP/1.1" and self.request_version >= "HTTP/1.1":
+            handler.http_version = "1.1"
+        handler.run(self.server.get_app())
+        self.wfile.flush()
+
+    def log_request(self, *args, **kwargs):
+        if not self.quiet:
+            WSGIRequestHandler.log_request(self, *args, **kwargs)
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """WSGIServer that attends the connections with a pool of threads. While all the threads are busy, the accepted
+    connection waits for a free one and the next connections wait at the listen backlog"""
+
+    def __init__(self, server_address, handler_class, workers=WORKERS, backlog=BACKLOG):
+        self.request_queue_size = backlog
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http-worker")
+        self.free_workers = BoundedSemaphore(workers)
+        WSGIServer.__init__(self, server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        # wait for a free worker, so that the next connections are kept at the listen backlog instead of being
+        # accepted and queued without limit
+        self.free_workers.acquire()
+        try:
+            self.executor.submit(self._process_request_thread, request, client_address)
+        except Exception:
+            self.free_workers.release()
+            raise
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.free_workers.release()
+
+    def server_close(self):
+        WSGIServer.server_close(self)
+        self.executor.shutdown(wait=False)
+
+
+class ThreadPoolServer(ServerAdapter):
+    """bottle server adapter for ThreadPoolWSGIServer.
+    Options: workers, backlog, keepalive (boolean) and keepalive_timeout (seconds)
+    """
+
+    def run(self, app):
+        options = self.options
+        handler_attrs = {
+            "quiet": self.quiet,
+            "protocol_version": "HTTP/1.1" if options.get("keepalive", True) else "HTTP/1.0",
+            "timeout": options.get("keepalive_timeout", KEEPALIVE_TIMEOUT),
+        }
+        handler_class = type("RequestHandler", (_RequestHandler,), handler_attrs)
+        workers = options.get("workers", WORKERS)
+        srv = ThreadPoolWSGIServer((self.host, self.port), handler_class, workers=workers,
+                                   backlog=options.get("backlog", BACKLOG))
+        srv.set_app(app)
+        self.srv = srv
+        self.port = srv.server_port
+        logger.info("HTTP server listening at %s:%s with %s workers", self.host, self.port, workers)
+        try:
+            srv.serve_forever()
+        finally:
+            srv.server_close()
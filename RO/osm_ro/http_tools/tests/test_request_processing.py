@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+import unittest
+
+from jsonschema import exceptions as js_e
+from jsonschema import validate as js_v
+from mock import patch
+
+from .. import request_processing
+from ..request_processing import _PayloadDump, get_validator, validate
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "vnfs": {"type": "array", "items": {"type": "object", "properties": {"count": {"type": "integer"}}}},
+    },
+    "required": ["name"],
+}
+
+
+class TestValidate(unittest.TestCase):
+    def test_validator_is_compiled_once(self):
+        with patch.object(request_processing, 'validator_for', wraps=request_processing.validator_for) as mock:
+            schema = dict(SCHEMA)
+            validator = get_validator(schema)
+            self.assertIs(get_validator(schema), validator)
+            self.assertEqual(mock.call_count, 1)
+
+    def test_valid_data(self):
+        validate({"name": "ns", "vnfs": [{"count": 1}]}, SCHEMA)
+
+    def test_same_error_as_jsonschema(self):
+        data = {"name": "ns", "vnfs": [{"count": "one"}]}
+        with self.assertRaises(js_e.ValidationError) as expected:
+            js_v(data, SCHEMA)
+        with self.assertRaises(js_e.ValidationError) as obtained:
+            validate(data, SCHEMA)
+        self.assertEqual(obtained.exception.message, expected.exception.message)
+        self.assertEqual(list(obtained.exception.path), ["vnfs", 0, "count"])
+
+
+class TestPayloadDump(unittest.TestCase):
+    def test_dump_is_lazy(self):
+        # the payload is not serialized when the log record is discarded
+        with patch.object(request_processing.yaml, 'safe_dump') as mock, \
+                patch.object(request_processing.logger, 'isEnabledFor', return_value=False):
+            request_processing.logger.info('IN: %s', _PayloadDump({"a": 1}))
+        mock.assert_not_called()
+
+    def test_confidential_data(self):
+        text = str(_PayloadDump({"name": "vim", "password": "secret"}, confidential_data=True))
+        self.assertIn("name: vim", text)
+        self.assertNotIn("secret", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+import time
+import unittest
+from http.client import HTTPConnection
+from threading import Event, Thread
+
+from bottle import Bottle, request
+
+from ..server import ThreadPoolServer
+
+
+class TestThreadPoolServer(unittest.TestCase):
+    def setUp(self):
+        self.release = Event()
+        app = Bottle()
+
+        @app.get('/slow')
+        def _slow():
+            self.release.wait(5)
+            return 'slow'
+
+        @app.get('/fast')
+        def _fast():
+            return 'fast'
+
+        @app.post('/ignore_body')
+        def _ignore_body():
+            return 'ignored'
+
+        @app.get('/connection')
+        def _connection():
+            # the input stream is the same for all the requests of a connection
+            return str(id(request.environ['wsgi.input']))
+
+        self.app = app
+        self.adapter = self._start(workers=4)
+        self.addCleanup(self.release.set)
+
+    def _start(self, workers):
+        adapter = ThreadPoolServer(host='127.0.0.1', port=0, workers=workers)
+        adapter.quiet = True
+        Thread(target=adapter.run, args=(self.app,), daemon=True).start()
+        while not getattr(adapter, 'srv', None):
+            time.sleep(0.01)
+        self.addCleanup(adapter.srv.shutdown)
+        return adapter
+
+    def _connect(self, adapter=None):
+        return HTTPConnection('127.0.0.1', (adapter or self.adapter).port, timeout=5)
+
+    def test_slow_request_does_not_block_others(self):
+        slow = self._connect()
+        slow.request('GET', '/slow')
+        fast = self._connect()
+        fast.request('GET', '/fast')
+        self.assertEqual(fast.getresponse().read(), b'fast')
+        self.release.set()
+        self.assertEqual(slow.getresponse().read(), b'slow')
+
+    def test_connections_wait_for_free_worker(self):
+        adapter = self._start(workers=1)
+        slow = self._connect(adapter)
+        slow.request('GET', '/slow')
+        waiting = []
+        for _ in range(3):
+            con = self._connect(adapter)
+            con.request('GET', '/fast')
+            waiting.append(con)
+        time.sleep(0.2)
+        # they are not queued at the executor, but at the listen backlog
+        self.assertEqual(adapter.srv.executor._work_queue.qsize(), 0)
+        self.release.set()
+        self.assertEqual(slow.getresponse().read(), b'slow')
+        slow.close()  # otherwise the worker is kept by the keep-alive connection
+        for con in waiting:
+            self.assertEqual(con.getresponse().read(), b'fast')
+            con.close()
+
+    def test_keepalive(self):
+        con = self._connect()
+        connections = set()
+        for _ in range(3):
+            con.request('GET', '/connection')
+            response = con.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertFalse(response.will_close)
+            connections.add(response.read())
+        self.assertEqual(len(connections), 1)
+
+    def test_connection_closed_after_request_body(self):
+        con = self._connect()
+        con.request('POST', '/ignore_body', body=b'{"unread": "body"}')
+        response = con.getresponse()
+        self.assertEqual(response.read(), b'ignored')
+        self.assertTrue(response.will_close)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -43,7 +43,9 @@ from osm_ro.openmano_schemas import vnfd_schema_v01, vnfd_schema_v02, \
                             sdn_port_mapping_schema, sdn_external_port_schema
 
 from .http_tools import errors as httperrors
+from .http_tools.server import ThreadPoolServer
 from .http_tools.request_processing import (
+    compile_schemas,
     format_out,
     format_in,
     filter_query_string
@@ -61,6 +63,14 @@ global logger
 url_base="/openmano"
 logger = None
 
+# schemas of the request payloads, compiled once when the server is created
+request_schemas = (vnfd_schema_v01, vnfd_schema_v02, nsd_schema_v01, nsd_schema_v02, nsd_schema_v03,
+                   scenario_edit_schema, scenario_action_schema, instance_scenario_action_schema,
+                   instance_scenario_create_schema_v01, tenant_schema, tenant_edit_schema, datacenter_schema,
+                   datacenter_edit_schema, datacenter_action_schema, datacenter_associate_schema, object_schema,
+                   netmap_new_schema, netmap_edit_schema, sdn_controller_schema, sdn_controller_edit_schema,
+                   sdn_port_mapping_schema, sdn_external_port_schema)
+
 
 def log_to_logger(fn):
     '''
@@ -80,7 +90,13 @@ def log_to_logger(fn):
 
 class httpserver(threading.Thread):
     def __init__(self, db, admin=False, host='localhost', port=9090,
-                 wim_persistence=None, wim_engine=None):
+                 wim_persistence=None, wim_engine=None, server="threadpool", server_options=None):
+        '''
+        :param server: WSGI server to use. "threadpool" for the ThreadPoolServer at http_tools.server, or any other
+            server name known by bottle, e.g. "wsgiref" for its single threaded default server
+        :param server_options: dictionary with options for the "threadpool" server: workers, backlog,
+            keepalive and keepalive_timeout. Ignored for other servers
+        '''
         #global url_base
         global mydb
         global logger
@@ -90,6 +106,9 @@ class httpserver(threading.Thread):
         threading.Thread.__init__(self)
         self.host = host
         self.port = port   #Port where the listen service must be started
+        self.server = ThreadPoolServer if server == "threadpool" else server
+        # options are only known by ThreadPoolServer, other bottle adapters may fail with unknown arguments
+        self.server_options = (server_options or {}) if server == "threadpool" else {}
         if admin==True:
             self.name = "http_admin"
         else:
@@ -103,6 +122,7 @@ class httpserver(threading.Thread):
         self.handlers = [
             WimHandler(db, wim_persistence, wim_engine, url_base)
         ]
+        compile_schemas(request_schemas)
 
         self.daemon = True
         self.setDaemon(True)
@@ -114,7 +134,8 @@ class httpserver(threading.Thread):
         for handler in self.handlers:
             default_app.merge(handler.wsgi_app)
 
-        bottle.run(host=self.host, port=self.port, debug=debug, quiet=quiet)
+        bottle.run(server=self.server, host=self.host, port=self.port, debug=debug, quiet=quiet,
+                   **self.server_options)
 
 
 def run_bottle(db, host_='localhost', port_=9090):
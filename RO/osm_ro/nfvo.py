@@ -44,7 +44,8 @@ import logging
 import collections
 import math
 from uuid import uuid4
-from osm_ro.db_base import db_base_Exception
+from osm_ro.db_base import db_base_Exception, pool_config
+from osm_ro.extra_codec import decode_extra, encode_extra
 
 from osm_ro import nfvo_db
 from threading import Lock
@@ -184,7 +185,7 @@ def get_non_used_wim_name(wim_name, wim_id, tenant_name, tenant_id):
 
 def start_service(mydb, persistence=None, wim=None):
     global db, global_config, plugins, ovim, worker_id
-    db = nfvo_db.nfvo_db(lock=db_lock)
+    db = nfvo_db.nfvo_db(lock=db_lock, **pool_config(global_config))
     mydb.lock = db_lock
     db.connect(global_config['db_host'], global_config['db_user'], global_config['db_passwd'], global_config['db_name'])
 
@@ -3503,7 +3504,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                         "item": "instance_wim_nets",
                         "item_id": sdn_net_id,
                         "related": related_network,
-                        "extra": yaml.safe_dump(task_wim_extra, default_flow_style=True, width=256)
+                        "extra": encode_extra(task_wim_extra)
                     }
                     task_index += 1
                     db_vim_actions.append(db_vim_action)
@@ -3531,7 +3532,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                     "item": "instance_nets",
                     "item_id": net_uuid,
                     "related": related_network,
-                    "extra": yaml.safe_dump(task_extra, default_flow_style=True, width=256)
+                    "extra": encode_extra(task_extra)
                 }
                 net2task_id['scenario'][sce_net_uuid][datacenter_id] = task_index
                 task_index += 1
@@ -3630,8 +3631,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                             "item": "instance_sfis",
                             "item_id": sfi_uuid,
                             "related": sfi_uuid,
-                            "extra": yaml.safe_dump({"params": extra_params, "depends_on": [dependencies[i]]},
-                                                    default_flow_style=True, width=256)
+                            "extra": encode_extra({"params": extra_params, "depends_on": [dependencies[i]]})
                         }
                         sfis_created.append(task_index)
                         task_index += 1
@@ -3658,8 +3658,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                         "item": "instance_sfs",
                         "item_id": sf_uuid,
                         "related": sf_uuid,
-                        "extra": yaml.safe_dump({"params": "", "depends_on": sfis_created},
-                                                default_flow_style=True, width=256)
+                        "extra": encode_extra({"params": "", "depends_on": sfis_created})
                     }
                     sfs_created.append(task_index)
                     task_index += 1
@@ -3713,8 +3712,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                             "item": "instance_classifications",
                             "item_id": classification_uuid,
                             "related": classification_uuid,
-                            "extra": yaml.safe_dump({"params": classification_params, "depends_on": [dependencies[i]]},
-                                                    default_flow_style=True, width=256)
+                            "extra": encode_extra({"params": classification_params, "depends_on": [dependencies[i]]})
                         }
                         classifications_created.append(task_index)
                         task_index += 1
@@ -3742,8 +3740,7 @@ def create_instance(mydb, tenant_id, instance_dict):
                     "item": "instance_sfps",
                     "item_id": sfp_uuid,
                     "related": sfp_uuid,
-                    "extra": yaml.safe_dump({"params": "", "depends_on": sfs_created + classifications_created},
-                                            default_flow_style=True, width=256)
+                    "extra": encode_extra({"params": "", "depends_on": sfs_created + classifications_created})
                 }
                 task_index += 1
                 db_vim_actions.append(db_vim_action)
@@ -3918,7 +3915,7 @@ def instantiate_vnf(mydb, sce_vnf, params, params_out, rollbackList):
                 "item": "instance_wim_nets",
                 "item_id": sdn_net_id,
                 "related": net_uuid,
-                "extra": yaml.safe_dump(task_wim_extra, default_flow_style=True, width=256)
+                "extra": encode_extra(task_wim_extra)
             }
             task_index += 1
             db_vim_actions.append(db_vim_action)
@@ -3931,7 +3928,7 @@ def instantiate_vnf(mydb, sce_vnf, params, params_out, rollbackList):
             "item": "instance_nets",
             "item_id": net_uuid,
             "related": net_uuid,
-            "extra": yaml.safe_dump(task_extra, default_flow_style=True, width=256)
+            "extra": encode_extra(task_extra)
         }
         net2task_id[sce_vnf['uuid']][net['uuid']] = task_index
         task_index += 1
@@ -4216,8 +4213,7 @@ def instantiate_vnf(mydb, sce_vnf, params, params_out, rollbackList):
                 "item": "instance_vms",
                 "item_id": vm_uuid,
                 "related": vm_uuid,
-                "extra": yaml.safe_dump({"params": task_params, "depends_on": task_depends_on},
-                                        default_flow_style=True, width=256)
+                "extra": encode_extra({"params": task_params, "depends_on": task_depends_on})
             }
             task_index += 1
             db_vim_actions.append(db_vim_action)
@@ -4294,7 +4290,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_sfps",
             "item_id": sfp["uuid"],
             "related": sfp["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4335,7 +4331,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_classifications",
             "item_id": classification["uuid"],
             "related": classification["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4374,7 +4370,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_sfs",
             "item_id": sf["uuid"],
             "related": sf["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4413,7 +4409,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_sfis",
             "item_id": sfi["uuid"],
             "related": sfi["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4455,8 +4451,7 @@ def delete_instance(mydb, tenant_id, instance_id):
                 "item": "instance_vms",
                 "item_id": vm["uuid"],
                 "related": vm["related"],
-                "extra": yaml.safe_dump({"params": vm["interfaces"], "depends_on": sfi_dependencies},
-                                        default_flow_style=True, width=256)
+                "extra": encode_extra({"params": vm["interfaces"], "depends_on": sfi_dependencies})
             }
             db_vim_actions.append(db_vim_action)
             for interface in vm["interfaces"]:
@@ -4510,7 +4505,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_nets",
             "item_id": net["uuid"],
             "related": net["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4527,7 +4522,7 @@ def delete_instance(mydb, tenant_id, instance_id):
             "item": "instance_wim_nets",
             "item_id": sdn_net["uuid"],
             "related": sdn_net["related"],
-            "extra": yaml.safe_dump(extra, default_flow_style=True, width=256)
+            "extra": encode_extra(extra)
         }
         task_index += 1
         db_vim_actions.append(db_vim_action)
@@ -4829,8 +4824,7 @@ def instance_action(mydb,nfvo_tenant,instance_id, action_dict):
                         "item": "instance_vms",
                         "item_id": vdu_id,
                         "related": target_vm["related"],
-                        "extra": yaml.safe_dump({"params": vm_interfaces},
-                                                default_flow_style=True, width=256)
+                        "extra": encode_extra({"params": vm_interfaces})
                     }
                     # get affected instance_interfaces (deleted on cascade) to check if a wim_network must be updated
                     deleted_interfaces = mydb.get_rows(
@@ -4856,7 +4850,7 @@ def instance_action(mydb,nfvo_tenant,instance_id, action_dict):
                 if not vim_action_to_clone:
                     raise NfvoException("Cannot find the vim_action at database with {}".format(where), httperrors.Internal_Server_Error)
                 vim_action_to_clone = vim_action_to_clone[0]
-                extra = yaml.safe_load(vim_action_to_clone["extra"])
+                extra = decode_extra(vim_action_to_clone["extra"])
 
                 # generate a new depends_on. Convert format TASK-Y into new format TASK-ACTION-XXXX.XXXX.Y
                 # TODO do the same for flavor and image when available
@@ -4941,7 +4935,7 @@ def instance_action(mydb,nfvo_tenant,instance_id, action_dict):
                         # TODO examinar parametros, quitar MAC o incrementar. Incrementar IP y colocar las dependencias con ACTION-asdfasd.
                         # ALF
                         # ALF
-                        "extra": yaml.safe_dump({"params": task_params_copy, "depends_on": task_depends_on}, default_flow_style=True, width=256)
+                        "extra": encode_extra({"params": task_params_copy, "depends_on": task_depends_on})
                     }
                     task_index += 1
                     db_vim_actions.append(db_vim_action)
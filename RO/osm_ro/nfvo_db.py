@@ -956,6 +956,35 @@ class nfvo_db(db_base.db_base):
         self.logger.debug(cmd)
         self.cur.execute(cmd)
         instance_dict['vnfs'] = self.cur.fetchall()
+        vnf_ids = [vnf['uuid'] for vnf in instance_dict['vnfs']]
+
+        # instance vms of all the vnfs at once
+        vms_by_vnf = {vnf_id: [] for vnf_id in vnf_ids}
+        if vnf_ids:
+            cmd = "SELECT iv.uuid as uuid, vim_vm_id, status, error_msg, vim_info, iv.created_at as "\
+                    "created_at, name, vms.osm_id as vdu_osm_id, vim_name, vms.uuid as vm_uuid, related, "\
+                    "instance_vnf_id FROM instance_vms as iv join vms on iv.vm_id=vms.uuid "\
+                    " WHERE instance_vnf_id IN ({}) ORDER BY iv.created_at".format(
+                        ",".join("'{}'".format(vnf_id) for vnf_id in vnf_ids))
+            self.logger.debug(cmd)
+            self.cur.execute(cmd)
+            for vm in self.cur.fetchall():
+                vms_by_vnf[vm.pop("instance_vnf_id")].append(vm)
+        vm_ids = [vm['uuid'] for vms in vms_by_vnf.values() for vm in vms]
+
+        # instance_interfaces of all the vms at once
+        interfaces_by_vm = {vm_id: [] for vm_id in vm_ids}
+        if vm_ids:
+            cmd = "SELECT vim_interface_id, instance_net_id, internal_name,external_name, mac_address,"\
+                    " ii.ip_address as ip_address, vim_info, i.type as type, sdn_port_id, i.uuid, instance_vm_id"\
+                    " FROM instance_interfaces as ii join interfaces as i on ii.interface_id=i.uuid"\
+                    " WHERE instance_vm_id IN ({}) ORDER BY i.created_at".format(
+                        ",".join("'{}'".format(vm_id) for vm_id in vm_ids))
+            self.logger.debug(cmd)
+            self.cur.execute(cmd)
+            for iface in self.cur.fetchall():
+                interfaces_by_vm[iface.pop("instance_vm_id")].append(iface)
+
         for vnf in instance_dict['vnfs']:
             vnf["ip_address"] = None
             vnf_mgmt_access_iface = None
@@ -966,24 +995,10 @@ class nfvo_db(db_base.db_base):
                 vnf_mgmt_access_vm = vnf_mgmt_access.get("vm_id")
                 vnf["ip_address"] = vnf_mgmt_access.get("ip-address")
 
-            # instance vms
-            cmd = "SELECT iv.uuid as uuid, vim_vm_id, status, error_msg, vim_info, iv.created_at as "\
-                    "created_at, name, vms.osm_id as vdu_osm_id, vim_name, vms.uuid as vm_uuid, related"\
-                    " FROM instance_vms as iv join vms on iv.vm_id=vms.uuid "\
-                    " WHERE instance_vnf_id='{}' ORDER BY iv.created_at".format(vnf['uuid'])
-            self.logger.debug(cmd)
-            self.cur.execute(cmd)
-            vnf['vms'] = self.cur.fetchall()
+            vnf['vms'] = vms_by_vnf[vnf['uuid']]
             for vm in vnf['vms']:
                 vm_manage_iface_list=[]
-                # instance_interfaces
-                cmd = "SELECT vim_interface_id, instance_net_id, internal_name,external_name, mac_address,"\
-                        " ii.ip_address as ip_address, vim_info, i.type as type, sdn_port_id, i.uuid"\
-                        " FROM instance_interfaces as ii join interfaces as i on ii.interface_id=i.uuid"\
-                        " WHERE instance_vm_id='{}' ORDER BY i.created_at".format(vm['uuid'])
-                self.logger.debug(cmd)
-                self.cur.execute(cmd )
-                vm['interfaces'] = self.cur.fetchall()
+                vm['interfaces'] = interfaces_by_vm[vm['uuid']]
                 for iface in vm['interfaces']:
                     if vnf_mgmt_access_iface and vnf_mgmt_access_iface == iface["uuid"]:
                         if not vnf["ip_address"]:
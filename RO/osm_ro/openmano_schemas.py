@@ -85,6 +85,12 @@ config_schema = {
         "http_port": port_schema,
         "http_admin_port": port_schema,
         "http_host": nameshort_schema,
+        "http_server": nameshort_schema,
+        "http_server_workers": integer1_schema,
+        "http_server_backlog": integer1_schema,
+        "http_server_keepalive": boolean_schema,
+        "http_server_keepalive_timeout": integer1_schema,
+        "http_log_payload_sample": {"type": "number", "minimum": 0, "maximum": 1},
         "auto_push_VNF_to_VIMs": boolean_schema,
         "vnf_repository": path_schema,
         "db_host": nameshort_schema,
@@ -95,6 +101,10 @@ config_schema = {
         "db_ovim_user": nameshort_schema,
         "db_ovim_passwd": {"type":"string"},
         "db_ovim_name": nameshort_schema,
+        "db_pool_size": integer1_schema,
+        "db_pool_idle_timeout": integer1_schema,
+        "db_pool_wait_timeout": integer1_schema,
+        "db_pool_wait_warning": {"type": "number", "minimum": 0},
         # Next fields will disappear once the MANO API includes appropriate primitives
         "vim_url": http_schema,
         "vim_url_admin": http_schema,
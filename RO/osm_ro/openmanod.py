@@ -45,8 +45,9 @@ import socket
 from yaml import MarkedYAMLError
 
 from osm_ro import httpserver, nfvo, nfvo_db
+from osm_ro.http_tools import request_processing
 from osm_ro.openmano_schemas import config_schema
-from osm_ro.db_base import db_base_Exception
+from osm_ro.db_base import db_base_Exception, pool_config
 from osm_ro.wim.engine import WimEngine
 from osm_ro.wim.persistence import WimPersistence
 import osm_ro
@@ -55,7 +56,7 @@ __author__ = "Alfonso Tierno, Gerardo Garcia, Pablo Montes"
 __date__ = "$26-aug-2014 11:09:29$"
 __version__ = "8.0.0.post1"
 version_date = "Jul 2020"
-database_version = 41      # expected database schema version
+database_version = 42      # expected database schema version
 
 global global_config
 global logger
@@ -68,6 +69,7 @@ class LoadConfigurationException(Exception):
 def load_configuration(configuration_file):
     default_tokens = {'http_port': 9090,
                       'http_host': 'localhost',
+                      'http_server': 'threadpool',
                       'http_console_proxy': True,
                       'http_console_host': None,
                       'log_level': 'DEBUG',
@@ -180,6 +182,7 @@ if __name__ == "__main__":
         'RO_DB_NAME': 'db_name',
         'RO_DB_USER': 'db_user',
         'RO_DB_PASSWORD': 'db_passwd',
+        'RO_DB_POOL_SIZE': 'db_pool_size',
         'RO_DB_OVIM_HOST': 'db_ovim_host',
         'RO_DB_OVIM_NAME': 'db_ovim_name',
         'RO_DB_OVIM_USER': 'db_ovim_user',
@@ -263,7 +266,7 @@ if __name__ == "__main__":
                 if not env_k.startswith("RO_") or env_k not in env2config or not env_v:
                     continue
                 global_config[env2config[env_k]] = env_v
-                if env_k.endswith("PORT"):  # convert to int, skip if not possible
+                if env_k.endswith("PORT") or env_k.endswith("SIZE"):  # convert to int, skip if not possible
                     global_config[env2config[env_k]] = int(env_v)
             except Exception as e:
                 logger.warning("skipping environ '{}={}' because exception '{}'".format(env_k, env_v, e))
@@ -314,7 +317,7 @@ if __name__ == "__main__":
             global_config["logger_" + log_module] = logger_module
 
         # Initialize DB connection
-        mydb = nfvo_db.nfvo_db()
+        mydb = nfvo_db.nfvo_db(**pool_config(global_config))
         mydb.connect(global_config['db_host'], global_config['db_user'], global_config['db_passwd'],
                      global_config['db_name'])
         db_path = osm_ro.__path__[0] + "/database_utils"
@@ -349,16 +352,22 @@ if __name__ == "__main__":
         # ---
         nfvo.start_service(mydb, wim_persistence, wim_engine)
 
+        request_processing.payload_log_sample = global_config.get('http_log_payload_sample', 1)
+        http_server_options = {k[len("http_server_"):]: v for k, v in global_config.items()
+                               if k.startswith("http_server_")}
         httpthread = httpserver.httpserver(
             mydb, False,
             global_config['http_host'], global_config['http_port'],
-            wim_persistence, wim_engine
+            wim_persistence, wim_engine,
+            server=global_config['http_server'], server_options=http_server_options
         )
 
         httpthread.start()
         if 'http_admin_port' in global_config:
             httpthreadadmin = httpserver.httpserver(mydb, True, global_config['http_host'],
-                                                    global_config['http_admin_port'])
+                                                    global_config['http_admin_port'],
+                                                    server=global_config['http_server'],
+                                                    server_options=http_server_options)
             httpthreadadmin.start()
         time.sleep(1)
         logger.info('Waiting for http clients')
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+# pylint: disable=E1101
+import unittest
+from threading import Event, Thread
+
+from mock import MagicMock, patch
+from MySQLdb import OperationalError
+
+from ..db_base import ConnectionPool, db_base, db_base_Exception, pool_config
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_connections_are_reused(self):
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        pool = ConnectionPool(connect, max_size=2)
+        con = pool.get()
+        pool.put(con)
+        self.assertIs(pool.get(), con)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_wait_timeout(self):
+        pool = ConnectionPool(MagicMock(), max_size=1, wait_timeout=0.1)
+        pool.get()
+        with self.assertRaises(db_base_Exception):
+            pool.get()
+        self.assertEqual(pool.metrics["checkouts"], 1)
+
+    def test_wait_for_free_connection(self):
+        pool = ConnectionPool(MagicMock(), max_size=1, wait_timeout=5)
+        con = pool.get()
+        thread = Thread(target=lambda: pool.get())
+        thread.start()
+        pool.put(con)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(pool.metrics["checkouts"], 2)
+
+    def test_idle_connections_are_reaped(self):
+        pool = ConnectionPool(MagicMock(side_effect=lambda: MagicMock()), max_size=2, idle_timeout=10)
+        con = pool.get()
+        pool.put(con)
+        with patch("osm_ro.db_base.time.time", return_value=pool._idle[0][1] + 11):
+            self.assertIsNot(pool.get(), con)
+        con.close.assert_called_once_with()
+        self.assertEqual(pool.metrics["reaped"], 1)
+
+
+class TestPooledTransaction(unittest.TestCase):
+    def setUp(self):
+        self.db = db_base(pool_size=2)
+        self.db._new_connection = MagicMock(side_effect=lambda: MagicMock())
+        self.db.connect()
+
+    def test_transactions_run_in_parallel(self):
+        inside = Event()
+        release = Event()
+        cursors = []
+
+        def _transaction():
+            with self.db.transaction() as cursor:
+                cursors.append(cursor)
+                inside.set()
+                release.wait(5)
+
+        thread = Thread(target=_transaction)
+        thread.start()
+        self.assertTrue(inside.wait(5))
+        # a second transaction is not blocked by the ongoing one
+        with self.db.transaction() as cursor:
+            self.assertIs(self.db.cur, cursor)
+        release.set()
+        thread.join(5)
+        self.assertIsNot(cursors[0], cursor)
+        self.assertEqual(self.db.pool.metrics["created"], 2)
+
+    def test_broken_connection_is_discarded(self):
+        with self.assertRaises(OperationalError):
+            with self.db.transaction():
+                con = self.db.con
+                raise OperationalError(2006, "MySQL server has gone away")
+        con.close.assert_called_once_with()
+        self.assertEqual(self.db.pool.metrics["discarded"], 1)
+        self.assertIsNot(self.db.con, con)
+
+    def test_pool_config(self):
+        config = {"db_host": "localhost", "db_pool_size": 5, "db_pool_idle_timeout": 30}
+        self.assertEqual(pool_config(config), {"pool_size": 5, "pool_idle_timeout": 30})
+
+
+if __name__ == '__main__':
+    unittest.main()
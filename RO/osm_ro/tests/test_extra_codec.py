@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+import unittest
+from datetime import datetime
+
+import yaml
+
+from ..extra_codec import MARKER, decode_extra, encode_extra
+
+EXTRA = {
+    "params": ["vm0", "image-id", "flavor-id", True, [{"name": "eth0", "type": "virtual", "port_security": None}]],
+    "depends_on": [0, "ACTION-1234.1"],
+    "created": True,
+    "created_items": {"port:4c5b": True, "volume:9f1e": False},
+    "vim_info": "{status: ACTIVE}\n",
+    "sdn_net_id": None,
+}
+
+
+class TestExtraCodec(unittest.TestCase):
+    def test_round_trip(self):
+        text = encode_extra(EXTRA)
+        self.assertTrue(text.startswith(MARKER))
+        self.assertEqual(decode_extra(text), EXTRA)
+
+    def test_legacy_yaml(self):
+        text = yaml.safe_dump(EXTRA, default_flow_style=True, width=256)
+        self.assertEqual(decode_extra(text), EXTRA)
+
+    def test_readable_as_yaml(self):
+        # former versions parse the column as yaml
+        self.assertEqual(yaml.safe_load(encode_extra(EXTRA)), EXTRA)
+
+    def test_non_json_values_are_kept_as_yaml(self):
+        extra = {"params": {1: "integer key"}, "date": datetime(2020, 7, 16)}
+        text = encode_extra(extra)
+        self.assertFalse(text.startswith(MARKER))
+        self.assertEqual(decode_extra(text), extra)
+
+    def test_empty(self):
+        self.assertIsNone(decode_extra(None))
+        self.assertIsNone(decode_extra(""))
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            decode_extra('#extra:99\n{"params": null}')
+
+
+if __name__ == '__main__':
+    unittest.main()
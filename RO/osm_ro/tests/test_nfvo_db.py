@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+# pylint: disable=E1101
+import re
+import unittest
+from uuid import uuid4
+
+from mock import MagicMock
+
+from ..nfvo_db import nfvo_db
+
+INSTANCE_ID = str(uuid4())
+
+
+class FakeCursor(object):
+    """Cursor that answers the queries of get_instance_scenario from an
+    in-memory instance with ``num_vnfs`` VNFs of ``num_vms`` VMs, each one
+    with ``num_ifaces`` interfaces, counting the number of queries executed
+    """
+
+    def __init__(self, num_vnfs, num_vms, num_ifaces):
+        self.executed = []
+        self.rowcount = 0
+        self._rows = []
+        self.vnfs = [str(uuid4()) for _ in range(num_vnfs)]
+        self.vms = {vnf: [str(uuid4()) for _ in range(num_vms)] for vnf in self.vnfs}
+        self.num_ifaces = num_ifaces
+
+    @staticmethod
+    def _ids(cmd):
+        return re.findall(r"'([0-9a-f-]{36})'", cmd)
+
+    def execute(self, cmd):
+        self.executed.append(cmd)
+        if 'FROM instance_scenarios' in cmd:
+            rows = [{'uuid': INSTANCE_ID, 'name': 'instance', 'cloud_config': None}]
+        elif 'FROM instance_vnfs' in cmd:
+            rows = [{'uuid': vnf, 'mgmt_access': None} for vnf in self.vnfs]
+        elif 'FROM instance_vms' in cmd:
+            rows = [{'uuid': vm, 'vm_uuid': vm, 'instance_vnf_id': vnf}
+                    for vnf in self._ids(cmd) for vm in self.vms[vnf]]
+        elif 'FROM instance_interfaces' in cmd:
+            rows = [{'uuid': '{}if{}'.format(vm, i), 'type': 'mgmt' if not i else 'bridge',
+                     'ip_address': '10.0.0.{}'.format(i), 'instance_vm_id': vm}
+                    for vm in self._ids(cmd) for i in range(self.num_ifaces)]
+        else:
+            rows = []
+        self._rows = rows
+        self.rowcount = len(rows)
+
+    def fetchall(self):
+        return self._rows
+
+
+class TestGetInstanceScenario(unittest.TestCase):
+    def _get_instance(self, num_vnfs, num_vms, num_ifaces=2):
+        cursor = FakeCursor(num_vnfs, num_vms, num_ifaces)
+        db = nfvo_db()
+        db.con = MagicMock()
+        db.con.cursor.return_value = cursor
+        instance = db.get_instance_scenario(INSTANCE_ID)
+        return instance, cursor.executed
+
+    def test_instance_is_assembled(self):
+        instance, _ = self._get_instance(num_vnfs=2, num_vms=3)
+        self.assertEqual(len(instance['vnfs']), 2)
+        for vnf in instance['vnfs']:
+            self.assertEqual(len(vnf['vms']), 3)
+            for vm in vnf['vms']:
+                self.assertEqual(len(vm['interfaces']), 2)
+                self.assertEqual(vm['ip_address'], '10.0.0.0')
+                self.assertNotIn('instance_vnf_id', vm)
+                self.assertNotIn('instance_vm_id', vm['interfaces'][0])
+
+    def test_number_of_queries_does_not_depend_on_size(self):
+        _, small_queries = self._get_instance(num_vnfs=1, num_vms=1)
+        _, big_queries = self._get_instance(num_vnfs=50, num_vms=4, num_ifaces=4)
+        self.assertEqual(len(small_queries), len(big_queries))
+
+    def test_empty_instance(self):
+        instance, _ = self._get_instance(num_vnfs=0, num_vms=0)
+        self.assertEqual(instance['vnfs'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
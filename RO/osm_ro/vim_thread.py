@@ -44,7 +44,7 @@ The task content is (M: stored at memory, D: stored at database):
                     FINISHED: similar to DONE, but no refresh is needed anymore. Task is maintained at database but
                         it is never processed by any thread
                     SUPERSEDED: similar to FINSISHED, but nothing has been done to completed the task.
-    MD  extra:      text with yaml format at database, dict at memory with:
+    MD  extra:      text encoded with extra_codec (versioned json, or legacy yaml) at database, dict at memory with:
             params:     list with the params to be sent to the VIM for CREATE or FIND. For DELETE the vim_id is taken
                         from other related tasks
             find:       (only for CREATE tasks) if present it should FIND before creating and use if existing. Contains
@@ -84,6 +84,7 @@ from osm_ro_plugin import vimconn
 from osm_ro_plugin.sdnconn import SdnConnectorError
 import yaml
 from osm_ro.db_base import db_base_Exception
+from osm_ro.extra_codec import decode_extra, encode_extra
 from http import HTTPStatus
 from copy import deepcopy
 
@@ -295,7 +296,7 @@ class vim_thread(threading.Thread):
 
                     task["params"] = None
                     if task["extra"]:
-                        extra = yaml.load(task["extra"], Loader=yaml.Loader)
+                        extra = decode_extra(task["extra"])
                     else:
                         extra = {}
                     task["extra"] = extra
@@ -349,7 +350,7 @@ class vim_thread(threading.Thread):
                     task_create = related_task
                     # TASK_CREATE
                     if related_task["extra"]:
-                        extra_created = yaml.load(related_task["extra"], Loader=yaml.Loader)
+                        extra_created = decode_extra(related_task["extra"])
                         if extra_created.get("created"):
                             deletion_needed = True
                         related_task["extra"] = extra_created
@@ -369,13 +370,12 @@ class vim_thread(threading.Thread):
                 return False
             elif dependency_task:
                 # move create information  from task_create to relate_task
-                extra_new_created = yaml.load(dependency_task["extra"], Loader=yaml.Loader) or {}
+                extra_new_created = decode_extra(dependency_task["extra"]) or {}
                 extra_new_created["created"] = extra_created["created"]
                 copy_extra_created(copy_to=extra_new_created, copy_from=extra_created)
 
                 self.db.update_rows("vim_wim_actions",
-                                    UPDATE={"extra": yaml.safe_dump(extra_new_created, default_flow_style=True,
-                                                                    width=256),
+                                    UPDATE={"extra": encode_extra(extra_new_created),
                                             "vim_id": task_create.get("vim_id")},
                                     WHERE={self.target_k: self.target_v,
                                            "instance_action_id": dependency_task["instance_action_id"],
@@ -387,8 +387,7 @@ class vim_thread(threading.Thread):
                 copy_extra_created(copy_to=task["extra"], copy_from=task_create["extra"])
                 # Ensure this task extra information is stored at database
                 self.db.update_rows("vim_wim_actions",
-                                    UPDATE={"extra":  yaml.safe_dump(task["extra"], default_flow_style=True,
-                                                                     width=256)},
+                                    UPDATE={"extra": encode_extra(task["extra"])},
                                     WHERE={self.target_k: self.target_v,
                                            "instance_action_id": task["instance_action_id"],
                                            "task_index": task["task_index"],
@@ -625,7 +624,7 @@ class vim_thread(threading.Thread):
                 task["status"] = related_tasks[0]["status"]
                 task["error_msg"] = related_tasks[0]["error_msg"]
                 task["vim_id"] = related_tasks[0]["vim_id"]
-                extra = yaml.load(related_tasks[0]["extra"], Loader=yaml.Loader)
+                extra = decode_extra(related_tasks[0]["extra"])
                 task["extra"]["vim_status"] = extra.get("vim_status")
                 next_refresh = related_tasks[0]["modified_at"] + 0.001
                 database_update = {"status": task["extra"].get("vim_status", "VIM_ERROR"),
@@ -767,7 +766,7 @@ class vim_thread(threading.Thread):
                 table="vim_wim_actions", modified_time=next_refresh,
                 UPDATE={"status": task["status"], "vim_id": task.get("vim_id"),
                         "error_msg": task["error_msg"],
-                        "extra": yaml.safe_dump(task["extra"], default_flow_style=True, width=256)},
+                        "extra": encode_extra(task["extra"])},
                 WHERE={"instance_action_id": task["instance_action_id"], "task_index": task["task_index"]})
             # Unlock tasks
             self.db.update_rows(
@@ -870,7 +869,7 @@ class vim_thread(threading.Thread):
         task["params"] = None
         task["depends"] = {}
         if task["extra"]:
-            extra = yaml.load(task["extra"], Loader=yaml.Loader)
+            extra = decode_extra(task["extra"])
             task["extra"] = extra
             task["params"] = extra.get("params")
         else:
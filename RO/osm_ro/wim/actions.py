@@ -37,8 +37,7 @@
 import logging
 from time import time
 
-import yaml
-
+from ..extra_codec import decode_extra
 from ..utils import (
     filter_dict_keys,
     filter_out_dict_keys,
@@ -80,7 +79,7 @@ class Action(object):
         'vim_id',              # MD - internal ID used by the VIM to refer to
                                #      the item
         'status',              # MD - SCHEDULED,BUILD,DONE,FAILED,SUPERSEDED
-        'extra',               # MD - text with yaml format at database,
+        'extra',               # MD - text encoded with extra_codec at database,
         #                             dict at memory with:
         # `- params:     list with the params to be sent to the VIM for CREATE
         #                or FIND. For DELETE the vim_id is taken from other
@@ -123,6 +122,11 @@ class Action(object):
     def __repr__(self):
         return super(Action, self).__repr__() + repr(self.as_dict())
 
+    def __lt__(self, other):
+        """Actions are ordered by the time they should be processed at, so
+        they can be kept in a heap (see WimThread.schedule)"""
+        return (self.process_at or 0) < (other.process_at or 0)
+
     def as_dict(self, *fields):
         """Representation of the object as a dict"""
         attrs = (set(self.PROPERTIES) & set(fields)
@@ -410,7 +414,7 @@ class DeleteAction(Action):
 def _expand_extra(record):
     extra = record.pop('extra', None) or {}
     if isinstance(extra, str):
-        extra = yaml.safe_load(extra)
+        extra = decode_extra(extra)
 
     record['params'] = extra.get('params')
     record['depends_on'] = extra.get('depends_on', [])
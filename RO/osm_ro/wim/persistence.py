@@ -51,6 +51,7 @@ from uuid import uuid1 as generate_uuid
 
 import yaml
 
+from ..extra_codec import decode_extra, encode_extra
 from ..utils import (
     check_valid_uuid,
     convert_float_timestamp2str,
@@ -853,6 +854,20 @@ def _unserialize(text):
     return yaml.safe_load(text)
 
 
+def _serialize_field(key, value):
+    """Serialize a field, the ``extra`` of the actions uses its own codec"""
+    if key == 'extra' or key.endswith('.extra'):
+        return encode_extra(value)
+    return _serialize(value)
+
+
+def _unserialize_field(key, text):
+    """Unserialize a field, see ``_serialize_field``"""
+    if key == 'extra' or key.endswith('.extra'):
+        return decode_extra(text)
+    return _unserialize(text)
+
+
 def preprocess_record(record):
     """Small transformations to be applied to the data that cames from the
     user before writing it to the database. By default, filter out timestamps,
@@ -888,7 +903,7 @@ def _postprocess_record(record, hide=_CONFIDENTIAL_FIELDS):
 
 def _postprocess_action(action):
     if action.get('extra'):
-        action['extra'] = _unserialize(action['extra'])
+        action['extra'] = decode_extra(action['extra'])
 
     return action
 
@@ -945,7 +960,8 @@ def unserialize_fields(record, hide=_CONFIDENTIAL_FIELDS,
     keys = (k for k in keys for f in fields if k == f or k.endswith('.'+f))
 
     return merge_dicts(record, {
-        key: hide_confidential_fields(_unserialize(record[key]), hide)
+        key: hide_confidential_fields(_unserialize_field(key, record[key]),
+                                      hide)
         for key in keys if record[key]
     })
 
@@ -956,7 +972,7 @@ def serialize_fields(record, fields=_SERIALIZED_FIELDS):
     keys = (k for k in keys for f in fields if k == f or k.endswith('.'+f))
 
     return merge_dicts(record, {
-        key: _serialize(record[key])
+        key: _serialize_field(key, record[key])
         for key in keys if record[key] is not None
     })
 
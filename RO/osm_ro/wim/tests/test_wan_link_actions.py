@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+import unittest
+from unittest.mock import MagicMock
+
+from ..wan_link_actions import ExternalPortRules, WanLinkCreate
+
+
+def rule(port, **condition):
+    return {'condition': condition,
+            'vim_external_port': {'switch': 'switch', 'port': port}}
+
+
+def linear_match(rules, vim_info):
+    """Reference implementation: evaluate every rule in order"""
+    return next((r for r in rules
+                 if WanLinkCreate._evaluate_rule(r, vim_info)), None)
+
+
+class TestExternalPortRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = [
+            rule('p0', **{'provider:physical_network': 'physnet0'}),
+            rule('p1', **{'provider:physical_network': 'physnet1',
+                          'provider:segmentation_id': 10}),
+            rule('p2', **{'provider:physical_network': 'physnet1'}),
+            rule('p3', **{'provider:network_type': ['vlan', 'flat']}),
+            rule('p4', **{'provider:physical_network': 'physnet0'}),
+            rule('default'),
+        ]
+        self.compiled = ExternalPortRules(self.rules)
+
+    def assert_same_as_linear(self, vim_info):
+        self.assertIs(self.compiled.match(vim_info),
+                      linear_match(self.rules, vim_info))
+
+    def test_first_match_is_kept(self):
+        vim_info = {'provider:physical_network': 'physnet0'}
+        self.assertEqual(
+            self.compiled.match(vim_info)['vim_external_port']['port'], 'p0')
+        self.assert_same_as_linear(vim_info)
+
+    def test_more_specific_rule_before(self):
+        for vim_info in ({'provider:physical_network': 'physnet1',
+                          'provider:segmentation_id': 10},
+                         {'provider:physical_network': 'physnet1',
+                          'provider:segmentation_id': 11}):
+            self.assert_same_as_linear(vim_info)
+
+    def test_non_hashable_values(self):
+        self.assert_same_as_linear(
+            {'provider:network_type': ['vlan', 'flat']})
+        self.assert_same_as_linear(
+            {'provider:physical_network': ['physnet0']})
+
+    def test_no_match(self):
+        compiled = ExternalPortRules(self.rules[:-1])
+        self.assertIsNone(compiled.match({'other': 'value'}))
+
+
+class TestEvaluateRules(unittest.TestCase):
+    def setUp(self):
+        self.action = WanLinkCreate({'id': 1}, logger=MagicMock())
+        self.action.rules_cache = {}
+
+    def test_rules_are_compiled_once(self):
+        rules = [rule('p0', physical='net0')]
+        compiled = self.action._get_external_port_rules('dc', rules)
+        self.assertIs(
+            self.action._get_external_port_rules('dc', list(rules)), compiled)
+        self.assertEqual(
+            self.action._evaluate_rules(compiled, {'physical': 'net0'}),
+            ('switch', 'p0'))
+
+    def test_cache_invalidated_when_config_changes(self):
+        rules = [rule('p0', physical='net0')]
+        self.action._get_external_port_rules('dc', rules)
+        new_rules = [rule('p1', physical='net0')]
+        compiled = self.action._get_external_port_rules('dc', new_rules)
+        self.assertEqual(
+            self.action._evaluate_rules(compiled, {'physical': 'net0'}),
+            ('switch', 'p1'))
+
+    def test_evaluate_plain_list(self):
+        rules = [rule('p0', physical='net0')]
+        self.assertIsNone(
+            self.action._evaluate_rules(rules, {'physical': 'net1'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -312,18 +312,28 @@ class TestWimThread(unittest.TestCase):
         # When we call the refresh_elements
         processed = self.thread.process_list('refresh')
 
-        # Then we should have 25 updates (since SUPERSEDED updates are cheap,
-        # they are not counted for the limits)
-        self.assertEqual(processed, 25)
+        # Then we should have 20 updates: 10 refreshes plus the 10 SUPERSEDED
+        # tasks found before them (since SUPERSEDED updates are cheap, they
+        # are not counted for the limits)
+        self.assertEqual(processed, 20)
 
-        # The SUPERSEDED tasks should be removed, 5 tasks should be untouched,
-        # and 10 tasks should be rescheduled
+        # Those SUPERSEDED tasks should be removed, 5 SUPERSEDED and 5 active
+        # tasks should be untouched, and 10 tasks should be rescheduled
         refresh_tasks = self.thread.refresh_tasks
         old = [t for t in refresh_tasks if t.process_at <= now]
         new = [t for t in refresh_tasks if t.process_at > now]
-        self.assertEqual(len(old), 5)
+        self.assertEqual(len(old), 10)
+        self.assertEqual(len([t for t in old if t.is_superseded]), 5)
         self.assertEqual(len(new), 10)
+        self.assertEqual(len(self.thread.refresh_tasks), 20)
+
+        # The remaining SUPERSEDED tasks are removed in the next round
+        processed = self.thread.process_list('refresh')
+        self.assertEqual(processed, 10)
+        self.assertFalse(any(t.is_superseded
+                             for t in self.thread.refresh_tasks))
         self.assertEqual(len(self.thread.refresh_tasks), 15)
+        self.assertEqual(self.thread.metrics['refresh_depth'], 15)
 
 
 if __name__ == '__main__':
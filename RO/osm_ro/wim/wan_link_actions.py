@@ -93,7 +93,63 @@ class RefreshMixin(object):
         return result
 
 
+class ExternalPortRules(object):
+    """Index of the ``external_connections`` rules of a datacenter config,
+    so that the rule that applies to a ``vim_info`` is found without
+    evaluating all of them.
+
+    Rules are grouped by the keys of their conditions. For each group, a
+    dict maps the condition values to the position of the first rule with
+    them, so finding the first matching rule needs one lookup per group
+    instead of one evaluation per rule. Rules with non hashable condition
+    values are evaluated one by one, as :obj:`WanLinkCreate._evaluate_rule`
+    does.
+
+    Please check :obj:`WanLinkCreate._evaluate_rules` for the format of the
+    rules.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._index = {}  # condition keys => condition values => position
+        self._unindexed = []  # (position, rule)
+        for position, rule in enumerate(rules):
+            condition = rule.get('condition', {}) or {}
+            keys = tuple(sorted(condition))
+            try:
+                values = tuple(condition[k] for k in keys)
+                self._index.setdefault(keys, {}).setdefault(values, position)
+            except TypeError:  # not hashable
+                self._unindexed.append((position, rule))
+
+    def match(self, vim_info):
+        """Return the first rule whose conditions are met by ``vim_info``,
+        or None
+        """
+        first = len(self.rules)
+        for keys, positions in self._index.items():
+            try:
+                position = positions.get(
+                    tuple(safe_get(vim_info, k) for k in keys), first)
+            except TypeError:
+                # A non hashable value cannot be equal to the indexed ones
+                continue
+            first = min(first, position)
+        for position, rule in self._unindexed:
+            if position >= first:
+                break
+            if WanLinkCreate._evaluate_rule(rule, vim_info):
+                first = position
+                break
+
+        return self.rules[first] if first < len(self.rules) else None
+
+
 class WanLinkCreate(RefreshMixin, CreateAction):
+    rules_cache = None
+    """Dict where the :obj:`ExternalPortRules` of each datacenter are
+    kept between tasks. It is set by the WIM thread that runs the task"""
+
     def fail(self, persistence, reason, status='FAILED'):
         changes = {'status': 'ERROR', 'error_msg': truncate(reason)}
         persistence.update_wan_link(self.item_id, changes)
@@ -170,6 +226,7 @@ class WanLinkCreate(RefreshMixin, CreateAction):
         datacenter_id = instance_net['datacenter_id']
         datacenter = persistence.get_datacenter_by(datacenter_id)
         rules = safe_get(datacenter, 'config.external_connections', {}) or {}
+        rules = self._get_external_port_rules(datacenter_id, rules)
         vim_info = instance_net.get('vim_info', {}) or {}
         # Alternatively, we can look for it, using the SDN assist
         external_port = (self._evaluate_rules(rules, vim_info) or
@@ -219,6 +276,18 @@ class WanLinkCreate(RefreshMixin, CreateAction):
         self.logger.debug("No ports found for sdn_net_id='{}'", instance_net['sdn_net_id'])
         return None
 
+    def _get_external_port_rules(self, datacenter_id, rules):
+        """Obtain the :obj:`ExternalPortRules` for the rules of a datacenter,
+        reusing the ones at ``rules_cache`` unless the rules have changed
+        """
+        if self.rules_cache is None:
+            return ExternalPortRules(rules)
+        compiled = self.rules_cache.get(datacenter_id)
+        if compiled is None or compiled.rules != rules:
+            compiled = ExternalPortRules(rules)
+            self.rules_cache[datacenter_id] = compiled
+        return compiled
+
     def _evaluate_rules(self, rules, vim_info):
         """Given a ``vim_info`` dict from a ``instance_net`` record, evaluate
         the set of rules provided during the VIM/datacenter registration to
@@ -266,10 +335,11 @@ class WanLinkCreate(RefreshMixin, CreateAction):
         connection.
 
         Arguments:
-            rules (list): Set of dicts containing the keys ``condition`` and
-                ``vim_external_port``. This list should be extracted from
-                ``vim['config']['external_connections']`` (as stored in the
-                database).
+            rules (list or ExternalPortRules): Set of dicts containing the keys
+                ``condition`` and ``vim_external_port``. This list should be
+                extracted from ``vim['config']['external_connections']`` (as
+                stored in the database). It can be already compiled as an
+                :obj:`ExternalPortRules`.
             vim_info (dict): Information given by the VIM Connector, against
                which the rules will be evaluated.
 
@@ -277,10 +347,12 @@ class WanLinkCreate(RefreshMixin, CreateAction):
             tuple: switch id (local datacenter switch) and port or None if
                 the rule does not match.
         """
-        rule = next((r for r in rules if self._evaluate_rule(r, vim_info)), {})
+        if not isinstance(rules, ExternalPortRules):
+            rules = ExternalPortRules(rules)
+        rule = rules.match(vim_info) or {}
         if 'vim_external_port' not in rule:
             self.logger.debug('No external port found.\n'
-                              'rules:\n%r\nvim_info:\n%r\n\n', rules, vim_info)
+                              'rules:\n%r\nvim_info:\n%r\n\n', rules.rules, vim_info)
             return None
 
         return (rule['vim_external_port']['switch'],
@@ -43,15 +43,14 @@ import logging
 import threading
 from contextlib import contextmanager
 from functools import partial
-from itertools import islice, chain, takewhile
-from operator import itemgetter, attrgetter
+from heapq import heappop, heappush
 # from sys import exc_info
 from time import time, sleep
 
 import queue
 
 from . import wan_link_actions
-from ..utils import ensure, partition, pipe
+from ..utils import ensure
 from .actions import IGNORE, PENDING, REFRESH
 from .errors import (
     DbBaseException,
@@ -124,10 +123,18 @@ class WimThread(threading.Thread):
         self.task_queue = queue.Queue(self.QUEUE_SIZE)
 
         self.refresh_tasks = []
-        """Time ordered task list for refreshing the status of WIM nets"""
+        """Heap, ordered by process_at, of tasks for refreshing the status of
+        WIM nets"""
 
         self.pending_tasks = []
-        """Time ordered task list for creation, deletion of WIM nets"""
+        """Heap, ordered by process_at, of tasks for creation, deletion of
+        WIM nets"""
+
+        self.metrics = {'pending_depth': 0, 'refresh_depth': 0,
+                        'pending_lag': 0.0, 'refresh_lag': 0.0,
+                        'pending_processed': 0, 'refresh_processed': 0}
+        """Queue depth, lag of the most delayed task when each queue was
+        processed the last time (seconds), and number of processed tasks"""
 
         self.grouped_tasks = {}
         """ It contains all the creation/deletion pending tasks grouped by
@@ -138,6 +145,10 @@ class WimThread(threading.Thread):
                     <task2>  # e.g. DELETE task
         """
 
+        self.external_port_rules = {}
+        """Compiled external_connections rules of each datacenter, shared by
+        the WAN link tasks. See wan_link_actions.ExternalPortRules"""
+
         self._insert_task = {
             PENDING: partial(self.schedule, list_name='pending'),
             REFRESH: partial(self.schedule, list_name='refresh'),
@@ -212,6 +223,7 @@ class WimThread(threading.Thread):
         self.refresh_tasks = []
         self.pending_tasks = []
         self.grouped_tasks = {}
+        self.external_port_rules.clear()
 
         offset = 0
 
@@ -240,6 +252,8 @@ class WimThread(threading.Thread):
         task_list = [action_from(task, self.logger) for task in task_list]
 
         for task in task_list:
+            if hasattr(task, 'rules_cache'):
+                task.rules_cache = self.external_port_rules
             group = task.group_key
             self.grouped_tasks.setdefault(group, [])
             # Each task can try to supersede the other ones,
@@ -256,7 +270,7 @@ class WimThread(threading.Thread):
 
     def schedule(self, task, when=None, list_name='pending'):
         """Insert a task in the correct list, respecting the schedule.
-        The refreshing list is ordered by threshold_time (task.process_at)
+        The lists are heaps ordered by threshold_time (task.process_at)
         It is assumed that this is called inside this thread
 
         Arguments:
@@ -272,36 +286,44 @@ class WimThread(threading.Thread):
         when = when or time()
         task.process_at = when
 
-        schedule = (t.process_at for t in processing_list)
-        index = len(list(takewhile(lambda moment: moment <= when, schedule)))
-
-        processing_list.insert(index, task)
+        heappush(processing_list, task)
         self.logger.debug(
-            'Schedule of %s in "%s" - waiting position: %d (%f)',
-            task.id, list_name, index, task.process_at)
+            'Schedule of %s in "%s" - queue depth: %d (%f)',
+            task.id, list_name, len(processing_list), task.process_at)
 
         return task
 
     def process_list(self, list_name='pending'):
-        """Process actions in batches and reschedule them if necessary"""
+        """Process actions in batches and reschedule them if necessary.
+        Superseded actions are discarded when they are due, without counting
+        for the batch size
+        """
         task_list, handler = {
             'refresh': (self.refresh_tasks, self._refresh_single),
             'pending': (self.pending_tasks, self._process_single)}[list_name]
 
         now = time()
-        waiting = ((i, task) for i, task in enumerate(task_list)
-                   if task.process_at is None or task.process_at <= now)
+        if task_list:
+            self.metrics[list_name + '_lag'] = max(
+                0.0, now - (task_list[0].process_at or now))
 
-        is_superseded = pipe(itemgetter(1), attrgetter('is_superseded'))
-        superseded, active = partition(is_superseded, waiting)
-        superseded = [(i, t.save(self.persist)) for i, t in superseded]
-
-        batch = islice(active, self.BATCH)
-        refreshed = [(i, handler(t)) for i, t in batch]
-
-        # Since pop changes the indexes in the list, we need to do it backwards
-        remove = sorted([i for i, _ in chain(refreshed, superseded)])
-        return len([task_list.pop(i) for i in reversed(remove)])
+        processed = active = 0
+        while task_list and active < self.BATCH:
+            if (task_list[0].process_at or 0) > now:
+                break
+            task = heappop(task_list)
+            processed += 1
+            if task.is_superseded:
+                task.save(self.persist)
+            else:
+                # the handler can schedule the task again, but never before
+                # now, so it is not processed twice in the same call
+                active += 1
+                handler(task)
+
+        self.metrics[list_name + '_depth'] = len(task_list)
+        self.metrics[list_name + '_processed'] += processed
+        return processed
 
     def _refresh_single(self, task):
         """Refresh just a single task, and reschedule it if necessary"""
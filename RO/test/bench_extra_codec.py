@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Micro-benchmark of the decoding of the 'extra' column of vim_wim_actions, done by the vim threads for every task.
+It compares the former yaml.load with the python Loader, a yaml load with the libyaml CSafeLoader, and the
+versioned json of osm_ro/extra_codec.py, over the extra of a VM creation task with --interfaces interfaces.
+E.g.:  python3 bench_extra_codec.py --interfaces 8 --repeat 2000
+'''
+
+import sys
+import timeit
+from argparse import ArgumentParser
+from os import path
+
+import yaml
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from osm_ro.extra_codec import decode_extra, encode_extra  # noqa
+
+
+def build_extra(interfaces):
+    net_list = [{"name": "eth{}".format(i), "net_id": "4c5b{:04d}-0f4e-4c6b-a8a1-3a1e9b7fd2c1".format(i),
+                 "type": "virtual", "model": None, "mac_address": None, "port_security": True, "floating_ip": False,
+                 "use": "data", "vpci": None, "bw": None}
+                for i in range(interfaces)]
+    return {
+        "params": ["vnf-vm", "description", True, "ea2c6a0e-9c1f-4b55-8d8e-3d0c3b1f04b5",
+                   "0c9b2a6e-1dc4-4b8f-b0f2-8f6a2b3c4d5e", "#cloud-config\n", net_list, None, None],
+        "depends_on": list(range(interfaces)),
+        "created": True,
+        "created_items": {"port:{:04d}".format(i): True for i in range(interfaces)},
+        "vim_info": "{addresses: {}, status: ACTIVE, flavor: {id: 0c9b2a6e}}\n",
+        "interfaces": [{"vim_info": "{status: ACTIVE}\n", "mac_address": "fa:16:3e:00:00:{:02x}".format(i),
+                        "vim_net_id": net_list[i]["net_id"], "ip_address": "10.0.0.{}".format(i)}
+                       for i in range(interfaces)],
+    }
+
+
+def measure(label, fn, repeat):
+    elapsed = min(timeit.repeat(fn, number=repeat, repeat=3))
+    print("{:32} {:9.1f} us/call".format(label, elapsed / repeat * 1e6))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Decoding cost of the vim_wim_actions 'extra' column")
+    parser.add_argument("--interfaces", type=int, default=8, help="interfaces of the VM task (default 8)")
+    parser.add_argument("--repeat", type=int, default=2000, help="decodes per measure (default 2000)")
+    args = parser.parse_args()
+    extra = build_extra(args.interfaces)
+    legacy = yaml.safe_dump(extra, default_flow_style=True, width=256)
+    encoded = encode_extra(extra)
+    print("sizes: yaml {} bytes, versioned json {} bytes".format(len(legacy), len(encoded)))
+    measure("yaml.load Loader (former)", lambda: yaml.load(legacy, Loader=yaml.Loader), args.repeat)
+    if hasattr(yaml, "CSafeLoader"):
+        measure("yaml.load CSafeLoader", lambda: yaml.load(legacy, Loader=yaml.CSafeLoader), args.repeat)
+    measure("decode_extra legacy yaml", lambda: decode_extra(legacy), args.repeat)
+    measure("decode_extra versioned json", lambda: decode_extra(encoded), args.repeat)
+    measure("yaml.safe_dump (former)", lambda: yaml.safe_dump(extra, default_flow_style=True, width=256),
+            args.repeat)
+    measure("encode_extra", lambda: encode_extra(extra), args.repeat)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Load test of the WSGI servers usable by openmanod (see 'http_server' at openmanod.cfg).
+A bottle application with a GET route that takes --delay seconds, emulating a database or VIM access, is served
+with each server while --clients concurrent clients send GET requests. Throughput and latencies are printed.
+E.g.:  python3 bench_http_server.py --clients 20 --requests 50 --delay 0.01
+'''
+
+import sys
+import time
+import threading
+from argparse import ArgumentParser
+from http.client import HTTPConnection
+from os import path
+
+import bottle
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from osm_ro.http_tools.server import ThreadPoolServer  # noqa
+
+
+def build_app(delay):
+    app = bottle.Bottle()
+
+    @app.get('/openmano/<tenant_id>/vnfs')
+    def _get_vnfs(tenant_id):
+        time.sleep(delay)
+        return {"vnfs": [{"uuid": "{}-{}".format(tenant_id, i), "name": "vnf{}".format(i)} for i in range(20)]}
+
+    return app
+
+
+def start_server(server, app, **options):
+    adapter = ThreadPoolServer(host="127.0.0.1", port=0, **options) if server == "threadpool" else \
+        bottle.server_names[server](host="127.0.0.1", port=0, **options)
+    adapter.quiet = True
+    if server == "wsgiref":
+        # the bottle adapter does not expose the listening socket, so it is served here in the same way
+        from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(*args, **kw):
+                pass
+
+        srv = make_server("127.0.0.1", 0, app, handler_class=QuietHandler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv.server_port, srv.shutdown
+    thread = threading.Thread(target=adapter.run, args=(app,), daemon=True)
+    thread.start()
+    while not getattr(adapter, "srv", None):
+        time.sleep(0.01)
+    return adapter.port, adapter.srv.shutdown
+
+
+def client(port, requests, keepalive, latencies):
+    con = None
+    for _ in range(requests):
+        if not con:
+            con = HTTPConnection("127.0.0.1", port, timeout=60)
+        start = time.time()
+        con.request("GET", "/openmano/tenant/vnfs")
+        response = con.getresponse()
+        response.read()
+        latencies.append(time.time() - start)
+        if not keepalive or response.will_close:
+            con.close()
+            con = None
+    if con:
+        con.close()
+
+
+def run_load(server, args, **options):
+    port, shutdown = start_server(server, build_app(args.delay), **options)
+    latencies = []
+    clients = [threading.Thread(target=client, args=(port, args.requests, args.keepalive, latencies))
+               for _ in range(args.clients)]
+    start = time.time()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.time() - start
+    shutdown()
+    latencies.sort()
+    print("{:12} {:8} requests in {:6.2f}s  {:8.1f} req/s  p50 {:6.1f}ms  p99 {:6.1f}ms".format(
+        server, len(latencies), elapsed, len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Concurrent GET throughput of the openmanod WSGI servers")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent clients (default 20)")
+    parser.add_argument("--requests", type=int, default=50, help="requests per client (default 50)")
+    parser.add_argument("--delay", type=float, default=0.01, help="seconds taken by each request (default 0.01)")
+    parser.add_argument("--workers", type=int, default=20, help="threadpool workers (default 20)")
+    parser.add_argument("--no-keepalive", dest="keepalive", action="store_false",
+                        help="open a new connection per request")
+    parser.add_argument("--servers", default="wsgiref,threadpool",
+                        help="comma separated servers to test (default wsgiref,threadpool)")
+    args = parser.parse_args()
+    for server in args.servers.split(","):
+        options = {}
+        if server == "threadpool":
+            options = {"workers": args.workers, "keepalive": args.keepalive}
+        run_load(server, args, **options)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Benchmark of the openflow rules computation of SdnConnectorOpenFlow (RO-plugin/osm_ro_plugin/openflow_conn.py).
+An ELAN network of --ports ports is created and then edited removing one port, on a mocked openflow controller that
+already contains --rules rules of other networks. The time of looking for the flows with the former linear
+lookup, kept as reference at osm_ro_plugin/tests/test_openflow_conn.py, is shown with --legacy.
+E.g.:  python3 bench_openflow_flows.py --ports 100 --rules 20000
+'''
+
+import logging
+import sys
+import time
+from argparse import ArgumentParser
+from os import path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "..", "RO-plugin"))
+from osm_ro_plugin.openflow_conn import SdnConnectorOpenFlow  # noqa
+from osm_ro_plugin.tests.test_openflow_conn import check_flow_already_present  # noqa
+
+
+def build_connector(num_ports, num_rules):
+    rules = {}
+    for i in range(num_rules):
+        rules["other.{}".format(i)] = {"name": "other.{}".format(i), "priority": 1000, "net_id": "other",
+                                       "ingress_port": "port{}".format(i % num_ports), "vlan_id": 3000 + i,
+                                       "actions": [("out", "port0")]}
+    of_connector = MagicMock()
+    of_connector.pp2ofi = {"port{}".format(i): i for i in range(num_ports)}
+    of_connector.get_of_rules.side_effect = lambda: list(rules.values())
+    of_connector.new_flow.side_effect = lambda flow: rules.__setitem__(flow["name"], dict(flow))
+    of_connector.del_flow.side_effect = lambda name: rules.pop(name)
+    logger = logging.getLogger("bench")
+    logger.disabled = True
+    return SdnConnectorOpenFlow(None, None, {}, logger, of_connector), rules
+
+
+def build_ports(num_ports):
+    return [{"uuid": "uuid{}".format(i), "vlan": 10, "mac": "fa:16:3e:00:{:02x}:{:02x}".format(i // 256, i % 256),
+             "switch_port": "port{}".format(i)} for i in range(num_ports)]
+
+
+def legacy_lookup(connector, flows, existing_flows):
+    """Former lookup: every flow is compared with all the controller rules"""
+    return [check_flow_already_present(connector.flow_fields, flow, existing_flows) for flow in flows]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Openflow rules computation for ELAN networks")
+    parser.add_argument("--ports", type=int, default=100, help="ports of the ELAN network (default 100)")
+    parser.add_argument("--rules", type=int, default=20000, help="rules of other networks (default 20000)")
+    parser.add_argument("--legacy", action="store_true", help="measure also the former linear lookup")
+    args = parser.parse_args()
+
+    connector, rules = build_connector(args.ports, args.rules)
+    ports = build_ports(args.ports)
+    start = time.time()
+    created_items = connector._set_openflow_rules("ELAN", "net", ports)
+    elapsed = time.time() - start
+    print("create: {} rules in {:.3f}s".format(len(created_items["installed_rules_ids"]), elapsed))
+
+    start = time.time()
+    created_items = connector._set_openflow_rules("ELAN", "net", ports[:-1], created_items=created_items)
+    elapsed = time.time() - start
+    print("edit (rules cached): {} rules in {:.3f}s".format(len(created_items["installed_rules_ids"]), elapsed))
+
+    connector.invalidate_of_rules()
+    start = time.time()
+    created_items = connector._set_openflow_rules("ELAN", "net", ports, created_items=created_items)
+    elapsed = time.time() - start
+    print("edit (rules read again): {} rules in {:.3f}s".format(len(created_items["installed_rules_ids"]),
+                                                                elapsed))
+
+    if args.legacy:
+        flows = connector._compute_net_flows("net", ports)
+        existing_flows = list(rules.values())
+        start = time.time()
+        legacy_lookup(connector, flows, existing_flows)
+        elapsed = time.time() - start
+        print("former linear lookup of {} flows over {} rules: {:.3f}s".format(
+            len(flows), len(existing_flows), elapsed))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Micro-benchmark of the validation of request payloads done by format_in at http_tools/request_processing.py.
+It compares jsonschema.validate, that checks the schema and builds a validator at every call, with the cached
+validators of request_processing.validate, over vnfd_schema_v02 and nsd_schema_v03 payloads of --size elements.
+The cost of the yaml dump of the payload that is written to the log is also shown.
+E.g.:  python3 bench_schema_validation.py --size 20 --repeat 200
+'''
+
+import sys
+import timeit
+from argparse import ArgumentParser
+from os import path
+
+import yaml
+from jsonschema import validate as js_v
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from osm_ro.openmano_schemas import vnfd_schema_v02, nsd_schema_v03  # noqa
+from osm_ro.http_tools.request_processing import validate, compile_schemas  # noqa
+
+
+def build_vnfd(size):
+    return {
+        "schema_version": "0.2",
+        "vnf": {
+            "name": "bench_vnf",
+            "description": "vnf with {} VNFCs".format(size),
+            "external-connections": [{"name": "eth{}".format(i), "type": "bridge", "VNFC": "vm{}".format(i),
+                                      "local_iface_name": "eth0", "description": "interface"}
+                                     for i in range(size)],
+            "VNFC": [{"name": "vm{}".format(i), "description": "VM", "image name": "image", "disk": 10, "vcpus": 2,
+                      "ram": 2048, "bridge-ifaces": [{"name": "eth0"}, {"name": "eth1"}]}
+                     for i in range(size)],
+        }
+    }
+
+
+def build_nsd(size):
+    return {
+        "schema_version": "0.3",
+        "scenario": {
+            "name": "bench_ns",
+            "description": "scenario with {} vnfs".format(size),
+            "vnfs": {"vnf{}".format(i): {"vnf_name": "bench_vnf"} for i in range(size)},
+            "networks": {"net{}".format(i): {"interfaces": [{"vnf": "vnf{}".format(i), "vnf_interface": "eth0"}],
+                                             "type": "e-lan"}
+                         for i in range(size)},
+        }
+    }
+
+
+def measure(label, fn, repeat):
+    elapsed = min(timeit.repeat(fn, number=repeat, repeat=3))
+    print("{:38} {:9.3f} ms/request".format(label, elapsed / repeat * 1000))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Validation cost of openmano request payloads")
+    parser.add_argument("--size", type=int, default=20, help="VNFCs/vnfs/networks of each payload (default 20)")
+    parser.add_argument("--repeat", type=int, default=200, help="validations per measure (default 200)")
+    args = parser.parse_args()
+    compile_schemas((vnfd_schema_v02, nsd_schema_v03))
+    for name, schema, payload in (("vnfd_schema_v02", vnfd_schema_v02, build_vnfd(args.size)),
+                                  ("nsd_schema_v03", nsd_schema_v03, build_nsd(args.size))):
+        measure(name + " jsonschema.validate", lambda: js_v(payload, schema), args.repeat)
+        measure(name + " cached validator", lambda: validate(payload, schema), args.repeat)
+        measure(name + " yaml dump for the log",
+                lambda: yaml.safe_dump(payload, explicit_start=True, indent=4, default_flow_style=False),
+                args.repeat)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+##
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+##
+
+'''
+Benchmark of the WimThread scheduler (osm_ro/wim/wim_thread.py).
+--actions refresh actions are scheduled at random times, a fraction of them is superseded and then the refresh
+queue is processed in BATCH sized rounds until it is empty. The connector and the database are mocked, so only
+the scheduling cost is measured. The time of scheduling with a sorted list (list.insert after a linear search,
+as the thread did before using a heap) is shown as reference.
+E.g.:  python3 bench_wim_scheduler.py --actions 50000
+'''
+
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from itertools import takewhile
+from os import path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "..", "RO-plugin"))
+from osm_ro.wim.wim_thread import WimThread  # noqa
+from osm_ro.wim.wan_link_actions import WanLinkFind  # noqa
+
+
+def build_thread():
+    account = {'uuid': 'account', 'name': 'account', 'wim': {'name': 'wim'}}
+    thread = WimThread(MagicMock(), {}, account, logger=MagicMock())
+    thread.connector = MagicMock()
+    # refreshing is not rescheduled, so that the queue gets empty
+    thread._refresh_single = lambda task: None
+    return thread
+
+
+def build_actions(num, now):
+    return [WanLinkFind({'instance_action_id': 'action', 'task_index': i, 'item': 'instance_wim_nets',
+                         'item_id': str(i), 'action': 'FIND', 'status': 'DONE', 'extra': {}},
+                        logger=MagicMock(), process_at=now - random.random() * 60)
+            for i in range(num)]
+
+
+def legacy_schedule(processing_list, task):
+    """Former WimThread.schedule: linear search plus list insertion"""
+    schedule = (t.process_at for t in processing_list)
+    index = len(list(takewhile(lambda moment: moment <= task.process_at, schedule)))
+    processing_list.insert(index, task)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Scheduling cost of the WIM thread")
+    parser.add_argument("--actions", type=int, default=50000, help="actions to schedule (default 50000)")
+    parser.add_argument("--superseded", type=float, default=0.2,
+                        help="fraction of superseded actions (default 0.2)")
+    parser.add_argument("--legacy", type=int, default=5000,
+                        help="actions to schedule with the former sorted list, 0 to skip (default 5000)")
+    args = parser.parse_args()
+
+    now = time.time()
+    thread = build_thread()
+    actions = build_actions(args.actions, now)
+    start = time.time()
+    for action in actions:
+        thread.schedule(action, action.process_at, 'refresh')
+    scheduled = time.time() - start
+    print("heap: scheduled {} actions in {:.3f}s ({:.1f} us/action)".format(
+        args.actions, scheduled, scheduled / args.actions * 1e6))
+
+    for action in random.sample(actions, int(args.actions * args.superseded)):
+        action.status = 'SUPERSEDED'
+    start = time.time()
+    rounds = 0
+    while thread.process_list('refresh'):
+        rounds += 1
+    processed = time.time() - start
+    print("heap: processed the queue in {} rounds, {:.3f}s ({:.1f} us/action)".format(
+        rounds, processed, processed / args.actions * 1e6))
+    print("metrics: {}".format(thread.metrics))
+
+    if args.legacy:
+        legacy_list = []
+        start = time.time()
+        for action in actions[:args.legacy]:
+            legacy_schedule(legacy_list, action)
+        legacy = time.time() - start
+        print("sorted list: scheduled {} actions in {:.3f}s ({:.1f} us/action)".format(
+            args.legacy, legacy, legacy / args.legacy * 1e6))